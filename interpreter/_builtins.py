@@ -1,6 +1,11 @@
 import objkind
 import scopekind
-from evaluator import _Scope, _Builtin_Func, _Py_Object
+from core import Result
+from evaluator import _Scope, _Builtin_Func, _Py_Object, _shared_obj
+from evaluator import _add_builtin, _variadic
+from evaluator import _seq_len, _list_item, _List_Store, _bool_obj
+from evaluator import _new_list, _store_of, _list_range, _num_obj
+from evaluator import _User_Function, _User_Object_Instance, _Bound_Method
 
 def _str_dict(dict):
     keys = list(dict.value.keys())
@@ -22,10 +27,11 @@ def _str_dict(dict):
 def _str_list(list):
     i = 0
     out = "["
-    while i < len(list.value):
-        obj = list.value[i]
+    size = _seq_len(list)
+    while i < size:
+        obj = _list_item(list, i)
         out += _str_obj(obj)
-        if i + 1 < len(list.value):
+        if i + 1 < size:
             out += ", "
         i += 1
     out += "]"
@@ -58,17 +64,39 @@ def _str_obj(obj):
     else:
         return "<unknown>"
 
+# None devolvido pelos builtins, criado uma unica vez
+_none = _shared_obj(objkind.NONE, None)
+_none.mutable = False
+
 def _obj_none():
-    return _Py_Object(objkind.NONE, None, False)
+    return _none
+
+def _ok(obj):
+    return Result(obj, None)
+
+def _fail(message):
+    return Result(None, message)
 
-def _print_wrapper(obj):
+# os wrappers recebem a lista de argumentos, ver evaluator._Builtin_Func.
+# print, int, str e len nunca falham e retornam o objeto direto
+
+# os argumentos sao separados por espaco, como no Python
+def _print_wrapper(args):
     try:
-        print(_str_obj(obj))
+        out = ""
+        i = 0
+        while i < len(args):
+            if i > 0:
+                out += " "
+            out += _str_obj(args[i])
+            i += 1
+        print(out)
     except:
         pass
     return _obj_none()
 
-def _int_wrapper(obj):
+def _int_wrapper(args):
+    obj = args[0]
     if obj.is_kind(objkind.STR):
         try:
             value = int(obj.value)
@@ -77,7 +105,8 @@ def _int_wrapper(obj):
             pass
     return _obj_none()
 
-def _str_wrapper(obj):
+def _str_wrapper(args):
+    obj = args[0]
     try:
         value = _str_obj(obj)
         return _Py_Object(objkind.STR, value, False)
@@ -85,24 +114,342 @@ def _str_wrapper(obj):
         pass
     return _obj_none()
 
-def _len_wrapper(obj):
+def _len_wrapper(args):
+    obj = args[0]
     if obj.is_kinds([objkind.LIST, objkind.STR]):
         try:
-            value = len(obj.value)
+            value = _seq_len(obj)
             return _Py_Object(objkind.NUM, value, False)
         except:
             pass
     return _obj_none()
 
-def _create_func(func):
-    bf = _Builtin_Func(1, func)
-    return _Py_Object(objkind.BUILTIN_FUNC, bf, False)
+# funcoes de string, implementadas com os metodos de str.
+# A string vem sempre no primeiro argumento, como o receptor
+# do metodo correspondente, ie, join(sep, l) eh sep.join(l)
+
+def _join_wrapper(args):
+    sep = args[0]
+    list = args[1]
+    if not sep.is_kind(objkind.STR):
+        return _fail("expected a string")
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    parts = []
+    i = 0
+    size = _seq_len(list)
+    while i < size:
+        item = _list_item(list, i)
+        if not item.is_kind(objkind.STR):
+            return _fail("list element is not a string")
+        parts += [item.value]
+        i += 1
+    return _ok(_Py_Object(objkind.STR, sep.value.join(parts), False))
+
+# sem o separador, separa nos espacos em branco como o str.split().
+# Os elementos da lista produzida sao celulas novas (ver _List_Store)
+def _split_wrapper(args):
+    s = args[0]
+    if not s.is_kind(objkind.STR):
+        return _fail("expected a string")
+    if len(args) == 1:
+        parts = s.value.split()
+    else:
+        sep = args[1]
+        if not sep.is_kind(objkind.STR):
+            return _fail("expected a string")
+        if sep.value == "":
+            return _fail("empty separator")
+        parts = s.value.split(sep.value)
+    store = _List_Store(objkind.STR, parts)
+    if len(parts) == 0:
+        store.kind = objkind.INVALID
+    return _ok(_Py_Object(objkind.LIST, store, True))
+
+def _find_wrapper(args):
+    s = args[0]
+    sub = args[1]
+    if not s.is_kind(objkind.STR) or not sub.is_kind(objkind.STR):
+        return _fail("expected a string")
+    return _ok(_Py_Object(objkind.NUM, s.value.find(sub.value), False))
+
+def _replace_wrapper(args):
+    s = args[0]
+    old = args[1]
+    new = args[2]
+    if not s.is_kind(objkind.STR):
+        return _fail("expected a string")
+    if not old.is_kind(objkind.STR) or not new.is_kind(objkind.STR):
+        return _fail("expected a string")
+    value = s.value.replace(old.value, new.value)
+    return _ok(_Py_Object(objkind.STR, value, False))
+
+def _startswith_wrapper(args):
+    s = args[0]
+    prefix = args[1]
+    if not s.is_kind(objkind.STR) or not prefix.is_kind(objkind.STR):
+        return _fail("expected a string")
+    return _ok(_bool_obj(s.value.startswith(prefix.value)))
+
+# funcoes de listas e dicionarios, que alteram a lista ou o dicionario
+# no lugar. As listas produzidas sao copias com celulas novas
+
+def _append_wrapper(args):
+    list = args[0]
+    obj = args[1]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    list.list_store().append(obj, False)
+    return _ok(_obj_none())
+
+# remove o ultimo elemento, ou o elemento na posicao pedida
+def _pop_wrapper(args):
+    list = args[0]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    store = list.list_store()
+    if len(store.items) == 0:
+        return _fail("pop from empty list")
+    index = len(store.items) - 1
+    if len(args) == 2:
+        if not args[1].is_kind(objkind.NUM):
+            return _fail("index is not a number")
+        index = args[1].value
+        if index < 0 or index >= len(store.items):
+            return _fail("index out of range")
+    store.detach()
+    item = store.items.pop(index)
+    kind = store.kind
+    if len(store.items) == 0:
+        store.kind = objkind.INVALID
+    if kind == None:
+        return _ok(item.copy())
+    return _ok(_Py_Object(kind, item, True))
+
+def _insert_wrapper(args):
+    list = args[0]
+    index = args[1]
+    obj = args[2]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    if not index.is_kind(objkind.NUM):
+        return _fail("index is not a number")
+    store = list.list_store()
+    if index.value < 0 or index.value > len(store.items):
+        return _fail("index out of range")
+    store.detach()
+    item = store.entry(obj, False)
+    store.items.insert(index.value, item)
+    return _ok(_obj_none())
+
+# tipo da chave de um dicionario, que guarda so o valor (ver _eval_dict)
+def _key_obj(key):
+    if type(key) is str:
+        kind = objkind.STR
+    elif type(key) is bool:
+        kind = objkind.BOOL
+    elif type(key) is int or type(key) is float:
+        kind = objkind.NUM
+    elif key is None:
+        kind = objkind.NONE
+    elif type(key) is _User_Object_Instance:
+        kind = objkind.USER_OBJECT
+    elif type(key) is _User_Function or type(key) is _Bound_Method:
+        kind = objkind.USER_FUNCTION
+    elif type(key) is _Builtin_Func:
+        kind = objkind.BUILTIN_FUNC
+    else:
+        kind = objkind.MODULE
+    return _Py_Object(kind, key, True)
+
+def _keys_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    keys = list(dict.value.keys())
+    i = 0
+    while i < len(keys):
+        out.value.append(_key_obj(keys[i]), True)
+        i += 1
+    return _ok(out)
+
+def _values_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    values = list(dict.value.values())
+    i = 0
+    while i < len(values):
+        out.value.append(values[i], False)
+        i += 1
+    return _ok(out)
+
+# lista de pares [chave, valor]
+def _items_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    keys = list(dict.value.keys())
+    i = 0
+    while i < len(keys):
+        pair = _new_list()
+        pair.value.append(_key_obj(keys[i]), True)
+        pair.value.append(dict.value[keys[i]], False)
+        out.value.append(pair, True)
+        i += 1
+    return _ok(out)
+
+# sem o valor padrao, retorna None se a chave nao existe
+def _get_wrapper(args):
+    dict = args[0]
+    key = args[1]
+    default = _obj_none()
+    if len(args) == 3:
+        default = args[2]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    if not key.is_hashable():
+        return _fail("object is not hashable")
+    if key.value in dict.value:
+        return _ok(dict.value[key.value])
+    return _ok(default)
+
+def _delete_wrapper(args):
+    dict = args[0]
+    key = args[1]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    if not key.is_hashable():
+        return _fail("object is not hashable")
+    if not (key.value in dict.value):
+        return _fail("key not found")
+    del dict.value[key.value]
+    return _ok(_obj_none())
+
+# funcoes de agregacao, feitas sobre os valores dos elementos com as
+# funcoes do Python
+
+# valores dos elementos de uma lista, num _List_Store compacto, se todos
+# tem o mesmo tipo e esse tipo esta em 'kinds'. Os erros sao os mesmos
+# de evaluator._check_unif_bin_types
+def _uniform_values(list, kinds):
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    kind = _store_of(list).kind
+    if kind == None:
+        return _uniform_cells(_list_range(list), kinds)
+    return _values_of_kind(kind, kinds, _list_range(list))
+
+# o mesmo para uma lista de celulas, ie, os argumentos de max(a, b)
+def _uniform_cells(cells, kinds):
+    if len(cells) == 0:
+        return _ok(_List_Store(objkind.INVALID, []))
+    kind = cells[0].kind
+    values = []
+    i = 0
+    while i < len(cells):
+        if cells[i].kind != kind:
+            a = objkind.to_str(kind)
+            b = objkind.to_str(cells[i].kind)
+            return _fail("objects have different types: " + a + " vs " + b)
+        values += [cells[i].value]
+        i += 1
+    return _values_of_kind(kind, kinds, values)
+
+def _values_of_kind(kind, kinds, values):
+    if kind != objkind.INVALID and not (kind in kinds):
+        return _fail("invalid operation on object of type: " + objkind.to_str(kind))
+    return _ok(_List_Store(kind, values))
+
+# um unico argumento eh a lista comparada, ie, min(l) ou min(a, b)
+def _compared_values(args):
+    kinds = [objkind.NUM, objkind.STR]
+    if len(args) == 1:
+        res = _uniform_values(args[0], kinds)
+    else:
+        res = _uniform_cells(args, kinds)
+    if res.ok() and len(res.value.items) == 0:
+        return _fail("empty list")
+    return res
+
+def _sum_wrapper(args):
+    list = args[0]
+    res = _uniform_values(list, [objkind.NUM])
+    if res.failed():
+        return res
+    return _ok(_num_obj(sum(res.value.items)))
+
+def _min_wrapper(args):
+    res = _compared_values(args)
+    if res.failed():
+        return res
+    store = res.value
+    return _ok(_Py_Object(store.kind, min(store.items), True))
+
+def _max_wrapper(args):
+    res = _compared_values(args)
+    if res.failed():
+        return res
+    store = res.value
+    return _ok(_Py_Object(store.kind, max(store.items), True))
+
+def _sorted_wrapper(args):
+    list = args[0]
+    res = _uniform_values(list, [objkind.NUM, objkind.STR])
+    if res.failed():
+        return res
+    store = res.value
+    store.items = sorted(store.items)
+    return _ok(_Py_Object(objkind.LIST, store, True))
+
+# os elementos sao copiados, como em 'l[i]' guardado numa lista
+def _reversed_wrapper(args):
+    list = args[0]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    kind = _store_of(list).kind
+    items = _list_range(list)
+    if kind != None:
+        return _ok(_Py_Object(objkind.LIST, _List_Store(kind, items[::-1]), True))
+    out = _new_list()
+    i = len(items) - 1
+    while i >= 0:
+        out.value.append(items[i], False)
+        i -= 1
+    return _ok(out)
+
+def _abs_wrapper(args):
+    obj = args[0]
+    if not obj.is_kind(objkind.NUM):
+        return _fail("object is not a number")
+    return _ok(_num_obj(abs(obj.value)))
 
 def create_builtin_scope():
     s = _Scope(None, scopekind.BUILTIN)
-    s.add_symbol("print", _create_func(_print_wrapper))
-    s.add_symbol("int", _create_func(_int_wrapper))
-    s.add_symbol("str", _create_func(_str_wrapper))
-    s.add_symbol("len", _create_func(_len_wrapper))
+    _add_builtin(s, "print", _print_wrapper, 0, _variadic, False)
+    _add_builtin(s, "int", _int_wrapper, 1, 1, False)
+    _add_builtin(s, "str", _str_wrapper, 1, 1, False)
+    _add_builtin(s, "len", _len_wrapper, 1, 1, False)
+    _add_builtin(s, "join", _join_wrapper, 2, 2, True)
+    _add_builtin(s, "split", _split_wrapper, 1, 2, True)
+    _add_builtin(s, "find", _find_wrapper, 2, 2, True)
+    _add_builtin(s, "replace", _replace_wrapper, 3, 3, True)
+    _add_builtin(s, "startswith", _startswith_wrapper, 2, 2, True)
+    _add_builtin(s, "append", _append_wrapper, 2, 2, True)
+    _add_builtin(s, "pop", _pop_wrapper, 1, 2, True)
+    _add_builtin(s, "insert", _insert_wrapper, 3, 3, True)
+    _add_builtin(s, "keys", _keys_wrapper, 1, 1, True)
+    _add_builtin(s, "values", _values_wrapper, 1, 1, True)
+    _add_builtin(s, "items", _items_wrapper, 1, 1, True)
+    _add_builtin(s, "get", _get_wrapper, 2, 3, True)
+    _add_builtin(s, "delete", _delete_wrapper, 2, 2, True)
+    _add_builtin(s, "sum", _sum_wrapper, 1, 1, True)
+    _add_builtin(s, "min", _min_wrapper, 1, _variadic, True)
+    _add_builtin(s, "max", _max_wrapper, 1, _variadic, True)
+    _add_builtin(s, "sorted", _sorted_wrapper, 1, 1, True)
+    _add_builtin(s, "reversed", _reversed_wrapper, 1, 1, True)
+    _add_builtin(s, "abs", _abs_wrapper, 1, 1, True)
     return s
-
@@ -0,0 +1,798 @@
+from evaluator import _Py_Object, _check_unif_bin_types, _identity
+from evaluator import _eval_in, _eval_plus, _call_obj, _field_obj
+from evaluator import _index_obj, _slice_obj, _lhs_name, _lhs_index_obj
+from evaluator import _lhs_field_obj, _check_unif_aug_ass_types, _return_obj
+from evaluator import _eval_import, _eval_from, _eval_func
+from evaluator import _eval_declare_class, _load_name, _in_constants_obj
+from evaluator import _shared_obj, _true, _false, _none, _bool_obj, _num_obj
+from evaluator import _method_of, _call_method, _tail_call_obj, _tail_call
+from evaluator import _plus_assign, _new_list, _fresh_kinds
+from evaluator import _hoisted_value, _clear_hoisted
+import lexkind
+import nodekind
+import objkind
+
+# motor que traduz cada no da arvore, uma unica vez, para uma closure.
+# Toda a inspecao de node.kind e node.value.kind acontece aqui, durante
+# a traducao, e a closure resultante so chama as closures dos filhos.
+# Closures de expressao retornam o objeto, ou None com o erro em
+# ctx.err, como _eval_expr, e closures de comando retornam None,
+# um erro ou evaluator._returned, como _eval_sttm.
+class Closure_Compiler:
+    def __init__(self):
+        self.name = "closures"
+        # cache de BLOCK -> closure, compartilhado por todas
+        # as funcoes criadas pelo mesmo 'def'
+        self.blocks = {}
+        # cache de expressao -> closure, para o corpo das
+        # funcoes pequenas (ver resolver._inline_expr)
+        self.exprs = {}
+
+    def get_block(self, block):
+        if block in self.blocks:
+            return self.blocks[block]
+        run = _block(block)
+        self.blocks[block] = run
+        return run
+
+    def run_function(self, ctx, func):
+        if func.code == None:
+            func.code = self.get_block(func.block)
+        return func.code(ctx)
+
+    def run_module(self, ctx, block):
+        run = self.get_block(block)
+        return run(ctx)
+
+    def run_inline(self, ctx, func):
+        if func.inline_code == None:
+            expr = func.inline
+            if not (expr in self.exprs):
+                self.exprs[expr] = _expr(expr)
+            func.inline_code = self.exprs[expr]
+        return func.inline_code(ctx)
+
+def _block(node):
+    sttms = []
+    i = 0
+    while i < len(node.leaves):
+        sttms += [_sttm(node.leaves[i])]
+        i += 1
+    size = len(sttms)
+
+    def run(ctx):
+        i = 0
+        while i < size:
+            out = sttms[i](ctx)
+            if out != None:
+                return out
+            i += 1
+        return None
+    return run
+
+def _sttm(node):
+    if node.kind == nodekind.ASSIGN:
+        return _assign(node)
+    elif node.kind == nodekind.AUGMENTED_ASSIGN:
+        return _aug_assign(node)
+    elif node.kind == nodekind.IF:
+        return _if(node)
+    elif node.kind == nodekind.WHILE:
+        return _while(node)
+    elif node.kind == nodekind.RETURN:
+        return _return(node)
+    elif node.kind == nodekind.TAIL_CALL:
+        return _tail_call_sttm(node)
+    elif node.kind == nodekind.DO:
+        return _do(node)
+    elif node.kind == nodekind.IMPORT:
+        return _declaration(node, _eval_import)
+    elif node.kind == nodekind.FROM_IMPORT:
+        return _declaration(node, _eval_from)
+    elif node.kind == nodekind.FUNC:
+        return _declaration(node, _eval_func)
+    elif node.kind == nodekind.CLASS:
+        return _declaration(node, _eval_declare_class)
+    elif node.kind == nodekind.PASS:
+        return _pass
+    else:
+        return _expr_sttm(node)
+
+def _pass(ctx):
+    return None
+
+# import, from, def e class sao executados poucas vezes,
+# entao delegamos ao avaliador
+def _declaration(node, eval_func):
+    def run(ctx):
+        return eval_func(ctx, node)
+    return run
+
+def _expr_sttm(node):
+    expr = _expr(node)
+    def run(ctx):
+        if expr(ctx) == None:
+            return ctx.err
+        return None
+    return run
+
+def _return(node):
+    expr = _expr(node.leaves[0])
+    def run(ctx):
+        obj = expr(ctx)
+        if obj == None:
+            return ctx.err
+        return _return_obj(ctx, node, obj)
+    return run
+
+def _assign(node):
+    lhs = _lhs(node.leaves[0])
+    rhs = _expr(node.leaves[1])
+    def run(ctx):
+        obj = lhs(ctx)
+        if obj == None:
+            return ctx.err
+
+        exp = rhs(ctx)
+        if exp == None:
+            return ctx.err
+
+        obj.assign(exp)
+        return None
+    return run
+
+def _aug_assign(node):
+    lhs = _lhs(node.leaves[0])
+    rhs = _expr(node.leaves[1])
+    apply = _aug_apply(node)
+    def run(ctx):
+        lhs_obj = lhs(ctx)
+        if lhs_obj == None:
+            return ctx.err
+
+        rhs_obj = rhs(ctx)
+        if rhs_obj == None:
+            return ctx.err
+        return apply(ctx, node, lhs_obj, rhs_obj)
+    return run
+
+_num_kinds = [objkind.NUM]
+_plus_kinds = [objkind.LIST, objkind.NUM, objkind.STR]
+
+def _aug_apply(node):
+    if node.has_lexkind(lexkind.ASSIGN_PLUS):
+        return _aug_plus
+    elif node.has_lexkind(lexkind.ASSIGN_MINUS):
+        return _aug_minus
+    elif node.has_lexkind(lexkind.ASSIGN_MULT):
+        return _aug_mult
+    elif node.has_lexkind(lexkind.ASSIGN_DIV):
+        return _aug_div
+    elif node.has_lexkind(lexkind.ASSIGN_REM):
+        return _aug_rem
+    return _aug_invalid
+
+def _aug_plus(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _plus_kinds)
+    if err != None:
+        return err
+    _plus_assign(node, lhs_obj, rhs_obj)
+    return None
+
+def _aug_minus(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _num_kinds)
+    if err != None:
+        return err
+    lhs_obj.set(lhs_obj.kind, lhs_obj.value - rhs_obj.value)
+    return None
+
+def _aug_mult(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _num_kinds)
+    if err != None:
+        return err
+    lhs_obj.set(lhs_obj.kind, lhs_obj.value * rhs_obj.value)
+    return None
+
+def _aug_div(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _num_kinds)
+    if err != None:
+        return err
+    if rhs_obj.value == 0:
+        return ctx.error("division by zero", node.leaves[1])
+    lhs_obj.set(lhs_obj.kind, lhs_obj.value / rhs_obj.value)
+    return None
+
+def _aug_rem(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _num_kinds)
+    if err != None:
+        return err
+    if rhs_obj.value == 0:
+        return ctx.error("division by zero", node.leaves[1])
+    lhs_obj.set(lhs_obj.kind, lhs_obj.value % rhs_obj.value)
+    return None
+
+def _aug_invalid(ctx, node, lhs_obj, rhs_obj):
+    err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, _num_kinds)
+    if err != None:
+        return err
+    return ctx.error("invalid lexkind for augmented assign", node)
+
+def _while(node):
+    expr = node.leaves[0]
+    cond = _expr(expr)
+    body = _block(node.leaves[1])
+    def run(ctx):
+        if node.hoisted != None:
+            _clear_hoisted(ctx, node)
+        loop = True
+        while loop:
+            obj = cond(ctx)
+            if obj == None:
+                return ctx.err
+
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("expression is not a boolean", expr)
+
+            if obj.value:
+                out = body(ctx)
+                if out != None:
+                    return out
+            else:
+                loop = False
+        return None
+    return run
+
+def _do(node):
+    expr = node.leaves[0]
+    cond = _expr(expr)
+    body = _block(node.leaves[1])
+    def run(ctx):
+        if node.hoisted != None:
+            _clear_hoisted(ctx, node)
+        loop = True
+        while loop:
+            out = body(ctx)
+            if out != None:
+                return out
+
+            obj = cond(ctx)
+            if obj == None:
+                return ctx.err
+
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("expression is not a boolean", expr)
+            loop = obj.value
+        return None
+    return run
+
+# cada elif vira um par (condicao, bloco) nas listas
+# conds e blocks, o else (se houver) eh o ultimo bloco
+def _if(node):
+    exprs = [node.leaves[0]]
+    blocks = [_block(node.leaves[1])]
+    elifs = node.leaves[2]
+    if elifs != None:
+        i = 0
+        while i < len(elifs.leaves):
+            _elif = elifs.leaves[i]
+            exprs += [_elif.leaves[0]]
+            blocks += [_block(_elif.leaves[1])]
+            i += 1
+    conds = []
+    i = 0
+    while i < len(exprs):
+        conds += [_expr(exprs[i])]
+        i += 1
+    size = len(conds)
+    if node.leaves[3] != None:
+        blocks += [_block(node.leaves[3].leaves[0])]
+
+    def run(ctx):
+        i = 0
+        while i < size:
+            obj = conds[i](ctx)
+            if obj == None:
+                return ctx.err
+
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("condition expected to be boolean", exprs[i])
+            if obj.value:
+                return blocks[i](ctx)
+            i += 1
+        if size < len(blocks):
+            return blocks[size](ctx)
+        return None
+    return run
+
+def _lhs(lhs):
+    if lhs.kind == nodekind.TERMINAL and lhs.value.kind == lexkind.ID:
+        def run(ctx):
+            return _lhs_name(ctx, lhs)
+        return run
+    elif lhs.kind == nodekind.INDEX:
+        return _lhs_index(lhs)
+    elif lhs.kind == nodekind.FIELD_ACCESS:
+        return _lhs_field(lhs)
+    return _error("expression is not assignable", lhs)
+
+def _lhs_index(lhs):
+    list = lhs.leaves[1]
+    operand = _expr(list)
+    index = _expr(lhs.leaves[0])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+
+        if not obj.mutable:
+            return ctx.fail("object is not mutable", list)
+
+        index_obj = index(ctx)
+        if index_obj == None:
+            return None
+        return _lhs_index_obj(ctx, lhs, obj, index_obj)
+    return run
+
+def _lhs_field(lhs):
+    field = lhs.leaves[0]
+    if field.kind != nodekind.TERMINAL or field.value.kind != lexkind.ID:
+        return _error("field must be an identifier", field)
+    operand = _expr(lhs.leaves[1])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+        return _lhs_field_obj(ctx, lhs, obj)
+    return run
+
+def _error(msg, node):
+    def run(ctx):
+        return ctx.fail(msg, node)
+    return run
+
+def _expr(node):
+    if node.kind == nodekind.CONSTANT:
+        return _constant(node.constant)
+    elif node.kind == nodekind.TERMINAL:
+        return _terminal(node)
+    elif node.kind == nodekind.BIN_OPERATOR:
+        return _bin_operator(node)
+    elif node.kind == nodekind.CALL:
+        return _call(node)
+    elif node.kind == nodekind.FIELD_ACCESS:
+        return _field_access(node)
+    elif node.kind == nodekind.INDEX:
+        return _index(node)
+    elif node.kind == nodekind.UNA_OPERATOR:
+        return _una_operator(node)
+    elif node.kind == nodekind.LIST:
+        return _list(node)
+    elif node.kind == nodekind.DICT:
+        return _dict(node)
+    elif node.kind == nodekind.SLICE:
+        return _slice(node)
+    elif node.kind == nodekind.IN_CONSTANTS:
+        return _in_constants(node)
+    elif node.kind == nodekind.HOISTED:
+        return _hoisted(node)
+    return _error("invalid expression", node)
+
+def _terminal(node):
+    if node.has_lexkind(lexkind.TRUE):
+        return _constant(_true)
+    elif node.has_lexkind(lexkind.FALSE):
+        return _constant(_false)
+    elif node.has_lexkind(lexkind.NONE):
+        return _constant(_none)
+    elif node.has_lexkind(lexkind.ID) or node.has_lexkind(lexkind.SELF):
+        return _name(node)
+    elif node.has_lexkind(lexkind.STR):
+        return _constant(_shared_obj(objkind.STR, node.value.text))
+    elif node.has_lexkind(lexkind.NUM):
+        return _constant(_shared_obj(objkind.NUM, int(node.value.text)))
+    return _error("invalid lexkind for terminal", node)
+
+# o objeto eh compartilhado (ver optimizer.py e
+# evaluator._shared_obj), entao pode ser devolvido diretamente
+def _constant(obj):
+    def run(ctx):
+        return obj
+    return run
+
+def _in_constants(node):
+    operand = _expr(node.leaves[0])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+        return _in_constants_obj(node, obj)
+    return run
+
+# no HOISTED, ver evaluator._eval_hoisted
+def _hoisted(node):
+    expr = _expr(node.leaves[0])
+    slot = node.address.slot
+    def run(ctx):
+        slots = ctx.curr_scope().slots
+        obj = slots[slot]
+        if obj != None:
+            return obj
+        obj = expr(ctx)
+        if obj == None:
+            return None
+        slots[slot] = _hoisted_value(node, obj)
+        return obj
+    return run
+
+def _name(node):
+    def run(ctx):
+        obj = _load_name(ctx, node)
+        if obj == None:
+            return ctx.fail("name not found", node)
+        return obj
+    return run
+
+def _una_operator(node):
+    operand_node = node.leaves[0]
+    operand = _expr(operand_node)
+    if node.has_lexkind(lexkind.NOT):
+        def run_not(ctx):
+            obj = operand(ctx)
+            if obj == None:
+                return None
+            if obj.is_kind(objkind.BOOL):
+                return _bool_obj(not obj.value)
+            return ctx.fail("object is not a boolean", operand_node)
+        return run_not
+    elif node.has_lexkind(lexkind.MINUS):
+        def run_neg(ctx):
+            obj = operand(ctx)
+            if obj == None:
+                return None
+            if obj.is_kind(objkind.NUM):
+                return _num_obj(-obj.value)
+            return ctx.fail("object is not a number", operand_node)
+        return run_neg
+    def run(ctx):
+        if operand(ctx) == None:
+            return None
+        return ctx.fail("invalid lexkind for unary operator", node)
+    return run
+
+def _bin_operator(node):
+    left = _expr(node.leaves[0])
+    right = _expr(node.leaves[1])
+    if node.has_lexkind(lexkind.AND):
+        return _and(left, right)
+    elif node.has_lexkind(lexkind.OR):
+        return _or(left, right)
+    apply = _bin_apply(node)
+    def run(ctx):
+        left_obj = left(ctx)
+        if left_obj == None:
+            return None
+
+        right_obj = right(ctx)
+        if right_obj == None:
+            return None
+        return apply(ctx, node, left_obj, right_obj)
+    return run
+
+def _and(left, right):
+    def run(ctx):
+        left_obj = left(ctx)
+        if left_obj == None:
+            return None
+
+        if not left_obj.value:
+            return _false
+
+        right_obj = right(ctx)
+        if right_obj == None:
+            return None
+
+        out = left_obj.value and right_obj.value
+        return _bool_obj(out)
+    return run
+
+def _or(left, right):
+    def run(ctx):
+        left_obj = left(ctx)
+        if left_obj == None:
+            return None
+
+        if left_obj.value:
+            return _true
+
+        right_obj = right(ctx)
+        if right_obj == None:
+            return None
+
+        out = left_obj.value or right_obj.value
+        return _bool_obj(out)
+    return run
+
+# escolhe, em tempo de traducao, a funcao que aplica o operador
+def _bin_apply(node):
+    if node.has_lexkind(lexkind.PLUS):
+        return _eval_plus_objs
+    elif node.has_lexkind(lexkind.MINUS):
+        return _apply_minus
+    elif node.has_lexkind(lexkind.LESS):
+        return _apply_less
+    elif node.has_lexkind(lexkind.EQUALS):
+        return _apply_equals
+    elif node.has_lexkind(lexkind.DIFF):
+        return _apply_diff
+    elif node.has_lexkind(lexkind.IN):
+        return _eval_in_objs
+    elif node.has_lexkind(lexkind.MULT):
+        return _apply_mult
+    elif node.has_lexkind(lexkind.GREATER_OR_EQUALS):
+        return _apply_greater_or_equals
+    elif node.has_lexkind(lexkind.GREATER):
+        return _apply_greater
+    elif node.has_lexkind(lexkind.LESS_OR_EQUALS):
+        return _apply_less_or_equals
+    elif node.has_lexkind(lexkind.DIV):
+        return _apply_div
+    elif node.has_lexkind(lexkind.REM):
+        return _apply_rem
+    return _apply_invalid
+
+def _eval_plus_objs(ctx, node, left_obj, right_obj):
+    return _eval_plus(ctx, left_obj, right_obj, node)
+
+def _eval_in_objs(ctx, node, left_obj, right_obj):
+    return _eval_in(ctx, left_obj, right_obj, node)
+
+def _apply_invalid(ctx, node, left_obj, right_obj):
+    return ctx.fail("invalid lexkind for binary operator", node)
+
+def _apply_minus(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _num_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _num_obj(left_obj.value - right_obj.value)
+
+def _apply_mult(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _num_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _num_obj(left_obj.value * right_obj.value)
+
+def _apply_div(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _num_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    if right_obj.value == 0:
+        return ctx.fail("division by zero", node)
+    return _num_obj(left_obj.value / right_obj.value)
+
+def _apply_rem(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _num_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    if right_obj.value == 0:
+        return ctx.fail("division by zero", node)
+    return _num_obj(left_obj.value % right_obj.value)
+
+def _apply_equals(ctx, node, left_obj, right_obj):
+    if left_obj.kind == objkind.DICT:
+        return ctx.fail("map has no identity", node)
+    if left_obj.kind != right_obj.kind:
+        return _bool_obj(False)
+    return _bool_obj(_identity(left_obj, right_obj))
+
+def _apply_diff(ctx, node, left_obj, right_obj):
+    if left_obj.kind == objkind.DICT:
+        return ctx.fail("map has no identity", node)
+    if left_obj.kind != right_obj.kind:
+        return _bool_obj(True)
+    return _bool_obj(not _identity(left_obj, right_obj))
+
+_order_kinds = [objkind.NUM, objkind.STR]
+
+def _apply_greater(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _order_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _bool_obj(left_obj.value > right_obj.value)
+
+def _apply_greater_or_equals(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _order_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _bool_obj(left_obj.value >= right_obj.value)
+
+def _apply_less(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _order_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _bool_obj(left_obj.value < right_obj.value)
+
+def _apply_less_or_equals(ctx, node, left_obj, right_obj):
+    err = _check_unif_bin_types(ctx, node, left_obj, right_obj, _order_kinds)
+    if err != None:
+        return ctx.fail_with(err)
+    return _bool_obj(left_obj.value <= right_obj.value)
+
+def _call(node):
+    return _call_with(node, _call_obj, _call_method)
+
+# 'return f(...)' dentro de uma funcao, ver evaluator._tail_call_obj
+def _tail_call_sttm(node):
+    call = _call_with(node.leaves[0], _tail_call_obj, _tail_call)
+    def run(ctx):
+        out = call(ctx)
+        if out == None:
+            return ctx.err
+        return out
+    return run
+
+# 'call_obj' e 'call_method' recebem a funcao ja avaliada, como
+# evaluator._call_obj e evaluator._call_method
+def _call_with(node, call_obj, call_method):
+    if node.leaves[1].kind == nodekind.FIELD_ACCESS:
+        return _method_call(node, call_obj, call_method)
+    callee = _expr(node.leaves[1])
+    args = _args(node)
+    def run(ctx):
+        thing = callee(ctx)
+        if thing == None:
+            return None
+
+        objs = _run_args(ctx, args)
+        if objs == None:
+            return None
+        return call_obj(ctx, node, thing, objs)
+    return run
+
+# 'obj.metodo(...)' chama o metodo diretamente, sem criar
+# o metodo ligado de _field_access
+def _method_call(node, call_obj, call_method):
+    field_access = node.leaves[1]
+    operand = _expr(field_access.leaves[1])
+    args = _args(node)
+    def run(ctx):
+        receiver = operand(ctx)
+        if receiver == None:
+            return None
+
+        method = _method_of(receiver, field_access)
+        if method != None:
+            objs = _run_args(ctx, args)
+            if objs == None:
+                return None
+            return call_method(ctx, node, method, receiver, objs)
+
+        thing = _field_obj(ctx, field_access, receiver)
+        if thing == None:
+            return None
+        objs = _run_args(ctx, args)
+        if objs == None:
+            return None
+        return call_obj(ctx, node, thing, objs)
+    return run
+
+def _args(node):
+    out = []
+    exprlist = node.leaves[0]
+    if exprlist != None:
+        i = 0
+        while i < len(exprlist.leaves):
+            out += [_expr(exprlist.leaves[i])]
+            i += 1
+    return out
+
+# retorna None se algum argumento falhar
+def _run_args(ctx, args):
+    objs = []
+    i = 0
+    while i < len(args):
+        arg = args[i](ctx)
+        if arg == None:
+            return None
+        objs += [arg]
+        i += 1
+    return objs
+
+def _field_access(node):
+    operand = _expr(node.leaves[1])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+        return _field_obj(ctx, node, obj)
+    return run
+
+def _index(node):
+    operand = _expr(node.leaves[1])
+    index = _expr(node.leaves[0])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+
+        index_obj = index(ctx)
+        if index_obj == None:
+            return None
+        return _index_obj(ctx, node, obj, index_obj)
+    return run
+
+def _slice(node):
+    operand = _expr(node.leaves[2])
+    begin = _expr(node.leaves[0])
+    end = _expr(node.leaves[1])
+    def run(ctx):
+        obj = operand(ctx)
+        if obj == None:
+            return None
+
+        begin_obj = begin(ctx)
+        if begin_obj == None:
+            return None
+
+        end_obj = end(ctx)
+        if end_obj == None:
+            return None
+        return _slice_obj(ctx, node, obj, begin_obj, end_obj)
+    return run
+
+def _list(node):
+    items = []
+    fresh = []
+    exprlist = node.leaves[0]
+    if exprlist != None:
+        i = 0
+        while i < len(exprlist.leaves):
+            items += [_expr(exprlist.leaves[i])]
+            fresh += [exprlist.leaves[i].kind in _fresh_kinds]
+            i += 1
+    size = len(items)
+    def run(ctx):
+        out = _new_list()
+        i = 0
+        while i < size:
+            item = items[i](ctx)
+            if item == None:
+                return None
+            out.value.append(item, fresh[i])
+            i += 1
+        return out
+    return run
+
+def _dict(node):
+    key_exprs = []
+    keys = []
+    values = []
+    kvlist = node.leaves[0]
+    if kvlist != None:
+        i = 0
+        while i < len(kvlist.leaves):
+            kvpair = kvlist.leaves[i]
+            key_exprs += [kvpair.leaves[0]]
+            keys += [_expr(kvpair.leaves[0])]
+            values += [_expr(kvpair.leaves[1])]
+            i += 1
+    size = len(keys)
+    def run(ctx):
+        out = {}
+        i = 0
+        while i < size:
+            key = keys[i](ctx)
+            if key == None:
+                return None
+
+            value = values[i](ctx)
+            if value == None:
+                return None
+            value = value.copy()
+
+            if not key.is_hashable():
+                return ctx.fail("object is not hashable", key_exprs[i])
+
+            out[key.value] = value
+            i += 1
+        return _Py_Object(objkind.DICT, out, True)
+    return run
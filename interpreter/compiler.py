@@ -0,0 +1,324 @@
+import lexkind
+import nodekind
+import opkind
+from evaluator import _fresh_kinds, _counted_loop_of, _not_counted
+
+# esse arquivo traduz um BLOCK da arvore sintatica
+# para um codigo linear executado por vm.py
+
+# Code guarda as instrucoes em tres listas paralelas,
+# ops[i] eh o opcode, args[i] o argumento imediato
+# e nodes[i] o no usado para reportar erros
+class Code:
+    def __init__(self):
+        self.ops = []
+        self.args = []
+        self.nodes = []
+        # profundidade maxima da pilha de operandos
+        self.max_stack = 0
+
+    def __str__(self):
+        out = ""
+        i = 0
+        while i < len(self.ops):
+            out += str(i) + " " + opkind.to_str(self.ops[i])
+            if self.args[i] != None:
+                out += " " + str(self.args[i])
+            out += "\n"
+            i += 1
+        return out
+
+def compile_block(block):
+    c = _Compiler()
+    _block(c, block)
+    c.emit(opkind.END, None, block, 0)
+    return c.code
+
+# corpo 'return expr' de uma funcao pequena (ver resolver._inline_expr),
+# executado no quadro reusado da funcao
+def compile_inline(expr):
+    c = _Compiler()
+    _expr(c, expr)
+    c.emit(opkind.INLINE_RETURN, None, expr, 0)
+    return c.code
+
+class _Compiler:
+    def __init__(self):
+        self.code = Code()
+        self.depth = 0
+
+    # 'delta' eh o efeito da instrucao na pilha de operandos
+    def emit(self, op, arg, node, delta):
+        self.code.ops += [op]
+        self.code.args += [arg]
+        self.code.nodes += [node]
+        self.depth += delta
+        if self.depth > self.code.max_stack:
+            self.code.max_stack = self.depth
+        return len(self.code.ops) - 1
+
+    def here(self):
+        return len(self.code.ops)
+
+    def patch(self, pos, target):
+        self.code.args[pos] = target
+
+def _block(c, node):
+    i = 0
+    while i < len(node.leaves):
+        _sttm(c, node.leaves[i])
+        i += 1
+
+def _sttm(c, node):
+    if node.kind == nodekind.ASSIGN:
+        _lhs(c, node.leaves[0])
+        _expr(c, node.leaves[1])
+        c.emit(opkind.ASSIGN, None, node, -2)
+    elif node.kind == nodekind.AUGMENTED_ASSIGN:
+        _lhs(c, node.leaves[0])
+        _expr(c, node.leaves[1])
+        c.emit(opkind.AUG_ASSIGN, None, node, -2)
+    elif node.kind == nodekind.WHILE:
+        _while(c, node)
+    elif node.kind == nodekind.IF:
+        _if(c, node)
+    elif node.kind == nodekind.RETURN:
+        _expr(c, node.leaves[0])
+        c.emit(opkind.RETURN, None, node, -1)
+    elif node.kind == nodekind.TAIL_CALL:
+        _call(c, node.leaves[0], opkind.TAIL_CALL, opkind.TAIL_CALL_METHOD)
+    elif node.kind == nodekind.DO:
+        _do(c, node)
+    elif node.kind == nodekind.IMPORT:
+        c.emit(opkind.IMPORT, None, node, 0)
+    elif node.kind == nodekind.FROM_IMPORT:
+        c.emit(opkind.FROM, None, node, 0)
+    elif node.kind == nodekind.FUNC:
+        c.emit(opkind.FUNC, None, node, 0)
+    elif node.kind == nodekind.CLASS:
+        c.emit(opkind.CLASS, None, node, 0)
+    elif node.kind == nodekind.PASS:
+        pass
+    else:
+        _expr(c, node)
+        c.emit(opkind.POP, None, node, -1)
+
+def _while(c, node):
+    _clear_hoisted(c, node)
+    if _counted_loop_of(node) != _not_counted:
+        _counted_while(c, node)
+        return None
+    cond = node.leaves[0]
+    start = c.here()
+    _expr(c, cond)
+    test = c.emit(opkind.WHILE_TEST, None, cond, -1)
+    _block(c, node.leaves[1])
+    c.emit(opkind.JUMP, start, node, 0)
+    c.patch(test, c.here())
+
+# laco 'while i < len(xs): ...; i += k' (ver evaluator._counted_loop).
+# O COUNTED_TEST avalia a condicao direto nas celulas e salta para o
+# WHILE_TEST, e o COUNTED_STEP incrementa o contador e salta para o
+# JUMP. Quando uma das verificacoes falha, a instrucao nao faz nada e
+# o codigo comum da condicao ou do incremento eh executado
+def _counted_while(c, node):
+    cond = node.leaves[0]
+    block = node.leaves[1]
+    last = len(block.leaves) - 1
+    start = c.here()
+    fast_test = c.emit(opkind.COUNTED_TEST, None, node, 0)
+    _expr(c, cond)
+    c.patch(fast_test, c.here())
+    test = c.emit(opkind.WHILE_TEST, None, cond, -1)
+    i = 0
+    while i < last:
+        _sttm(c, block.leaves[i])
+        i += 1
+    fast_step = c.emit(opkind.COUNTED_STEP, None, node, 0)
+    _sttm(c, block.leaves[last])
+    c.patch(fast_step, c.here())
+    c.emit(opkind.JUMP, start, node, 0)
+    c.patch(test, c.here())
+
+def _do(c, node):
+    _clear_hoisted(c, node)
+    cond = node.leaves[0]
+    start = c.here()
+    _block(c, node.leaves[1])
+    _expr(c, cond)
+    c.emit(opkind.DO_TEST, start, cond, -1)
+
+def _clear_hoisted(c, node):
+    if node.hoisted != None:
+        c.emit(opkind.CLEAR_HOISTED, None, node, 0)
+
+def _if(c, node):
+    exits = []
+    _cond_block(c, node.leaves[0], node.leaves[1], exits)
+
+    elifs = node.leaves[2]
+    if elifs != None:
+        i = 0
+        while i < len(elifs.leaves):
+            _elif = elifs.leaves[i]
+            _cond_block(c, _elif.leaves[0], _elif.leaves[1], exits)
+            i += 1
+
+    _else = node.leaves[3]
+    if _else != None:
+        _block(c, _else.leaves[0])
+
+    end = c.here()
+    i = 0
+    while i < len(exits):
+        c.patch(exits[i], end)
+        i += 1
+
+# condicao e bloco de um if ou elif, o salto para o
+# fim do if eh adicionado em 'exits'
+def _cond_block(c, cond, block, exits):
+    _expr(c, cond)
+    test = c.emit(opkind.IF_TEST, None, cond, -1)
+    _block(c, block)
+    exits += [c.emit(opkind.JUMP, None, cond, 0)]
+    c.patch(test, c.here())
+
+def _lhs(c, lhs):
+    if lhs.kind == nodekind.TERMINAL and lhs.value.kind == lexkind.ID:
+        c.emit(opkind.LHS_NAME, None, lhs, 1)
+    elif lhs.kind == nodekind.INDEX:
+        operand = lhs.leaves[1]
+        _expr(c, operand)
+        c.emit(opkind.CHECK_MUTABLE, None, operand, 0)
+        _expr(c, lhs.leaves[0])
+        c.emit(opkind.LHS_INDEX, None, lhs, -1)
+    elif lhs.kind == nodekind.FIELD_ACCESS:
+        _expr(c, lhs.leaves[1])
+        c.emit(opkind.LHS_FIELD, None, lhs, 0)
+    else:
+        c.emit(opkind.ERROR, "expression is not assignable", lhs, 1)
+
+def _expr(c, node):
+    if node.kind == nodekind.CONSTANT:
+        c.emit(opkind.LOAD_CONST, node.constant, node, 1)
+    elif node.kind == nodekind.TERMINAL:
+        _terminal(c, node)
+    elif node.kind == nodekind.BIN_OPERATOR:
+        _bin_operator(c, node)
+    elif node.kind == nodekind.CALL:
+        _call(c, node, opkind.CALL, opkind.CALL_METHOD)
+    elif node.kind == nodekind.FIELD_ACCESS:
+        _expr(c, node.leaves[1])
+        c.emit(opkind.FIELD, None, node, 0)
+    elif node.kind == nodekind.INDEX:
+        _expr(c, node.leaves[1])
+        _expr(c, node.leaves[0])
+        c.emit(opkind.INDEX, None, node, -1)
+    elif node.kind == nodekind.UNA_OPERATOR:
+        _expr(c, node.leaves[0])
+        c.emit(opkind.UNARY, None, node, 0)
+    elif node.kind == nodekind.LIST:
+        _list(c, node)
+    elif node.kind == nodekind.DICT:
+        _dict(c, node)
+    elif node.kind == nodekind.SLICE:
+        _expr(c, node.leaves[2])
+        _expr(c, node.leaves[0])
+        _expr(c, node.leaves[1])
+        c.emit(opkind.SLICE, None, node, -2)
+    elif node.kind == nodekind.IN_CONSTANTS:
+        _expr(c, node.leaves[0])
+        c.emit(opkind.IN_CONST, None, node, 0)
+    elif node.kind == nodekind.HOISTED:
+        _hoisted(c, node)
+    else:
+        c.emit(opkind.ERROR, "invalid expression", node, 1)
+
+# o HOISTED_LOAD empilha o valor guardado e salta a expressao,
+# ou nao faz nada e a expressao eh avaliada e guardada
+def _hoisted(c, node):
+    load = c.emit(opkind.HOISTED_LOAD, None, node, 0)
+    _expr(c, node.leaves[0])
+    c.emit(opkind.HOISTED_STORE, None, node, 0)
+    c.patch(load, c.here())
+
+def _terminal(c, node):
+    if node.has_lexkinds([lexkind.ID, lexkind.SELF]):
+        c.emit(opkind.NAME, None, node, 1)
+    elif node.has_lexkind(lexkind.NUM):
+        c.emit(opkind.LOAD_NUM, int(node.value.text), node, 1)
+    elif node.has_lexkind(lexkind.STR):
+        c.emit(opkind.LOAD_STR, node.value.text, node, 1)
+    elif node.has_lexkind(lexkind.TRUE):
+        c.emit(opkind.LOAD_BOOL, True, node, 1)
+    elif node.has_lexkind(lexkind.FALSE):
+        c.emit(opkind.LOAD_BOOL, False, node, 1)
+    elif node.has_lexkind(lexkind.NONE):
+        c.emit(opkind.LOAD_NONE, None, node, 1)
+    else:
+        c.emit(opkind.ERROR, "invalid lexkind for terminal", node, 1)
+
+def _bin_operator(c, node):
+    if node.has_lexkind(lexkind.AND):
+        _short_circuit(c, node, opkind.AND_TEST, opkind.AND_END)
+    elif node.has_lexkind(lexkind.OR):
+        _short_circuit(c, node, opkind.OR_TEST, opkind.OR_END)
+    else:
+        _expr(c, node.leaves[0])
+        _expr(c, node.leaves[1])
+        c.emit(opkind.BINARY, None, node, -1)
+
+# o operando esquerdo fica na pilha ate o *_END,
+# exceto quando o *_TEST faz o curto-circuito
+def _short_circuit(c, node, test_op, end_op):
+    _expr(c, node.leaves[0])
+    test = c.emit(test_op, None, node, 0)
+    _expr(c, node.leaves[1])
+    c.emit(end_op, None, node, -1)
+    c.patch(test, c.here())
+
+# em 'obj.metodo(...)' o LOAD_METHOD deixa dois objetos na pilha:
+# o metodo e a instancia, ou o valor do campo e None.
+# 'call_op' e 'method_op' sao CALL e CALL_METHOD, ou as
+# versoes TAIL_* nas chamadas em cauda
+def _call(c, node, call_op, method_op):
+    exprlist = node.leaves[0]
+    callee = node.leaves[1]
+    if callee.kind == nodekind.FIELD_ACCESS:
+        _expr(c, callee.leaves[1])
+        c.emit(opkind.LOAD_METHOD, None, callee, 1)
+    else:
+        _expr(c, callee)
+    argc = 0
+    if exprlist != None:
+        while argc < len(exprlist.leaves):
+            _expr(c, exprlist.leaves[argc])
+            argc += 1
+    if callee.kind == nodekind.FIELD_ACCESS:
+        c.emit(method_op, argc, node, -argc-1)
+    else:
+        c.emit(call_op, argc, node, -argc)
+
+def _list(c, node):
+    exprlist = node.leaves[0]
+    c.emit(opkind.NEW_LIST, None, node, 1)
+    if exprlist != None:
+        i = 0
+        while i < len(exprlist.leaves):
+            item = exprlist.leaves[i]
+            _expr(c, item)
+            c.emit(opkind.LIST_ADD, item.kind in _fresh_kinds, node, -1)
+            i += 1
+
+def _dict(c, node):
+    kvlist = node.leaves[0]
+    c.emit(opkind.NEW_DICT, None, node, 1)
+    if kvlist != None:
+        i = 0
+        while i < len(kvlist.leaves):
+            kvpair = kvlist.leaves[i]
+            key_expr = kvpair.leaves[0]
+            _expr(c, key_expr)
+            _expr(c, kvpair.leaves[1])
+            c.emit(opkind.DICT_ADD, None, key_expr, -2)
+            i += 1
@@ -120,6 +120,21 @@ class Node:
         self.kind = kind
         self.leaves = []
         self.range = None
+        # preenchidos por resolver.py: endereco lexico dos nomes
+        # e layout do escopo das funcoes
+        self.address = None
+        self.layout = None
+        # preenchido por resolver.py nas funcoes e metodos cujo corpo eh
+        # so 'return expr': a expressao, avaliada no lugar da chamada
+        self.inline = None
+        # preenchido por optimizer.py nos nos CONSTANT e IN_CONSTANTS
+        self.constant = None
+        # cache preenchido durante a execucao, ie, o
+        # evaluator._Inline_Cache dos nos FIELD_ACCESS
+        self.cache = None
+        # preenchido por licm.py nos nos WHILE e DO: slots
+        # dos nos HOISTED que saem do laco
+        self.hoisted = None
 
     def add_leaf(self, leaf):
         self.leaves += [leaf]
@@ -1,34 +1,46 @@
-from core import Result, Error, Node
+from core import Error, Node
 from parser import parse
+from resolver import resolve, empty_layout
+from optimizer import optimize
+from licm import hoist
 import lexkind
 import nodekind
 import objkind
 import scopekind
 
+# max_args de um builtin sem limite de argumentos
+_variadic = -1
+
+# o wrapper recebe a lista de argumentos, que tem entre 'min_args' e
+# 'max_args' elementos. Se 'can_fail', ele retorna um Result com o
+# objeto produzido ou com a mensagem de erro, que ganha o range da
+# chamada (ver _call_obj), senao retorna o proprio objeto
 class _Builtin_Func:
-    def __init__(self, num_args, wrapper):
-        self.num_args = num_args
+    def __init__(self, wrapper, min_args, max_args, can_fail):
         self.wrapper = wrapper
+        self.min_args = min_args
+        self.max_args = max_args
+        self.can_fail = can_fail
 
     def call(self, ctx, args):
-        if len(args) != self.num_args:
-            err = ctx.blank_error("invalid number of arguments")
-            return Result(None, err)
-
-        obj = None
-        if self.num_args == 1:
-            obj = self.wrapper(args[0])
-        elif self.num_args == 2:
-            obj = self.wrapper(args[0], args[1])
-        elif self.num_args == 3:
-            obj = self.wrapper(args[0], args[1], args[2])
-        else:
-            err = ctx.blank_error("too many arguments")
-            return Result(None, err)
-        return Result(obj, None)
+        size = len(args)
+        if size < self.min_args or (size > self.max_args and self.max_args != _variadic):
+            return ctx.fail_with(ctx.blank_error("invalid number of arguments"))
+        if not self.can_fail:
+            return self.wrapper(args)
+        res = self.wrapper(args)
+        if res.failed():
+            return ctx.fail_with(ctx.blank_error(res.error))
+        return res.value
 
-# implementamos metodos passando um escopo onde o "self"
-# eh uma variavel respresentando a instancia do objeto
+# registra o builtin 'name' no escopo de builtins 'scope'
+def _add_builtin(scope, name, wrapper, min_args, max_args, can_fail):
+    func = _Builtin_Func(wrapper, min_args, max_args, can_fail)
+    scope.add_symbol(name, _Py_Object(objkind.BUILTIN_FUNC, func, False))
+
+# metodos sao funcoes compartilhadas por todas as instancias,
+# o "self" eh passado em call_with e ocupa o primeiro slot do
+# escopo da chamada (ver resolver._class)
 class _User_Function:
     def __init__(self, name, formal_args, block, parent_scope):
         self.name = name
@@ -38,60 +50,237 @@ class _User_Function:
         # toda funcao captura o ambiente que ela ta inserida,
         # ie, eh uma closure
         self.parent_scope = parent_scope
-
+        # corpo compilado pelo motor (vm.VM, closures.Closure_Compiler),
+        # preenchido na primeira chamada
+        self.code = None
+        # nomes locais com endereco fixo (ver resolver.py)
+        self.layout = empty_layout
+        # expressao do corpo 'return expr' (ver resolver._inline_expr),
+        # com o codigo compilado pelo motor e o _Inline_Frame reusado
+        self.inline = None
+        self.inline_code = None
+        self.frame = None
+
+    # retorna o objeto retornado pela funcao, ou None em caso de erro
     def call(self, ctx, args):
+        return self.call_with(ctx, None, args)
+
+    # 'receiver' eh a instancia quando a funcao eh um metodo.
+    # Uma chamada em cauda (ver _tail_call) termina a funcao atual
+    # e eh executada aqui mesmo, no lugar dela
+    def call_with(self, ctx, receiver, args):
+        if self.enter_inline_with(ctx, receiver, args):
+            return _run_inline(ctx, self)
+        err = self.enter_with(ctx, receiver, args)
+        if err != None:
+            return ctx.fail_with(err)
+
+        out = ctx.engine.run_function(ctx, self)
+        while out == _tail_called:
+            ctx.pop_env()
+            func = ctx.tail_func
+            if func.enter_inline_with(ctx, ctx.tail_receiver, ctx.tail_args):
+                return _run_inline(ctx, func)
+            err = func.enter_with(ctx, ctx.tail_receiver, ctx.tail_args)
+            if err != None:
+                return ctx.fail_with(err)
+            out = ctx.engine.run_function(ctx, func)
+
+        if out != _returned and out != None:
+            return ctx.fail_with(out)
+
+        ctx.pop_env()
+        return ctx.get_return()
+
+    def enter(self, ctx, args):
+        return self.enter_with(ctx, None, args)
+
+    # empilha o escopo da chamada sem executar o corpo, que fica a
+    # cargo de quem chamou (call_with ou a VM). Retorna None ou o erro
+    def enter_with(self, ctx, receiver, args):
         if len(args) != len(self.formal_args):
             return ctx.blank_error("invalid number of arguments")
+        if ctx.curr_call_node.depth >= ctx.stack_limit:
+            return ctx.blank_error("stack overflow\n" + ctx.traceback())
 
         s = _Scope(self.parent_scope, scopekind.FUNCTION)
+        s.set_layout(self.layout)
+        if receiver != None:
+            s.slots[0] = receiver
         ctx.push_env(s)
+        ctx.curr_call_node.func = self
         ctx.reset_return()
 
         i = 0
         while i < len(args):
             name = self.formal_args[i]
             obj = args[i]
+            # argumentos sao passados por referencia, mas um objeto
+            # compartilhado nao pode virar variavel
+            if obj.shared:
+                obj = obj.copy()
+            elif obj.store != None:
+                obj = obj.store.keep(obj)
             ctx.add_symbol(name, obj)
             i += 1
+        return None
 
-        err = _eval_block(ctx, self.block)
-        if err != None:
-            return err
+    def tail_call(self, ctx, node, args):
+        return _tail_call(ctx, node, self, None, args)
+
+    def enter_inline(self, ctx, args):
+        return self.enter_inline_with(ctx, None, args)
+
+    # chamada expandida: em vez de um _Scope e um _Call_Node novos, e
+    # de executar o bloco ate o 'return', a expressao do corpo eh
+    # avaliada direto num quadro reusado, ligado ao chamador atual.
+    # A funcao eh avaliada de novo em toda chamada, entao se o nome
+    # for ligado a outra funcao a expansao segue a nova. Retorna False,
+    # sem empilhar nada, quando a chamada segue pelo caminho normal:
+    # a funcao nao eh pequena, o numero de argumentos esta errado, a
+    # pilha estourou ou o quadro ja esta em uso numa chamada recursiva
+    def enter_inline_with(self, ctx, receiver, args):
+        if self.inline == None or len(args) != len(self.formal_args):
+            return False
+        parent = ctx.curr_call_node
+        if parent.depth >= ctx.stack_limit:
+            return False
+        frame = self.frame
+        if frame == None:
+            frame = _Inline_Frame(self)
+            self.frame = frame
+        elif frame.busy:
+            return False
+        frame.busy = True
 
-        ctx.pop_env()
-        return None
+        slots = frame.scope.slots
+        if receiver != None:
+            slots[0] = receiver
+        i = 0
+        while i < len(args):
+            obj = args[i]
+            if obj.shared:
+                obj = obj.copy()
+            elif obj.store != None:
+                obj = obj.store.keep(obj)
+            slots[frame.arg_slots[i]] = obj
+            i += 1
+
+        node = frame.call_node
+        node.parent = parent
+        node.depth = parent.depth + 1
+        ctx.curr_call_node = node
+        return True
+
+# quadro de uma funcao pequena, reusado por todas as chamadas
+# expandidas (ver _User_Function.enter_inline_with). O corpo eh uma
+# expressao, que nao pode criar funcoes, entao nada guarda o escopo
+# depois da chamada
+class _Inline_Frame:
+    def __init__(self, func):
+        self.scope = _Scope(func.parent_scope, scopekind.FUNCTION)
+        self.scope.set_layout(func.layout)
+        self.call_node = _Call_Node(None, self.scope)
+        self.call_node.func = func
+        # slot de cada argumento, na ordem de formal_args
+        self.arg_slots = []
+        i = 0
+        while i < len(func.formal_args):
+            self.arg_slots += [func.layout.names[func.formal_args[i]]]
+            i += 1
+        # em uso por uma chamada que ainda nao terminou
+        self.busy = False
+
+# avalia o corpo de 'func', que ja entrou no quadro reusado
+def _run_inline(ctx, func):
+    obj = ctx.engine.run_inline(ctx, func)
+    _leave_inline(ctx)
+    return obj
+
+def _leave_inline(ctx):
+    node = ctx.curr_call_node
+    node.func.frame.busy = False
+    ctx.curr_call_node = node.parent
+
+# metodo ligado a uma instancia, criado quando 'obj.metodo' eh usado
+# como valor. Chamadas 'obj.metodo(...)' nao criam um _Bound_Method,
+# o metodo eh chamado diretamente (ver _eval_call)
+class _Bound_Method:
+    def __init__(self, func, receiver):
+        self.name = func.name
+        self.func = func
+        self.receiver = receiver
+
+    def call(self, ctx, args):
+        return self.func.call_with(ctx, self.receiver, args)
+
+    def enter(self, ctx, args):
+        return self.func.enter_with(ctx, self.receiver, args)
+
+    def enter_inline(self, ctx, args):
+        return self.func.enter_inline_with(ctx, self.receiver, args)
+
+    def tail_call(self, ctx, node, args):
+        return _tail_call(ctx, node, self.func, self.receiver, args)
     
 class _User_Object_Template:
     def __init__(self, name, node, methods):
         self.name = name
         self.node = node
         self.methods = methods
+        # forma das instancias recem criadas
+        self.shape = _Shape([])
     # preenche self.value usando a logica do __init__ criado pelo usuario
     # emite um erro se nao existir __init__
     def eval_init(self, ctx, args):
-        instance = _User_Object_Instance(self)
-        obj = _Py_Object(objkind.USER_OBJECT, instance, True)
+        obj = self.new_instance()
         if "__init__" in self.methods:
-            res = instance.get_method("__init__")
-            if res.failed():
-                return res
-            func = res.value
-            news = _Scope(func.parent_scope, scopekind.FUNCTION)
-            news.add_symbol("self", obj)
-            func.parent_scope = news
-            err = func.call(ctx, args)
-            if err != None:
-                return Result(None, err)
-            return Result(obj, None)
+            func = self.methods["__init__"]
+            if func.call_with(ctx, obj, args) == None:
+                return None
+            return obj
         else:
-            err = ctx.blank_error("object has no __init__ procedure")
-            return Result(None, err)
+            return ctx.fail_with(ctx.blank_error("object has no __init__ procedure"))
+
+    def new_instance(self):
+        instance = _User_Object_Instance(self)
+        return _Py_Object(objkind.USER_OBJECT, instance, True)
+
+# forma (hidden class) de uma instancia: os nomes das propriedades
+# na ordem em que foram criadas. Instancias da mesma classe que criam
+# as propriedades na mesma ordem compartilham a mesma forma
+class _Shape:
+    def __init__(self, order):
+        # lista dos nomes, o slot de um nome eh a sua posicao
+        self.order = order
+        # dicionario nome -> slot
+        self.names = {}
+        i = 0
+        while i < len(order):
+            self.names[order[i]] = i
+            i += 1
+        # dicionario nome -> _Shape, ie, a forma obtida ao criar o nome
+        self.transitions = {}
+
+    def with_attr(self, name):
+        if not (name in self.transitions):
+            self.transitions[name] = _Shape(self.order + [name])
+        return self.transitions[name]
+
+# cache de um no FIELD_ACCESS: instancias com a forma 'shape' guardam
+# o campo no slot 'slot'. Quando a atribuicao cria o campo, 'next' eh
+# a forma da instancia depois da criacao, senao eh None
+class _Inline_Cache:
+    def __init__(self, shape, slot, next):
+        self.shape = shape
+        self.slot = slot
+        self.next = next
 
 class _User_Object_Instance:
     def __init__(self, template):
-        # dicionario de tipo str->_Py_Object que contem as propriedades
-        # do objeto
-        self.properties = {}
+        # as propriedades ficam em 'slots', na ordem de 'shape.order'
+        self.shape = template.shape
+        self.slots = []
         # dicionario de tipo str->_User_Function que contem os metodos
         # do objeto
         self.methods = template.methods
@@ -99,27 +288,21 @@ class _User_Object_Instance:
 
     def get_method(self, name):
         if name in self.methods:
-            method = self.methods[name]
-            copy = _User_Function(
-                method.name,
-                method.formal_args,
-                method.block,
-                method.parent_scope,
-            )
-            return Result(copy, None)
+            return self.methods[name]
         else:
-            return Result(None, True)
+            return None
     
     # retorna um atributo do objeto
     def get_attr(self, attr_name):
-        if attr_name in self.properties:
-            return Result(self.properties[attr_name], None)
+        if attr_name in self.shape.names:
+            return self.slots[self.shape.names[attr_name]]
         else:
-            return Result(None, True)
+            return None
 
     def create_attr(self, attr_name):
-        self.properties[attr_name] = _Py_Object(objkind.NONE, None, True)
-        return self.properties[attr_name]
+        self.shape = self.shape.with_attr(attr_name)
+        self.slots += [_Py_Object(objkind.NONE, None, True)]
+        return self.slots[len(self.slots)-1]
 
 class _Module:
     def __init__(self, name, mod_scope):
@@ -129,31 +312,441 @@ class _Module:
     def get_global(self, name):
         if self.scope.contains(name):
             return self.scope.retrieve(name)
-        return Result(None, True)
+        return None
 
+# um _Py_Object pode ser uma celula (variavel, elemento de lista
+# ou dicionario, propriedade), alterada no lugar por set(), ou apenas
+# um valor produzido por uma expressao
 class _Py_Object:
     def __init__(self, kind, value, mutable):
         self.kind = kind
         self.value = value
         self.mutable = mutable
+        # objetos compartilhados (ver _Constant_Pool e _bool_obj) aparecem
+        # em varios lugares ao mesmo tempo e nunca viram celulas: sao
+        # copiados ao serem passados como argumento ou guardados em
+        # listas e dicionarios, entao nunca sao alterados
+        self.shared = False
+        # pedacos de uma string ainda nao concatenados, ver append_str
+        self.parts = None
+        # a celula eh elemento de uma lista, ver copy_element
+        self.element = False
+        # fatia de lista ainda nao copiada, ver _List_View
+        self.view = None
+        # elemento de uma lista compacta, que devolve as alteracoes
+        # para a posicao 'slot' de 'store' (ver _List_Store.cell)
+        self.store = None
+        self.slot = 0
     def copy(self):
-        value = self.value
-        return _Py_Object(self.kind, value, self.mutable)
+        if self.parts != None:
+            self.flush()
+        view = self.live_view()
+        out = _Py_Object(self.kind, self.value, self.mutable)
+        out.view = view
+        return out
+    # copia guardada numa lista, alterar a celula
+    # invalida os indices de busca (ver _List_Index)
+    def copy_element(self):
+        out = self.copy()
+        out.element = True
+        return out
     def is_kind(self, kind):
         return self.kind == kind
     def is_kinds(self, kinds):
         return self.kind in kinds
     def is_hashable(self):
-        kinds = [
-            objkind.BOOL, objkind.NUM, objkind.STR,
-            objkind.USER_OBJECT, objkind.USER_FUNCTION,
-            objkind.BUILTIN_FUNC, objkind.NONE,
-            objkind.MODULE,
-        ]
-        return self.is_kinds(kinds)
+        return self.is_kinds(_hashable_kinds)
     def set(self, kind, value):
         self.kind = kind
         self.value = value
+        self.parts = None
+        self.view = None
+        if self.element:
+            self.changed()
+    # 'obj = exp', uma fatia continua sem ser copiada
+    def assign(self, exp):
+        view = exp.live_view()
+        self.kind = exp.kind
+        self.value = exp.value
+        self.parts = None
+        self.view = view
+        if self.element:
+            self.changed()
+    # o valor de um elemento mudou, ver _List_Index e _List_Store.put
+    def changed(self):
+        _mutations.count += 1
+        if self.store != None:
+            self.store.put(self.slot, self)
+    # armazenamento de uma lista. Uma fatia eh copiada aqui, entao so
+    # o indice, o len e o fatiamento evitam a copia (ver _List_View)
+    def list_store(self):
+        view = self.live_view()
+        if view != None:
+            store = view.source.store
+            items = store.items[view.begin:view.end]
+            if store.kind == None:
+                items = _copy_elements(items)
+            view.store = _List_Store(store.kind, items)
+            self.value = view.store
+            self.view = None
+        return self.value
+    # a fatia ainda nao copiada, ou None. Se outra celula com a mesma
+    # fatia ja fez a copia (ver list_store), esta passa a usar a copia
+    def live_view(self):
+        view = self.view
+        if view != None and view.store != None:
+            self.value = view.store
+            self.view = None
+            return None
+        return view
+    # celulas dos elementos de uma lista, que deixa de ser compacta
+    def items(self):
+        store = self.list_store()
+        store.unpack()
+        return store.items
+    # 'out += s' numa string so guarda o pedaco, e a concatenacao
+    # acontece uma unica vez quando o valor eh lido (ver flush).
+    # Assim um laco que monta uma string leva tempo linear
+    def append_str(self, s):
+        if self.parts == None:
+            self.parts = [self.value]
+        self.parts += [s]
+    # concatena os pedacos dois a dois, entao cada caractere
+    # eh copiado no maximo log2(len(parts)) vezes
+    def flush(self):
+        parts = self.parts
+        self.parts = None
+        while len(parts) > 1:
+            next = []
+            i = 0
+            while i + 1 < len(parts):
+                next += [parts[i] + parts[i+1]]
+                i += 2
+            if i < len(parts):
+                next += [parts[i]]
+            parts = next
+        self.value = parts[0]
+
+# constantes de um modulo, criadas uma unica vez por optimizer.py
+# e compartilhadas por todas as avaliacoes do mesmo literal
+class _Constant_Pool:
+    def __init__(self):
+        # os numeros sao indexados pelo texto, para 1 e 1.0
+        # continuarem sendo constantes diferentes
+        self.nums = {}
+        self.strs = {}
+        self.true = _true
+        self.false = _false
+        self.none = _none
+
+    def constant(self, kind, value):
+        if kind == objkind.NUM:
+            key = str(value)
+            if key in _small_nums:
+                return _small_nums[key]
+            if not (key in self.nums):
+                self.nums[key] = _shared_obj(kind, value)
+            return self.nums[key]
+        elif kind == objkind.STR:
+            if not (value in self.strs):
+                self.strs[value] = _shared_obj(kind, value)
+            return self.strs[value]
+        elif kind == objkind.BOOL:
+            if value:
+                return self.true
+            return self.false
+        return self.none
+
+# fatia de uma lista que ainda compartilha a lista original, guardada
+# em _Py_Object.view e em _Py_Object.value. Enquanto nao eh copiada, a
+# fatia compartilha os elementos com a original, entao so falta
+# garantir que a faixa [begin, end) da lista original nao mude: listas
+# so crescem no fim (ver _plus_assign), '+=' numa fatia copia a faixa
+# antes (e os elementos, ver _copy_elements), e remover ou inserir
+# elementos desliga as fatias da lista original (ver _List_Store.detach).
+# Todas as celulas que apontam para a fatia compartilham o mesmo
+# _List_View, entao a copia feita ao alterar a fatia por uma delas
+# fica em 'store' e as outras passam a usa-la (ver live_view).
+# Fatias vazias sao listas comuns
+class _List_View:
+    def __init__(self, source, begin, end):
+        self.source = source
+        self.begin = begin
+        self.end = end
+        # a lista propria da fatia, depois de copiada
+        self.store = None
+
+# lista usada pelas fatias de um _List_Store: o proprio _List_Store
+# enquanto as posicoes dos elementos nao mudam, e depois uma lista
+# congelada com os elementos de antes (ver _List_Store.detach)
+class _Slice_Source:
+    def __init__(self, store):
+        self.store = store
+
+# elementos de uma lista, guardado em _Py_Object.value e compartilhado
+# por todas as celulas que apontam para a mesma lista.
+# Como as storage strategies do PyPy, uma lista em que todos os
+# elementos sao NUM (ou todos sao STR) guarda em 'items' so os valores,
+# sem um _Py_Object por elemento, e 'kind' eh o tipo dos elementos.
+# Guardar um elemento de outro tipo converte a lista, no lugar, para a
+# forma geral: 'kind' None e 'items' com as celulas (ver unpack).
+# Uma lista vazia tem 'kind' INVALID e assume o tipo do primeiro elemento
+class _List_Store:
+    def __init__(self, kind, items):
+        self.kind = kind
+        self.items = items
+        # _Slice_Source das fatias da lista, ver _List_View
+        self.source = None
+        # indice de busca, ver _in_list. Fica nos elementos e nao na
+        # celula, que pode passar a apontar para outra lista
+        self.index = None
+        # celulas de elementos ligadas a argumentos (ver keep), so
+        # existem numa lista compacta com 'aliased' verdadeiro
+        self.kept = None
+        self.aliased = False
+
+    # celula temporaria para o elemento 'i' de uma lista compacta.
+    # Alterar a celula altera a lista (ver _Py_Object.changed), entao
+    # 'l[i] = x' e 'l[i] += x' continuam alterando o elemento
+    def cell(self, i):
+        if self.aliased:
+            kept = self.kept_cell(i)
+            if kept != None:
+                return kept
+        out = _Py_Object(self.kind, self.items[i], True)
+        out.element = True
+        out.store = self
+        out.slot = i
+        return out
+
+    def kept_cell(self, i):
+        j = 0
+        while j < len(self.kept):
+            if self.kept[j].slot == i:
+                return self.kept[j]
+            j += 1
+        return None
+
+    # 'obj', celula devolvida por cell(), vai ser ligada a um argumento,
+    # que eh passado por referencia. Ela passa a ser a celula do
+    # elemento: as escritas feitas pela lista tambem chegam nela (ver
+    # put) e, se a lista deixar de ser compacta, ela volta para 'items'
+    # (ver unpack). Retorna a celula que deve ser ligada
+    def keep(self, obj):
+        if self.kind == None:
+            # a lista deixou de ser compacta depois que a celula foi
+            # criada, o elemento pode ate ter mudado de posicao
+            obj.store = None
+            return obj
+        if self.aliased:
+            kept = self.kept_cell(obj.slot)
+            if kept != None:
+                return kept
+        else:
+            self.kept = []
+            self.aliased = True
+        obj.kind = self.kind
+        obj.value = self.items[obj.slot]
+        self.kept += [obj]
+        return obj
+
+    # o elemento 'i' passa a ter o valor de 'obj'
+    def put(self, i, obj):
+        if i >= len(self.items):
+            # so uma celula temporaria guardada alem da expressao que a
+            # criou chegaria aqui: detach ja soltou as celulas ligadas a
+            # argumentos, entao a celula so deixa de apontar para a lista
+            obj.store = None
+            return None
+        if obj.kind == self.kind:
+            self.items[i] = obj.value
+            if self.aliased:
+                kept = self.kept_cell(i)
+                if kept != None:
+                    kept.value = obj.value
+            return None
+        self.unpack()
+        view = obj.live_view()
+        cell = self.items[i]
+        cell.kind = obj.kind
+        cell.value = obj.value
+        cell.view = view
+
+    def unpack(self):
+        if self.kind == None:
+            return None
+        if self.kind != objkind.INVALID:
+            self.items = _box_values(self.kind, self.items)
+        self.kind = None
+        if self.aliased:
+            # as celulas ligadas a argumentos viram os elementos
+            j = 0
+            while j < len(self.kept):
+                cell = self.kept[j]
+                self.items[cell.slot] = cell
+                cell.store = None
+                j += 1
+            self.kept = None
+            self.aliased = False
+
+    # o que eh guardado em 'items' para 'obj', o valor ou uma celula,
+    # convertendo a lista para a forma geral se preciso (ver _as_element)
+    def entry(self, obj, fresh):
+        if self.kind == objkind.INVALID and obj.kind in _packed_kinds:
+            self.kind = obj.kind
+        if obj.kind == self.kind:
+            if obj.parts != None:
+                obj.flush()
+            return obj.value
+        self.unpack()
+        return _as_element(obj, fresh)
+
+    # adiciona 'obj' no fim
+    def append(self, obj, fresh):
+        item = self.entry(obj, fresh)
+        self.items += [item]
+
+    # chamado antes de remover ou inserir elementos em 'items'. As
+    # fatias ficam com os elementos atuais e a lista passa a usar uma
+    # copia. As posicoes mudam, entao os indices de busca tambem ficam
+    # desatualizados (ver _List_Index), e as celulas ligadas a
+    # argumentos (ver keep) deixariam de apontar para o seu elemento:
+    # a lista deixa de ser compacta e elas viram os proprios elementos,
+    # que mudam de posicao junto com a lista
+    def detach(self):
+        if self.aliased:
+            self.unpack()
+        if self.source != None:
+            self.source.store = _List_Store(self.kind, self.items)
+            self.source = None
+            self.items = self.items[0:len(self.items)]
+        _mutations.count += 1
+
+    # adiciona os elementos de 'obj', uma lista, no fim. Os elementos
+    # sao copiados, como numa lista compacta, a nao ser que 'fresh'
+    # diga que as celulas de 'obj' nao estao em outra lista
+    def extend(self, obj, fresh):
+        other = _store_of(obj)
+        if other.kind == objkind.INVALID:
+            return None
+        if self.kind == objkind.INVALID:
+            self.kind = other.kind
+        if other.kind == self.kind:
+            if self.kind == None and not fresh:
+                self.items += _copy_elements(_list_range(obj))
+            else:
+                self.items += _list_range(obj)
+            return None
+        self.unpack()
+        if other.kind == None:
+            if fresh:
+                self.items += _list_range(obj)
+            else:
+                self.items += _copy_elements(_list_range(obj))
+        else:
+            self.items += _box_values(other.kind, _list_range(obj))
+
+# tipos de elementos guardados sem celula, ver _List_Store
+_packed_kinds = [objkind.NUM, objkind.STR]
+
+_hashable_kinds = [
+    objkind.BOOL, objkind.NUM, objkind.STR,
+    objkind.USER_OBJECT, objkind.USER_FUNCTION,
+    objkind.BUILTIN_FUNC, objkind.NONE,
+    objkind.MODULE,
+]
+
+def _box_values(kind, values):
+    out = []
+    i = 0
+    while i < len(values):
+        cell = _Py_Object(kind, values[i], True)
+        cell.element = True
+        out += [cell]
+        i += 1
+    return out
+
+# copias das celulas 'cells', para uma lista nova. Listas gerais e
+# compactas se comportam do mesmo jeito: 'a + b', 'a += b' e a copia
+# de uma fatia nao compartilham elementos com 'a' ou 'b', como no
+# Python, e uma lista dentro de outra continua sendo a mesma lista
+def _copy_elements(cells):
+    out = []
+    i = 0
+    while i < len(cells):
+        out += [cells[i].copy_element()]
+        i += 1
+    return out
+
+def _new_list():
+    return _Py_Object(objkind.LIST, _List_Store(objkind.INVALID, []), True)
+
+def _store_of(obj):
+    view = obj.live_view()
+    if view != None:
+        return view.source.store
+    return obj.value
+
+# valores (lista compacta) ou celulas (lista geral) de uma lista
+def _list_range(obj):
+    view = obj.live_view()
+    if view != None:
+        return view.source.store.items[view.begin:view.end]
+    return obj.value.items
+
+# numero de alteracoes em elementos de listas, um indice de busca
+# feito numa contagem diferente da atual pode estar desatualizado.
+# Como uma celula pode estar em varias listas ao mesmo tempo (as
+# fatias e a lista original), qualquer alteracao invalida todos os indices
+class _Counter:
+    def __init__(self):
+        self.count = 0
+
+_mutations = _Counter()
+
+def _shared_obj(kind, value):
+    obj = _Py_Object(kind, value, True)
+    obj.shared = True
+    return obj
+
+_true = _shared_obj(objkind.BOOL, True)
+_false = _shared_obj(objkind.BOOL, False)
+_none = _shared_obj(objkind.NONE, None)
+
+# 'and' e 'or' podem produzir um BOOL com valor de outro tipo,
+# ie, '0 or 5', que continua sendo um objeto novo
+def _bool_obj(value):
+    if value == True:
+        return _true
+    elif value == False:
+        return _false
+    return _Py_Object(objkind.BOOL, value, True)
+
+# inteiros pequenos, indexados pelo texto como em _Constant_Pool,
+# para um float como 2.0 nao ser confundido com o inteiro 2
+_small_nums = {}
+_i = -5
+while _i <= 256:
+    _small_nums[str(_i)] = _shared_obj(objkind.NUM, _i)
+    _i += 1
+
+def _num_obj(value):
+    if value >= -5 and value <= 256:
+        key = str(value)
+        if key in _small_nums:
+            return _small_nums[key]
+    return _Py_Object(objkind.NUM, value, True)
+
+# strings de um caractere, produzidas por 's[i]' e 's[i:i+1]' e criadas
+# uma unica vez por caractere. Como os numeros pequenos, sao objetos
+# compartilhados e nunca viram celulas: atribuir, passar como argumento
+# ou guardar numa lista copia o objeto, entao set() nunca os altera
+_chars = {}
+
+def _char_obj(c):
+    if not (c in _chars):
+        _chars[c] = _shared_obj(objkind.STR, c)
+    return _chars[c]
 
 class _Scope:
     def __init__(self, parent, kind):
@@ -163,11 +756,24 @@ class _Scope:
         self.parent = parent
         self.name = ""
         self.dict = {}
+        # nomes com endereco fixo (ver resolver.py) ficam em
+        # slots[names[nome]], None indica nome ainda nao atribuido
+        self.names = empty_layout.names
+        self.slots = []
+    def set_layout(self, layout):
+        self.names = layout.names
+        i = 0
+        while i < layout.size:
+            self.slots += [None]
+            i += 1
     def add_symbol(self, name, obj):
-        self.dict[name] = obj
-    def set_symbol(self, name, obj):
-        if name in self.dict:
+        if name in self.names:
+            self.slots[self.names[name]] = obj
+        else:
             self.dict[name] = obj
+    def set_symbol(self, name, obj):
+        if self.contains(name):
+            self.add_symbol(name, obj)
             return True
         else:
             return False
@@ -175,23 +781,64 @@ class _Scope:
     def set_scope_name(self, name):
         self.name = name
     def contains(self, name):
+        if name in self.names:
+            return self.slots[self.names[name]] != None
         return name in self.dict
     def retrieve(self, name):
         if name in self.dict:
-            return Result(self.dict[name], None)
-        elif self.parent != None:
+            return self.dict[name]
+        if name in self.names:
+            obj = self.slots[self.names[name]]
+            if obj != None:
+                return obj
+        if self.parent != None:
             return self.parent.retrieve(name)
-        else:
-            return Result(None, True)
+        return None
     def __str__(self):
         out = ""
         curr = self
         while curr != None:
             out += str(curr.dict)
+            if len(curr.slots) > 0:
+                out += " " + str(curr.names)
             out += "\n"
             curr = curr.parent
         return out
 
+# busca um nome usando o endereco calculado por resolver.py.
+# Um slot ainda nao atribuido cai na busca pelo nome a partir do
+# escopo pai, como acontecia quando todo escopo era um dicionario
+def _load_name(ctx, node):
+    addr = node.address
+    scope = ctx.curr_call_node.curr_scope
+    depth = addr.depth
+    while depth > 0:
+        scope = scope.parent
+        depth -= 1
+    if addr.slot >= 0:
+        obj = scope.slots[addr.slot]
+        if obj != None:
+            if obj.parts != None:
+                obj.flush()
+            return obj
+        scope = scope.parent
+    obj = scope.retrieve(addr.name)
+    if obj != None and obj.parts != None:
+        obj.flush()
+    return obj
+
+# comandos retornam None ou uma finalizacao abrupta: um Error,
+# _returned, devolvido depois de um 'return', ou _tail_called, depois
+# de uma chamada em cauda. Blocos e lacos repassam qualquer valor
+# diferente de None, e _User_Function.call_with consome as
+# finalizacoes, entao nenhum comando precisa consultar uma flag
+class _Completion:
+    def __init__(self, name):
+        self.name = name
+
+_returned = _Completion("return")
+_tail_called = _Completion("tail call")
+
 # _Call_Node define um no numa pilha de chamada
 class _Call_Node:
     def __init__(self, parent, scope):
@@ -203,6 +850,15 @@ class _Call_Node:
         self.return_obj = None
         # ao retornar de uma funcao, eh necessario ter acesso ao contexto pai
         self.parent = parent
+        # numero de chamadas abaixo desta, limitado por _Context.stack_limit
+        self.depth = 0
+        if parent != None:
+            self.depth = parent.depth + 1
+        # funcao executada, None no escopo de modulo e de builtins
+        self.func = None
+        # objeto criado pelo construtor, quando a chamada eh um __init__
+        # executado pela VM (ver vm._enter)
+        self.instance = None
 
     def __str__(self):
         return str(self.curr_scope.dict)
@@ -213,8 +869,21 @@ class _Context:
         self.source_map = source_map
         self.curr_call_node = call_node
         self.evaluated_mods = {}
-        self.is_returning = False
+        # erro da ultima expressao que falhou, expressoes retornam
+        # o objeto avaliado ou None, nesse caso o erro fica aqui
+        self.err = None
         self.verbose = False
+        # motor que executa os blocos (ver Tree_Walker)
+        self.engine = None
+        # chamada em cauda pendente (ver _tail_call)
+        self.tail_func = None
+        self.tail_receiver = None
+        self.tail_args = None
+        # profundidade maxima da pilha de chamadas do spy
+        self.stack_limit = 10000
+        # ver Options.licm e Options.inline
+        self.licm = True
+        self.inline = True
 
     def find_module_name(self):
         curr_scope = self.curr_call_node.curr_scope
@@ -234,6 +903,40 @@ class _Context:
         modname = self.find_module_name()
         return Error(modname, message, node.range.copy())
 
+    # registra o erro e retorna None, usado pelas expressoes
+    def fail(self, message, node):
+        self.err = self.error(message, node)
+        return None
+
+    def fail_with(self, err):
+        self.err = err
+        return None
+
+    # pilha de chamadas do spy, da mais antiga para a mais recente,
+    # com chamadas repetidas em sequencia numa unica linha
+    def traceback(self):
+        names = []
+        curr = self.curr_call_node
+        while curr != None:
+            if curr.func != None:
+                names += [curr.func.name]
+            elif curr.curr_scope.name != "":
+                names += ["module " + curr.curr_scope.name]
+            curr = curr.parent
+
+        out = "spy traceback (most recent call last):"
+        i = len(names) - 1
+        while i >= 0:
+            name = names[i]
+            count = 0
+            while i >= 0 and names[i] == name:
+                count += 1
+                i -= 1
+            out += "\n    " + name
+            if count > 1:
+                out += " (repeated " + str(count) + " times)"
+        return out
+
     def push_env(self, scope):
         next = _Call_Node(self.curr_call_node, scope)
         self.curr_call_node = next
@@ -265,18 +968,15 @@ class _Context:
         return None
 
     def reset_return(self):
-        none = _Py_Object(objkind.NONE, None, True)
-        self.curr_call_node.parent.return_obj = none
+        self.curr_call_node.parent.return_obj = _none
 
     def get_return(self):
-        self.is_returning = False
         return self.curr_call_node.return_obj
 
     def set_return(self, obj):
         if self.curr_call_node.parent == None:
-            return ctx.blank_error("invalid return (outside function?)")
+            return self.blank_error("invalid return (outside function?)")
         self.curr_call_node.parent.return_obj = obj
-        self.is_returning = True
         return None
 
     def toggle_verbose(self):
@@ -305,7 +1005,7 @@ def _check_unif_bin_types(ctx, node, left_obj, right_obj, typelist):
 def _eval_arith(ctx, left_obj, right_obj, node):
     err = _check_unif_bin_types(ctx, node, left_obj, right_obj, [objkind.NUM])
     if err != None:
-        return Result(None, err)
+        return ctx.fail_with(err)
 
     out = None
     if node.has_lexkind(lexkind.MINUS):
@@ -314,37 +1014,47 @@ def _eval_arith(ctx, left_obj, right_obj, node):
         out = left_obj.value * right_obj.value
     elif node.has_lexkind(lexkind.DIV):
         if right_obj.value == 0:
-            err = ctx.error("division by zero", node)
-            return Result(None, err)
+            return ctx.fail("division by zero", node)
         out = left_obj.value / right_obj.value
     elif node.has_lexkind(lexkind.REM):
         if right_obj.value == 0:
-            err = ctx.error("division by zero", node)
-            return Result(None, err)
+            return ctx.fail("division by zero", node)
         out = left_obj.value % right_obj.value
-    obj = _Py_Object(objkind.NUM, out, True)
-    return Result(obj, None)
+    return _num_obj(out)
 
+# 'a' e 'b' tem o mesmo tipo
 def _identity(a, b):
     if a.kind == objkind.LIST:
         return _eq_list(a, b)
     else:
         return a.value == b.value
 
+# so desce recursivamente em elementos que sao listas.
+# Duas listas compactas do mesmo tipo comparam so os valores
 def _eq_list(a, b):
-    A = a.value
-    B = b.value
+    size = _seq_len(a)
+    if size != _seq_len(b):
+        return False
+    kind = _store_of(a).kind
+    if kind != None and kind == _store_of(b).kind:
+        return _list_range(a) == _list_range(b)
     i = 0
-    while i < len(A):
-        if not _identity(A[i], B[i]):
+    while i < size:
+        x = _list_item(a, i)
+        y = _list_item(b, i)
+        if x.kind != y.kind:
+            return False
+        if x.kind == objkind.LIST:
+            if not _eq_list(x, y):
+                return False
+        elif x.value != y.value:
             return False
         i += 1
     return True
 
 def _eval_identity(ctx, left_obj, right_obj, node):
     if left_obj.kind == objkind.DICT:
-        err = ctx.error("map has no identity", node)
-        return Result(None, err)
+        return ctx.fail("map has no identity", node)
 
     if left_obj.kind != right_obj.kind:
         out = False
@@ -354,13 +1064,12 @@ def _eval_identity(ctx, left_obj, right_obj, node):
     if node.has_lexkind(lexkind.DIFF):
         out = not out
 
-    obj = _Py_Object(objkind.BOOL, out, True)
-    return Result(obj, None)
+    return _bool_obj(out)
 
 def _eval_order(ctx, left_obj, right_obj, node):
     err = _check_unif_bin_types(ctx, node, left_obj, right_obj, [objkind.NUM, objkind.STR])
     if err != None:
-        return Result(None, err)
+        return ctx.fail_with(err)
 
     out = None
     if node.has_lexkind(lexkind.GREATER):
@@ -372,174 +1081,390 @@ def _eval_order(ctx, left_obj, right_obj, node):
     elif node.has_lexkind(lexkind.LESS_OR_EQUALS):
         out = left_obj.value <= right_obj.value
 
-    obj = _Py_Object(objkind.BOOL, out, True)
-    return Result(obj, None)
+    return _bool_obj(out)
 
 def _eval_or(ctx, node):
     left = node.leaves[0]
     right = node.leaves[1]
 
-    res = _eval_expr(ctx, left)
-    if res.failed():
-        return res
-    left_obj = res.value
+    left_obj = _eval_expr(ctx, left)
+    if left_obj == None:
+        return None
 
     if left_obj.value:
-        obj = _Py_Object(objkind.BOOL, True, True)
-        return Result(obj, None)
+        return _true
 
-    res = _eval_expr(ctx, right)
-    if res.failed():
-        return res
-    right_obj = res.value
+    right_obj = _eval_expr(ctx, right)
+    if right_obj == None:
+        return None
 
     out = left_obj.value or right_obj.value
-    obj = _Py_Object(objkind.BOOL, out, True)
-    return Result(obj, None)
+    return _bool_obj(out)
 
 def _eval_and(ctx, node):
     left = node.leaves[0]
     right = node.leaves[1]
 
-    res = _eval_expr(ctx, left)
-    if res.failed():
-        return res
-    left_obj = res.value
+    left_obj = _eval_expr(ctx, left)
+    if left_obj == None:
+        return None
 
     if not left_obj.value:
-        obj = _Py_Object(objkind.BOOL, False, True)
-        return Result(obj, None)
+        return _false
 
-    res = _eval_expr(ctx, right)
-    if res.failed():
-        return res
-    right_obj = res.value
+    right_obj = _eval_expr(ctx, right)
+    if right_obj == None:
+        return None
 
     out = left_obj.value and right_obj.value
-    obj = _Py_Object(objkind.BOOL, out, True)
-    return Result(obj, None)
+    return _bool_obj(out)
 
 def _eval_plus(ctx, left_obj, right_obj, node):
     kinds = [objkind.NUM, objkind.LIST, objkind.STR]
     err = _check_unif_bin_types(ctx, node, left_obj, right_obj, kinds)
     if err != None:
-        return Result(None, err)
+        return ctx.fail_with(err)
 
+    if left_obj.kind == objkind.LIST:
+        out = _new_list()
+        out.value.extend(left_obj, _fresh_list(node.leaves[0]))
+        out.value.extend(right_obj, _fresh_list(node.leaves[1]))
+        return out
     out = left_obj.value + right_obj.value
+    if left_obj.kind == objkind.NUM:
+        return _num_obj(out)
     obj = _Py_Object(left_obj.kind, out, True)
-    return Result(obj, None)
+    return obj
 
-def _in(value, list):
+# 'obj in l' compara os elementos como '==' (ver _identity)
+def _in(obj, list):
+    kind = obj.kind
     i = 0
+    if kind == objkind.LIST:
+        while i < len(list):
+            item = list[i]
+            if item.kind == kind and _eq_list(item, obj):
+                return True
+            i += 1
+        return False
+    value = obj.value
     while i < len(list):
-        if list[i].value == value:
+        item = list[i]
+        if item.value == value and item.kind == kind:
             return True
         i += 1
     return False
 
+# listas menores que isso sempre sao percorridas
+_index_min_len = 16
+
+# indice de uma lista: tipo -> {valor: True}, com os elementos
+# hasheaveis, como o dicionario de IN_CONSTANTS (ver optimizer.py).
+# So eh montado quando a lista eh buscada de novo sem ter mudado.
+# '+=' so adiciona elementos no fim, que entram no indice na
+# proxima busca
+class _List_Index:
+    def __init__(self, count):
+        # valor de _mutations.count quando o indice foi criado
+        self.count = count
+        self.searches = 0
+        self.kinds = {}
+        # numero de elementos ja indexados, -1 antes da segunda busca
+        self.size = -1
+
+    def update(self, list):
+        i = self.size
+        if i < 0:
+            i = 0
+        while i < len(list):
+            item = list[i]
+            if item.is_hashable():
+                if not (item.kind in self.kinds):
+                    self.kinds[item.kind] = {}
+                self.kinds[item.kind][item.value] = True
+            i += 1
+        self.size = len(list)
+
+def _in_kinds(kinds, obj):
+    if obj.kind in kinds:
+        return obj.value in kinds[obj.kind]
+    return False
+
+# numa lista compacta a busca eh feita direto nos valores
+def _in_list(obj, list_obj):
+    kind = _store_of(list_obj).kind
+    if kind != None:
+        return obj.kind == kind and obj.value in _list_range(list_obj)
+    list = list_obj.items()
+    if len(list) < _index_min_len or not obj.is_hashable():
+        return _in(obj, list)
+    store = list_obj.value
+    index = store.index
+    if index == None or index.count != _mutations.count or index.size > len(list):
+        index = _List_Index(_mutations.count)
+        store.index = index
+    if index.size < 0:
+        index.searches += 1
+        if index.searches < 2:
+            return _in(obj, list)
+    if index.size < len(list):
+        index.update(list)
+    return _in_kinds(index.kinds, obj)
+
 def _eval_in(ctx, left_obj, right_obj, node):
+    if right_obj.is_kind(objkind.STR):
+        if not left_obj.is_kind(objkind.STR):
+            return ctx.fail("object is not a string", node.left())
+        return _bool_obj(left_obj.value in right_obj.value)
     if right_obj.is_kind(objkind.DICT):
         if not left_obj.is_hashable():
-            err = ctx.error("object is not hashable", node.left())
-            return Result(None, err)
+            return ctx.fail("object is not hashable", node.left())
         out = left_obj.value in right_obj.value
-        obj = _Py_Object(objkind.BOOL, out, True)
-        return Result(obj, None)
+        return _bool_obj(out)
     elif right_obj.is_kind(objkind.LIST):
-        out = _in(left_obj.value, right_obj.value)
-        obj = _Py_Object(objkind.BOOL, out, True)
-        return Result(obj, None)
+        out = _in_list(left_obj, right_obj)
+        return _bool_obj(out)
     else:
-        err = ctx.error("object is not a dictionary or list", node.right())
-        return Result(None, err)
+        return ctx.fail("object is not a dictionary, list or string", node.right())
+
+# 'x in [c1, c2, ...]' com constantes, ver optimizer.py
+def _eval_in_constants(ctx, node):
+    obj = _eval_expr(ctx, node.leaves[0])
+    if obj == None:
+        return None
+    return _in_constants_obj(node, obj)
+
+# listas e dicionarios nunca sao iguais a uma constante
+def _in_constants_obj(node, obj):
+    out = obj.is_hashable() and _in_kinds(node.constant, obj)
+    return _bool_obj(out)
 
 def _eval_bin_operator(ctx, node):
-    # esses precisam ser short-circuited
-    if node.has_lexkind(lexkind.AND):
-        return _eval_and(ctx, node)
-    elif node.has_lexkind(lexkind.OR):
-        return _eval_or(ctx, node)
+    return _bin_node_table[node.value.kind](ctx, node)
 
+# operadores que avaliam os dois operandos, ie, todos menos 'and' e 'or',
+# que precisam ser short-circuited
+def _eval_strict_bin(ctx, node):
     left = node.leaves[0]
     right = node.leaves[1]
 
-    res = _eval_expr(ctx, left)
-    if res.failed():
-        return res
-    left_obj = res.value
+    left_obj = _eval_expr(ctx, left)
+    if left_obj == None:
+        return None
 
-    res = _eval_expr(ctx, right)
-    if res.failed():
-        return res
-    right_obj = res.value
+    right_obj = _eval_expr(ctx, right)
+    if right_obj == None:
+        return None
 
-    arith = [lexkind.MINUS, lexkind.MULT, lexkind.DIV, lexkind.REM]
-    identity = [lexkind.EQUALS, lexkind.DIFF]
-    order = [lexkind.GREATER, lexkind.GREATER_OR_EQUALS, lexkind.LESS, lexkind.LESS_OR_EQUALS]
-    
-    if node.has_lexkind(lexkind.IN):
-        return _eval_in(ctx, left_obj, right_obj, node)
-    elif node.has_lexkind(lexkind.PLUS):
-        return _eval_plus(ctx, left_obj, right_obj, node)
-    elif node.has_lexkinds(arith):
-        return _eval_arith(ctx, left_obj, right_obj, node)
-    elif node.has_lexkinds(identity):
-        return _eval_identity(ctx, left_obj, right_obj, node)
-    elif node.has_lexkinds(order):
-        return _eval_order(ctx, left_obj, right_obj, node)
-    else:
-        err = ctx.error("invalid lexkind for binary operator", node)
-        return Result(None, err)
+    out = _eval_bin_objs(ctx, node, left_obj, right_obj)
+    if out != None and node.cache == None:
+        _quicken(node, left_obj, right_obj)
+    return out
+
+# aplica um operador binario (que nao seja 'and' ou 'or')
+# em dois objetos ja avaliados
+def _eval_bin_objs(ctx, node, left_obj, right_obj):
+    return _bin_table[node.value.kind](ctx, left_obj, right_obj, node)
+
+def _invalid_bin(ctx, left_obj, right_obj, node):
+    return ctx.fail("invalid lexkind for binary operator", node)
 
 def _eval_una_operator(ctx, node):
     operand = node.leaves[0]
-    res = _eval_expr(ctx, operand)
-    if res.failed():
-        return res
-    obj = res.value
-    if node.has_lexkind(lexkind.NOT):
-        if obj.is_kind(objkind.BOOL):
-            new_value = not obj.value
-            obj = _Py_Object(objkind.BOOL, new_value, True)
-            return Result(obj, None)
-        else:
-            err = ctx.error("object is not a boolean", operand)
-            return Result(None, err)
-    elif node.has_lexkind(lexkind.MINUS):
-        if obj.is_kind(objkind.NUM):
-            new_value = -obj.value
-            obj = _Py_Object(objkind.NUM, new_value, True)
-            return Result(obj, None)
+    obj = _eval_expr(ctx, operand)
+    if obj == None:
+        return None
+    return _eval_una_obj(ctx, node, obj)
+
+def _eval_una_obj(ctx, node, obj):
+    return _una_table[node.value.kind](ctx, node, obj)
+
+def _eval_not(ctx, node, obj):
+    if obj.is_kind(objkind.BOOL):
+        return _bool_obj(not obj.value)
+    return ctx.fail("object is not a boolean", node.leaves[0])
+
+def _eval_negate(ctx, node, obj):
+    if obj.is_kind(objkind.NUM):
+        return _num_obj(-obj.value)
+    return ctx.fail("object is not a number", node.leaves[0])
+
+def _invalid_una(ctx, node, obj):
+    return ctx.fail("invalid lexkind for unary operator", node)
+
+# quickening: depois da primeira execucao, um no BIN_OPERATOR cujos
+# operandos tinham o mesmo tipo 'kind' vira QUICK_BIN_OPERATOR e passa
+# a calcular o resultado direto dos valores com 'op', verificando so
+# o tipo dos operandos. Quando a verificacao falha, ou 'op' nao sabe
+# calcular o resultado (retorna None, ie, divisao por zero), o no
+# volta a ser BIN_OPERATOR e fica com _deoptimized para sempre
+class _Quick_Bin:
+    def __init__(self, kind, op):
+        self.kind = kind
+        self.op = op
+
+_deoptimized = _Quick_Bin(objkind.INVALID, None)
+
+def _quicken(node, left_obj, right_obj):
+    quick = _quick_bin(node, left_obj, right_obj)
+    if quick != None:
+        node.cache = quick
+        node.kind = nodekind.QUICK_BIN_OPERATOR
+
+# operacao especializada para o operador 'node' com esses operandos,
+# ou None se nao ha uma (a VM guarda o resultado no proprio Code)
+def _quick_bin(node, left_obj, right_obj):
+    kind = left_obj.kind
+    if kind == right_obj.kind and kind in _quick_ops:
+        op = _quick_ops[kind][node.value.kind]
+        if op != None:
+            return _Quick_Bin(kind, op)
+    return None
+
+def _eval_quick_bin(ctx, node):
+    left_obj = _eval_expr(ctx, node.leaves[0])
+    if left_obj == None:
+        return None
+    right_obj = _eval_expr(ctx, node.leaves[1])
+    if right_obj == None:
+        return None
+
+    quick = node.cache
+    if left_obj.kind == quick.kind and right_obj.kind == quick.kind:
+        op = quick.op
+        out = op(left_obj.value, right_obj.value)
+        if out != None:
+            return out
+    node.kind = nodekind.BIN_OPERATOR
+    node.cache = _deoptimized
+    return _eval_bin_objs(ctx, node, left_obj, right_obj)
+
+def _quick_add(a, b):
+    return _num_obj(a + b)
+
+def _quick_sub(a, b):
+    return _num_obj(a - b)
+
+def _quick_mult(a, b):
+    return _num_obj(a * b)
+
+def _quick_div(a, b):
+    if b == 0:
+        return None
+    return _num_obj(a / b)
+
+def _quick_rem(a, b):
+    if b == 0:
+        return None
+    return _num_obj(a % b)
+
+def _quick_concat(a, b):
+    return _Py_Object(objkind.STR, a + b, True)
+
+def _quick_equals(a, b):
+    return _bool_obj(a == b)
+
+def _quick_diff(a, b):
+    return _bool_obj(a != b)
+
+def _quick_greater(a, b):
+    return _bool_obj(a > b)
+
+def _quick_greater_or_equals(a, b):
+    return _bool_obj(a >= b)
+
+def _quick_less(a, b):
+    return _bool_obj(a < b)
+
+def _quick_less_or_equals(a, b):
+    return _bool_obj(a <= b)
+
+# tabelas de despacho indexadas diretamente pelo kind (ver COUNT em
+# nodekind.py e lexkind.py): o custo do despacho eh o mesmo para
+# qualquer operador ou no, em vez de depender da posicao numa
+# cadeia de if/elif. Os handlers de uma tabela tem a mesma assinatura,
+# e 'default' ocupa os kinds que nao estao em 'handlers'
+def _kind_table(count, default, handlers):
+    table = []
+    i = 0
+    while i < count:
+        if i in handlers:
+            table += [handlers[i]]
         else:
-            err = ctx.error("object is not a number", operand)
-            return Result(None, err)
-    else:
-        err = ctx.error("invalid lexkind for unary operator", node)
-        return Result(None, err)
+            table += [default]
+        i += 1
+    return table
+
+_bin_node_table = _kind_table(lexkind.COUNT, _eval_strict_bin, {
+    lexkind.AND: _eval_and,
+    lexkind.OR: _eval_or,
+})
+
+_bin_table = _kind_table(lexkind.COUNT, _invalid_bin, {
+    lexkind.IN: _eval_in,
+    lexkind.PLUS: _eval_plus,
+    lexkind.MINUS: _eval_arith,
+    lexkind.MULT: _eval_arith,
+    lexkind.DIV: _eval_arith,
+    lexkind.REM: _eval_arith,
+    lexkind.EQUALS: _eval_identity,
+    lexkind.DIFF: _eval_identity,
+    lexkind.GREATER: _eval_order,
+    lexkind.GREATER_OR_EQUALS: _eval_order,
+    lexkind.LESS: _eval_order,
+    lexkind.LESS_OR_EQUALS: _eval_order,
+})
+
+# tipo dos operandos -> operacoes especializadas, indexadas pelo lexkind
+_quick_ops = {
+    objkind.NUM: _kind_table(lexkind.COUNT, None, {
+        lexkind.PLUS: _quick_add,
+        lexkind.MINUS: _quick_sub,
+        lexkind.MULT: _quick_mult,
+        lexkind.DIV: _quick_div,
+        lexkind.REM: _quick_rem,
+        lexkind.EQUALS: _quick_equals,
+        lexkind.DIFF: _quick_diff,
+        lexkind.GREATER: _quick_greater,
+        lexkind.GREATER_OR_EQUALS: _quick_greater_or_equals,
+        lexkind.LESS: _quick_less,
+        lexkind.LESS_OR_EQUALS: _quick_less_or_equals,
+    }),
+    objkind.STR: _kind_table(lexkind.COUNT, None, {
+        lexkind.PLUS: _quick_concat,
+        lexkind.EQUALS: _quick_equals,
+        lexkind.DIFF: _quick_diff,
+        lexkind.GREATER: _quick_greater,
+        lexkind.GREATER_OR_EQUALS: _quick_greater_or_equals,
+        lexkind.LESS: _quick_less,
+        lexkind.LESS_OR_EQUALS: _quick_less_or_equals,
+    }),
+}
+
+_una_table = _kind_table(lexkind.COUNT, _invalid_una, {
+    lexkind.NOT: _eval_not,
+    lexkind.MINUS: _eval_negate,
+})
 
 def _eval_terminal(ctx, node):
     obj = None
     if node.has_lexkind(lexkind.TRUE):
-        obj = _Py_Object(objkind.BOOL, True, True)
+        obj = _true
     elif node.has_lexkind(lexkind.FALSE):
-        obj = _Py_Object(objkind.BOOL, False, True)
+        obj = _false
     elif node.has_lexkind(lexkind.NONE):
-        obj = _Py_Object(objkind.NONE, None, True)
+        obj = _none
     elif node.has_lexkind(lexkind.ID) or node.has_lexkind(lexkind.SELF):
-        name = node.value.text
-        res = ctx.retrieve(name)
-        if res.failed():
-            err = ctx.error("name not found", node)
-            return Result(None, err)
-        obj = res.value
+        obj = _load_name(ctx, node)
+        if obj == None:
+            return ctx.fail("name not found", node)
     elif node.has_lexkind(lexkind.STR):
         obj = _Py_Object(objkind.STR, node.value.text, True)
     elif node.has_lexkind(lexkind.NUM):
-        obj = _Py_Object(objkind.NUM, int(node.value.text), True)
+        obj = _num_obj(int(node.value.text))
     else:
-        err = ctx.error("invalid lexkind for terminal", node)
-        return Result(None, err)
-    return Result(obj, None)
+        return ctx.fail("invalid lexkind for terminal", node)
+    return obj
 
 def _eval_dict(ctx, node):
     kvlist = node.leaves[0]
@@ -551,52 +1476,89 @@ def _eval_dict(ctx, node):
             key_expr = kvpair.leaves[0]
             value_expr = kvpair.leaves[1]
 
-            res = _eval_expr(ctx, key_expr)
-            if res.failed():
-                return res
-            key = res.value
+            key = _eval_expr(ctx, key_expr)
+            if key == None:
+                return None
 
-            res = _eval_expr(ctx, value_expr)
-            if res.failed():
-                return res
-            value = res.value.copy()
+            value = _eval_expr(ctx, value_expr)
+            if value == None:
+                return None
+            value = value.copy()
 
             if not key.is_hashable():
-                err = ctx.error("object is not hashable", key_expr)
-                return Result(None, err)
+                return ctx.fail("object is not hashable", key_expr)
 
             out[key.value] = value
             i += 1
 
     obj = _Py_Object(objkind.DICT, out, True)
-    return Result(obj, None)
+    return obj
 
 def _eval_list(ctx, node):
     exprlist = node.leaves[0]
     i = 0
-    out = []
+    obj = _new_list()
     if exprlist != None:
         while i < len(exprlist.leaves):
             expr = exprlist.leaves[i]
-            res = _eval_expr(ctx, expr)
-            if res.failed():
-                return res
-            item = res.value.copy()
-            out += [item]
+            item = _eval_expr(ctx, expr)
+            if item == None:
+                return None
+            obj.value.append(item, expr.kind in _fresh_kinds)
             i += 1
-    obj = _Py_Object(objkind.LIST, out, True)
-    return Result(obj, None)
+    return obj
+
+# expressoes que sempre produzem um objeto novo ou compartilhado,
+# nunca a celula de uma variavel, campo ou elemento
+_fresh_kinds = [
+    nodekind.BIN_OPERATOR, nodekind.UNA_OPERATOR, nodekind.SLICE,
+    nodekind.LIST, nodekind.DICT, nodekind.IN_CONSTANTS,
+]
+
+# lista cujos elementos nao estao em nenhuma outra lista: um
+# literal ou o resultado de '+', ver _List_Store.extend
+def _fresh_list(node):
+    return node.kind == nodekind.LIST or node.kind == nodekind.BIN_OPERATOR
+
+# objeto guardado numa lista, um objeto novo vira o
+# proprio elemento e nao precisa ser copiado
+def _as_element(obj, fresh):
+    if fresh and not obj.shared:
+        obj.element = True
+        return obj
+    return obj.copy_element()
 
 def _eval_call(ctx, node):
     if ctx.verbose:
         print("_eval_call")
+    return _eval_call_with(ctx, node, _call_obj, _call_method)
+
+# 'return f(...)' dentro de uma funcao, ver resolver.py
+def _eval_tail_call(ctx, node):
+    out = _eval_call_with(ctx, node.leaves[0], _tail_call_obj, _tail_call)
+    if out == None:
+        return ctx.err
+    return out
+
+# avalia a funcao e os argumentos e repassa para call_obj ou, se
+# a chamada for 'obj.metodo(...)', para call_method
+def _eval_call_with(ctx, node, call_obj, call_method):
     exprlist = node.leaves[0]
     callee = node.leaves[1]
 
-    res = _eval_expr(ctx, callee)
-    if res.failed():
-        return res
-    thing = res.value
+    thing = None
+    method = None
+    if callee.kind == nodekind.FIELD_ACCESS:
+        receiver = _eval_expr(ctx, callee.leaves[1])
+        if receiver == None:
+            return None
+        method = _method_of(receiver, callee)
+        if method == None:
+            thing = _field_obj(ctx, callee, receiver)
+    else:
+        thing = _eval_expr(ctx, callee)
+    if thing == None and method == None:
+        return None
 
     args = []
     if exprlist != None:
@@ -604,196 +1566,266 @@ def _eval_call(ctx, node):
         while i < len(exprlist.leaves):
             expr = exprlist.leaves[i]
 
-            res = _eval_expr(ctx, expr)
-            if res.failed():
-                return res
-            args += [res.value]
+            obj = _eval_expr(ctx, expr)
+            if obj == None:
+                return None
+            args += [obj]
             i += 1
 
-    if thing.is_kind(objkind.USER_FUNCTION):
-        err = thing.value.call(ctx, args)
-        if err != None:
-            if err.range == None:
-                err.range = node.range.copy()
-            return Result(None, err)
-        obj = ctx.get_return()
-        return Result(obj, None)
-    elif thing.is_kind(objkind.BUILTIN_FUNC):
-        res = thing.value.call(ctx, args)
-        if res.failed():
-            if res.error.range == None:
-                res.error.range = node.range.copy()
-            return res
-        obj = res.value
-        return Result(obj, None)
+    if method != None:
+        return call_method(ctx, node, method, receiver, args)
+    return call_obj(ctx, node, thing, args)
+
+# metodo de 'obj.campo', ou None se 'obj' nao eh uma instancia
+# ou o campo nao eh um metodo
+def _method_of(obj, field_access):
+    if obj.kind == objkind.USER_OBJECT:
+        name = field_access.leaves[0].value.text
+        return obj.value.get_method(name)
+    return None
+
+def _call_method(ctx, node, method, receiver, args):
+    obj = method.call_with(ctx, receiver, args)
+    if obj == None:
+        if ctx.err.range == None:
+            ctx.err.range = node.range.copy()
+        return None
+    return obj
+
+# chamada em cauda, 'node' eh o no da chamada. Funcoes do usuario nao
+# sao chamadas aqui: a chamada fica guardada no contexto e o comando
+# termina com _tail_called, entao _User_Function.call_with desempilha
+# o escopo atual e executa a chamada sem crescer a pilha do Python.
+# Retorna uma finalizacao de comando, ie, _tail_called, _returned
+# ou um erro
+def _tail_call_obj(ctx, node, thing, args):
+    if thing.kind == objkind.USER_FUNCTION:
+        return thing.value.tail_call(ctx, node, args)
+    obj = _call_obj(ctx, node, thing, args)
+    if obj == None:
+        return ctx.err
+    return _return_obj(ctx, node, obj)
+
+def _tail_call(ctx, node, func, receiver, args):
+    if len(args) != len(func.formal_args):
+        err = ctx.blank_error("invalid number of arguments")
+        err.range = node.range.copy()
+        return err
+    ctx.tail_func = func
+    ctx.tail_receiver = receiver
+    ctx.tail_args = args
+    return _tail_called
+
+_callable_kinds = [objkind.USER_FUNCTION, objkind.BUILTIN_FUNC]
+
+# chama um objeto ja avaliado, 'node' eh o no da chamada
+def _call_obj(ctx, node, thing, args):
+    callee = node.leaves[1]
+    if thing.is_kinds(_callable_kinds):
+        obj = thing.value.call(ctx, args)
+        if obj == None:
+            if ctx.err.range == None:
+                ctx.err.range = node.range.copy()
+            return None
+        return obj
     elif thing.is_kind(objkind.USER_CLASS):
-        res = thing.value.eval_init(ctx, args)
-        if res.failed():
-            if res.error.range == None:
-                res.error.range = callee.range.copy()
-            return res
-        obj = res.value
-        return Result(obj, None)
+        obj = thing.value.eval_init(ctx, args)
+        if obj == None:
+            if ctx.err.range == None:
+                ctx.err.range = callee.range.copy()
+            return None
+        return obj
     else:
-        err = ctx.error("object is not callable", callee)
-        return Result(None, err)
+        return ctx.fail("object is not callable", callee)
 
 def _eval_field_access(ctx, node):
-    field = node.leaves[0]
     operand = node.leaves[1]
-    res = _eval_expr(ctx, operand)
-    if res.failed():
-        return res
-    obj = res.value
+    obj = _eval_expr(ctx, operand)
+    if obj == None:
+        return None
+    return _field_obj(ctx, node, obj)
+
+def _field_obj(ctx, node, obj):
+    if obj.kind == objkind.USER_OBJECT:
+        cache = node.cache
+        if cache != None and cache.shape == obj.value.shape:
+            out = obj.value.slots[cache.slot]
+            if out.parts != None:
+                out.flush()
+            return out
 
+    field = node.leaves[0]
+    operand = node.leaves[1]
     if obj.is_kinds([objkind.STR, objkind.DICT, objkind.NUM,
                      objkind.LIST, objkind.USER_FUNCTION,
                      objkind.BUILTIN_FUNC]):
-        err = ctx.error("object has no properties", operand)
-        return Result(None, err)
+        return ctx.fail("object has no properties", operand)
 
     name = field.value.text
     if obj.is_kind(objkind.MODULE):
-        res = obj.value.get_global(name)
-        if res.failed():
+        out = obj.value.get_global(name)
+        if out == None:
             msg = "name not found in module"
-            err = ctx.error(msg, field)
-            return Result(None, err)
-        return Result(res.value, None)
+            return ctx.fail(msg, field)
+        if out.parts != None:
+            out.flush()
+        return out
     elif obj.is_kind(objkind.USER_OBJECT):
-        if name in obj.value.methods:
-            func = obj.value.get_method(name).value
-            news = _Scope(func.parent_scope, scopekind.FUNCTION)
-            news.add_symbol("self", obj)
-            func.parent_scope = news
-            obj = _Py_Object(objkind.USER_FUNCTION, func, False)
-        elif name in obj.value.properties:
-            obj = obj.value.get_attr(name).value
+        inst = obj.value
+        if name in inst.methods:
+            method = _Bound_Method(inst.get_method(name), obj)
+            obj = _Py_Object(objkind.USER_FUNCTION, method, False)
+        elif name in inst.shape.names:
+            slot = inst.shape.names[name]
+            node.cache = _Inline_Cache(inst.shape, slot, None)
+            obj = inst.slots[slot]
+            if obj.parts != None:
+                obj.flush()
         else:
-            err = ctx.error("property not found", field)
-            return Result(err, None)
-        return Result(obj, None)
+            return ctx.fail("property not found", field)
+        return obj
     else:
         msg = "object has invalid type: " + objkind.to_str(obj.kind)
-        err = ctx.error(msg, operand)
-        return Result(None, err)
+        return ctx.fail(msg, operand)
 
 def _eval_index(ctx, node):
     operand = node.leaves[1]
     expr = node.leaves[0]
 
-    res = _eval_expr(ctx, operand)
-    if res.failed():
-        return res
-    obj = res.value
+    obj = _eval_expr(ctx, operand)
+    if obj == None:
+        return None
 
-    res = _eval_expr(ctx, expr)
-    if res.failed():
-        return res
-    index = res.value
+    index = _eval_expr(ctx, expr)
+    if index == None:
+        return None
+    return _index_obj(ctx, node, obj, index)
 
+def _index_obj(ctx, node, obj, index):
+    operand = node.leaves[1]
+    expr = node.leaves[0]
     if obj.is_kind(objkind.DICT):
         if index.is_hashable():
             if index.value in obj.value:
                 obj = obj.value[index.value]
-                return Result(obj, None)
+                return obj
             else:
-                err = ctx.error("key not found", expr)
-                return Result(None, err)
+                return ctx.fail("key not found", expr)
         else:
-            err = ctx.error("object not hashable", expr)
-            return Result(None, err)
+            return ctx.fail("object not hashable", expr)
     elif obj.is_kind(objkind.LIST):
         if index.is_kind(objkind.NUM):
-            if index.value >= 0 and index.value < len(obj.value):
-                obj = obj.value[index.value]
-                return Result(obj, None)
-            else:
-                err = ctx.error("index out of range", expr)
-                return Result(None, err)
+            out = _list_item(obj, index.value)
+            if out == None:
+                return ctx.fail("index out of range", expr)
+            return out
         else:
-            err = ctx.error("index is not a number", expr)
-            return Result(None, err)
+            return ctx.fail("index is not a number", expr)
     elif obj.is_kind(objkind.STR):
         if index.is_kind(objkind.NUM):
             if index.value >= 0 and index.value < len(obj.value):
-                value = obj.value[index.value]
-                obj = _Py_Object(objkind.STR, value, True)
-                return Result(obj, None)
+                return _char_obj(obj.value[index.value])
             else:
-                err = ctx.error("index out of range", expr)
-                return Result(None, err)
+                return ctx.fail("index out of range", expr)
         else:
-            err = ctx.error("index is not a number", expr)
-            return Result(None, err)
+            return ctx.fail("index is not a number", expr)
     else:
         msg = "unexpected type for indexing: " + objkind.to_str(obj.kind)
-        err = ctx.error(msg, operand)
-        return Result(None, err)
+        return ctx.fail(msg, operand)
 
 def _eval_slice(ctx, node):
     begin_expr = node.leaves[0]
     end_expr = node.leaves[1]
     operand_expr = node.leaves[2]
 
-    res = _eval_expr(ctx, operand_expr)
-    if res.failed():
-        return res
-    obj = res.value
+    obj = _eval_expr(ctx, operand_expr)
+    if obj == None:
+        return None
 
-    res = _eval_expr(ctx, begin_expr)
-    if res.failed():
-        return res
-    begin = res.value
+    begin = _eval_expr(ctx, begin_expr)
+    if begin == None:
+        return None
 
-    res = _eval_expr(ctx, end_expr)
-    if res.failed():
-        return res
-    end = res.value
+    end = _eval_expr(ctx, end_expr)
+    if end == None:
+        return None
+    return _slice_obj(ctx, node, obj, begin, end)
 
+def _slice_obj(ctx, node, obj, begin, end):
+    begin_expr = node.leaves[0]
+    end_expr = node.leaves[1]
+    operand_expr = node.leaves[2]
     if not begin.is_kind(objkind.NUM):
-        err = ctx.error("expected an integer", begin_expr)
-        return Result(None, err)
+        return ctx.fail("expected an integer", begin_expr)
     if not end.is_kind(objkind.NUM):
-        err = ctx.error("expected an integer", end_expr)
-        return Result(None, err)
+        return ctx.fail("expected an integer", end_expr)
     if not obj.is_kinds([objkind.LIST, objkind.STR]):
-        err = ctx.error("expected a list or string", operand_expr)
-        return Result(None, err)
-
-    if begin.value < 0 or begin.value > len(obj.value):
-        err = ctx.error("out of bounds", begin_expr)
-        return Result(None, err)
-    elif end.value < 0 or end.value > len(obj.value):
-        err = ctx.error("out of bounds", end_expr)
-        return Result(None, err)
-
+        return ctx.fail("expected a list or string", operand_expr)
+
+    size = _seq_len(obj)
+    if begin.value < 0 or begin.value > size:
+        return ctx.fail("out of bounds", begin_expr)
+    elif end.value < 0 or end.value > size:
+        return ctx.fail("out of bounds", end_expr)
+
+    if obj.kind == objkind.LIST:
+        if begin.value < end.value:
+            return _list_slice(obj, begin.value, end.value)
+        return _new_list()
     out = obj.value[begin.value:end.value]
+    if len(out) == 1:
+        return _char_obj(out)
     out_obj = _Py_Object(obj.kind, out, True)
-    return Result(out_obj, None)
+    return out_obj
+
+# elemento 'i' de uma lista, ou None se 'i' esta fora da lista
+def _list_item(obj, i):
+    view = obj.live_view()
+    j = i
+    if view != None:
+        if i < 0 or i >= view.end - view.begin:
+            return None
+        store = view.source.store
+        j = i + view.begin
+    else:
+        store = obj.value
+        if i < 0 or i >= len(store.items):
+            return None
+    if store.kind == None:
+        return store.items[j]
+    return store.cell(j)
+
+# numero de elementos de uma lista ou caracteres de uma string
+def _seq_len(obj):
+    view = obj.live_view()
+    if view != None:
+        return view.end - view.begin
+    if obj.kind == objkind.LIST:
+        return len(obj.value.items)
+    return len(obj.value)
+
+# a fatia [begin, end) de uma lista, sem copiar os elementos
+def _list_slice(obj, begin, end):
+    view = obj.live_view()
+    if view != None:
+        view = _List_View(view.source, view.begin + begin, view.begin + end)
+    else:
+        store = obj.value
+        if store.source == None:
+            store.source = _Slice_Source(store)
+        view = _List_View(store.source, begin, end)
+    out = _Py_Object(objkind.LIST, view, True)
+    out.view = view
+    return out
     
 def _eval_expr(ctx, node):
-    if node.kind == nodekind.BIN_OPERATOR:
-        return _eval_bin_operator(ctx, node)
-    elif node.kind == nodekind.UNA_OPERATOR:
-        return _eval_una_operator(ctx, node)
-    elif node.kind == nodekind.TERMINAL:
-        return _eval_terminal(ctx, node)
-    elif node.kind == nodekind.DICT:
-        return _eval_dict(ctx, node)
-    elif node.kind == nodekind.LIST:
-        return _eval_list(ctx, node)
-    elif node.kind == nodekind.CALL:
-        return _eval_call(ctx, node)
-    elif node.kind == nodekind.INDEX:
-        return _eval_index(ctx, node)
-    elif node.kind == nodekind.FIELD_ACCESS:
-        return _eval_field_access(ctx, node)
-    elif node.kind == nodekind.SLICE:
-        return _eval_slice(ctx, node)
-    else:
-        err = ctx.error("invalid expression", node)
-        return Result(None, err)
+    return _expr_table[node.kind](ctx, node)
+
+def _eval_constant(ctx, node):
+    return node.constant
+
+def _invalid_expr(ctx, node):
+    return ctx.fail("invalid expression", node)
 
 def _eval_import(ctx, node):
     idlist = node.leaves[0]
@@ -804,12 +1836,11 @@ def _eval_import(ctx, node):
 
         mod = ctx.get_mod(name)
         if mod == None:
-            res = _eval_module(ctx, name)
-            if res.failed():
-                if res.error.range == None:
-                    res.error.range = leaf.range.copy()
-                return res.error
-            mod = res.value
+            mod = _eval_module(ctx, name)
+            if mod == None:
+                if ctx.err.range == None:
+                    ctx.err.range = leaf.range.copy()
+                return ctx.err
             obj = _Py_Object(objkind.MODULE, mod, False)
             ctx.add_symbol(name, obj)
             ctx.set_mod(name, mod)
@@ -826,20 +1857,19 @@ def _eval_from(ctx, node):
     name = id.value.text
     mod = ctx.get_mod(name)
     if mod == None:
-        res = _eval_module(ctx, name)
-        if res.failed():
-            if res.error.range == None:
-                res.error.range = node.range.copy()
-            return res.error
-        mod = res.value
+        mod = _eval_module(ctx, name)
+        if mod == None:
+            if ctx.err.range == None:
+                ctx.err.range = node.range.copy()
+            return ctx.err
+        ctx.set_mod(name, mod)
 
     i = 0
     while i < len(idlist.leaves):
         leaf = idlist.leaves[i]
         name = leaf.value.text
         if mod.scope.contains(name):
-            res = mod.scope.retrieve(name)
-            cpy = res.value.copy()
+            cpy = mod.scope.retrieve(name).copy()
             cpy.mutable = False
             ctx.add_symbol(name, cpy)
         else:
@@ -863,11 +1893,14 @@ def _eval_func(ctx, node):
     block = node.leaves[2]
 
     name = id.value.text
-    arg_names = {}
+    arg_names = []
     if args != None:
         arg_names = _extract_names(args.leaves)
 
     func = _User_Function(name, arg_names, block, ctx.curr_scope())
+    func.layout = node.layout
+    if ctx.inline:
+        func.inline = node.inline
     obj = _Py_Object(objkind.USER_FUNCTION, func, False)
     ctx.add_symbol(name, obj)
     return None
@@ -876,78 +1909,86 @@ def _eval_lhs_index(ctx, lhs):
     list = lhs.leaves[1]
     index_expr = lhs.leaves[0]
 
-    res = _eval_expr(ctx, list)
-    if res.failed():
-        return res
-    obj = res.value
+    obj = _eval_expr(ctx, list)
+    if obj == None:
+        return None
 
     if not obj.mutable:
-        err = ctx.error("object is not mutable", list)
-        return Result(None, err)
+        return ctx.fail("object is not mutable", list)
 
-    res = _eval_expr(ctx, index_expr)
-    if res.failed():
-        return res
-    index_val = res.value
+    index_val = _eval_expr(ctx, index_expr)
+    if index_val == None:
+        return None
+    return _lhs_index_obj(ctx, lhs, obj, index_val)
 
+def _lhs_index_obj(ctx, lhs, obj, index_val):
+    index_expr = lhs.leaves[0]
     out = None
     if obj.is_kind(objkind.DICT):
-        if not index_val.value in obj.value:
+        if not (index_val.value in obj.value):
             obj.value[index_val.value] = _Py_Object(objkind.NONE, None, True)
         out = obj.value[index_val.value]
     elif obj.is_kind(objkind.LIST) and index_val.is_kind(objkind.NUM):
-        if index_val.value >= 0 and index_val.value < len(obj.value):
-            out = obj.value[index_val.value]
-        else:
-            err = ctx.error("index out of range", index_expr)
-            return Result(None, err)
+        out = _list_item(obj, index_val.value)
+        if out == None:
+            return ctx.fail("index out of range", index_expr)
     else:
-        err = ctx.error("invalid indexing expression", lhs)
-        return Result(None, err)
+        return ctx.fail("invalid indexing expression", lhs)
 
     if not out.mutable:
-        err = ctx.error("object is not mutable", lhs)
-        return Result(None, err)
+        return ctx.fail("object is not mutable", lhs)
 
-    return Result(out, None)
+    return out
 
 def _eval_lhs_field_access(ctx, lhs):
     op = lhs.leaves[1]
     field = lhs.leaves[0]
 
     if field.kind != nodekind.TERMINAL or field.value.kind != lexkind.ID:
-        err = ctx.error("field must be an identifier", field)
-        return Result(None, err)
+        return ctx.fail("field must be an identifier", field)
 
-    res = _eval_expr(ctx, op)
-    if res.failed():
-        return res
-    obj = res.value
+    obj = _eval_expr(ctx, op)
+    if obj == None:
+        return None
+    return _lhs_field_obj(ctx, lhs, obj)
+
+def _lhs_field_obj(ctx, lhs, obj):
+    if obj.kind == objkind.USER_OBJECT:
+        cache = lhs.cache
+        inst = obj.value
+        if cache != None and cache.shape == inst.shape:
+            if cache.next != None:
+                inst.shape = cache.next
+                inst.slots += [_Py_Object(objkind.NONE, None, True)]
+            return inst.slots[cache.slot]
 
+    op = lhs.leaves[1]
+    field = lhs.leaves[0]
     if obj.is_kinds([objkind.STR, objkind.DICT, objkind.NUM,
                      objkind.LIST, objkind.USER_FUNCTION,
                      objkind.BUILTIN_FUNC]):
-        err = ctx.error("object has no properties", op)
-        return Result(None, err)
+        return ctx.fail("object has no properties", op)
 
     if obj.is_kinds([objkind.MODULE]):
-        err = ctx.error("object is not mutable", lhs)
-        return Result(None, err)
+        return ctx.fail("object is not mutable", lhs)
 
     if obj.is_kind(objkind.USER_OBJECT):
         name = field.value.text
-        if name in obj.value.methods:
-            err = ctx.error("methods are not mutable", field)
-            return Result(None, err)
-        elif name in obj.value.properties:
-            obj = obj.value.get_attr(name).value
+        inst = obj.value
+        if name in inst.methods:
+            return ctx.fail("methods are not mutable", field)
+        elif name in inst.shape.names:
+            slot = inst.shape.names[name]
+            lhs.cache = _Inline_Cache(inst.shape, slot, None)
         else:
-            obj = obj.value.create_attr(name)
-        return Result(obj, None)
+            shape = inst.shape
+            slot = len(inst.slots)
+            inst.create_attr(name)
+            lhs.cache = _Inline_Cache(shape, slot, inst.shape)
+        return inst.slots[slot]
     else:
         msg = "object has invalid type: " + objkind.to_str(obj.kind)
-        err = ctx.error(msg, op)
-        return Result(None, err)
+        return ctx.fail(msg, op)
 
 # O lado esquerdo deve obedecer uma semantica mais estrita que o direito,
 # por necessitar ter um objeto atribuivel.
@@ -955,39 +1996,44 @@ def _eval_lhs_field_access(ctx, lhs):
 # referencia, pode ser atribuido futuramente.
 def _eval_lhs(ctx, lhs):
     if lhs.kind == nodekind.TERMINAL and lhs.value.kind == lexkind.ID:
-        name = lhs.value.text
-        if not ctx.contains_symbol(name):
-            newnone = _Py_Object(objkind.NONE, None, True)
-            ctx.add_symbol(name, newnone)
-        res = ctx.retrieve(name)
-        if res.failed():
-            err = ctx.error("name not found", lhs)
-            return Result(None, err)
-        obj = res.value
-        return Result(obj, None)
+        return _lhs_name(ctx, lhs)
     elif lhs.kind == nodekind.INDEX:
         return _eval_lhs_index(ctx, lhs)
     elif lhs.kind == nodekind.FIELD_ACCESS:
         return _eval_lhs_field_access(ctx, lhs)
     else:
-        err = ctx.error("expression is not assignable", lhs)
-        return Result(None, err)
+        return ctx.fail("expression is not assignable", lhs)
+
+def _lhs_name(ctx, lhs):
+    addr = lhs.address
+    # nomes atribuidos dentro de funcoes sempre sao locais
+    if addr.slot >= 0 and addr.depth == 0:
+        slots = ctx.curr_scope().slots
+        if slots[addr.slot] == None:
+            slots[addr.slot] = _Py_Object(objkind.NONE, None, True)
+        return slots[addr.slot]
+    name = lhs.value.text
+    if not ctx.contains_symbol(name):
+        newnone = _Py_Object(objkind.NONE, None, True)
+        ctx.add_symbol(name, newnone)
+    obj = ctx.retrieve(name)
+    if obj == None:
+        return ctx.fail("name not found", lhs)
+    return obj
 
 def _eval_assign(ctx, node):
     lhs = node.leaves[0]
     rhs = node.leaves[1]
 
-    res = _eval_lhs(ctx, lhs)
-    if res.failed():
-        return res.error
-    obj = res.value
+    obj = _eval_lhs(ctx, lhs)
+    if obj == None:
+        return ctx.err
 
-    res = _eval_expr(ctx, rhs)
-    if res.failed():
-        return res.error
-    exp = res.value
+    exp = _eval_expr(ctx, rhs)
+    if exp == None:
+        return ctx.err
 
-    obj.set(exp.kind, exp.value)
+    obj.assign(exp)
     return None
 
 def _extract_method_args(arg_list):
@@ -1009,7 +2055,11 @@ def _eval_method(ctx, node):
     name = id.value.text
     arg_names = _extract_method_args(args.leaves)
 
-    return _User_Function(name, arg_names, block, ctx.curr_scope())
+    func = _User_Function(name, arg_names, block, ctx.curr_scope())
+    func.layout = node.layout
+    if ctx.inline:
+        func.inline = node.inline
+    return func
 
 def _eval_declare_class(ctx, node):
     id = node.leaves[0]
@@ -1032,16 +2082,19 @@ def _eval_declare_class(ctx, node):
 def _eval_return(ctx, node):
     expr = node.leaves[0]
 
-    res = _eval_expr(ctx, expr)
-    if res.failed():
-        return res.error
-    obj = res.value
+    obj = _eval_expr(ctx, expr)
+    if obj == None:
+        return ctx.err
+    return _return_obj(ctx, node, obj)
 
+# retorna _returned, ou o erro
+def _return_obj(ctx, node, obj):
     err = ctx.set_return(obj)
-    if err != None and err.range != None:
-        err.range = node.range.copy()
-
-    return err
+    if err != None:
+        if err.range != None:
+            err.range = node.range.copy()
+        return err
+    return _returned
 
 def _check_unif_aug_ass_types(ctx, node, left_obj, right_obj, typelist):
     if left_obj.kind != right_obj.kind:
@@ -1055,22 +2108,23 @@ def _eval_aug_assign(ctx, node):
     lhs_expr = node.leaves[0]
     rhs_expr = node.leaves[1]
 
-    res = _eval_lhs(ctx, lhs_expr)
-    if res.failed():
-        return res.error
-    lhs_obj = res.value
+    lhs_obj = _eval_lhs(ctx, lhs_expr)
+    if lhs_obj == None:
+        return ctx.err
 
-    res = _eval_expr(ctx, rhs_expr)
-    if res.failed():
-        return res.error
-    rhs_obj = res.value
+    rhs_obj = _eval_expr(ctx, rhs_expr)
+    if rhs_obj == None:
+        return ctx.err
+    return _aug_assign_objs(ctx, node, lhs_obj, rhs_obj)
 
+def _aug_assign_objs(ctx, node, lhs_obj, rhs_obj):
+    rhs_expr = node.leaves[1]
     if node.has_lexkind(lexkind.ASSIGN_PLUS): # list, num, str
         kinds = [objkind.LIST, objkind.NUM, objkind.STR]
         err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, kinds)
         if err != None:
             return err
-        lhs_obj.set(lhs_obj.kind, lhs_obj.value + rhs_obj.value)
+        _plus_assign(node, lhs_obj, rhs_obj)
     else:
         kinds = [objkind.NUM]
         err = _check_unif_aug_ass_types(ctx, node, lhs_obj, rhs_obj, kinds)
@@ -1092,41 +2146,68 @@ def _eval_aug_assign(ctx, node):
         else:
             return ctx.error("invalid lexkind for augmented assign", node)
 
+# 'lhs += rhs' com tipos ja conferidos.
+# Listas crescem no lugar, como no Python: 'b = a' faz as duas celulas
+# apontarem para a mesma lista (ver _Py_Object.set), e 'a += [x]' tambem
+# aparece em 'b'. Os elementos de 'rhs' sao copiados, como em 'a + b'.
+# Strings em variaveis e campos acumulam os pedacos, que sao
+# concatenados quando a variavel ou o campo eh lido (ver _load_name e
+# _field_obj). Elementos de listas e dicionarios, e argumentos que podem
+# ser um desses elementos, sao concatenados na hora
+def _plus_assign(node, lhs_obj, rhs_obj):
+    lhs = node.leaves[0]
+    if lhs_obj.kind == objkind.LIST:
+        lhs_obj.list_store().extend(rhs_obj, _fresh_list(node.leaves[1]))
+        return None
+    if lhs_obj.kind == objkind.STR:
+        if lhs.kind == nodekind.FIELD_ACCESS:
+            lhs_obj.append_str(rhs_obj.value)
+            return None
+        if lhs.kind == nodekind.TERMINAL and not lhs.address.arg:
+            lhs_obj.append_str(rhs_obj.value)
+            return None
+    lhs_obj.set(lhs_obj.kind, lhs_obj.value + rhs_obj.value)
+
 def _eval_do(ctx, node):
+    if node.hoisted != None:
+        _clear_hoisted(ctx, node)
     expr = node.leaves[0]
     block = node.leaves[1]
 
     loop = True
     while loop:
-        err = _eval_block(ctx, block)
-        if err != None:
-            return err
+        out = _eval_block(ctx, block)
+        if out != None:
+            return out
 
-        if ctx.is_returning:
-            loop = False
-        else:
-            res = _eval_expr(ctx, expr)
-            if res.failed():
-                return res.error
-            obj = res.value
+        obj = _eval_expr(ctx, expr)
+        if obj == None:
+            return ctx.err
 
-            if not obj.is_kind(objkind.BOOL):
-                err = ctx.error("expression is not a boolean", expr)
-                return err
-            loop = obj.value
+        if not obj.is_kind(objkind.BOOL):
+            err = ctx.error("expression is not a boolean", expr)
+            return err
+        loop = obj.value
     
     return None
 
 def _eval_while(ctx, node):
+    if node.hoisted != None:
+        _clear_hoisted(ctx, node)
+    loop = _counted_loop_of(node)
+    if loop != _not_counted:
+        return _eval_counted(ctx, node, loop)
+    return _while_loop(ctx, node)
+
+def _while_loop(ctx, node):
     expr = node.leaves[0]
     block = node.leaves[1]
 
     loop = True
     while loop:
-        res = _eval_expr(ctx, expr)
-        if res.failed():
-            return res.error
-        obj = res.value
+        obj = _eval_expr(ctx, expr)
+        if obj == None:
+            return ctx.err
 
         if not obj.is_kind(objkind.BOOL):
             err = ctx.error("expression is not a boolean", expr)
@@ -1134,30 +2215,165 @@ def _eval_while(ctx, node):
         cond = obj.value
 
         if cond:
-            err = _eval_block(ctx, block)
-            if err != None:
-                return err
-            if ctx.is_returning:
-                loop = False
+            out = _eval_block(ctx, block)
+            if out != None:
+                return out
         else:
             loop = False
 
     
     return None
 
+# superinstrucao para o laco contado 'while i < len(xs): ...; i += k',
+# com 'i' e 'xs' nomes e 'k' uma constante numerica. A condicao e o
+# incremento sao executados direto nas celulas de 'i', 'xs' e 'len', sem
+# passar por _eval_expr, pela chamada de 'len' e por _eval_aug_assign.
+# O padrao eh reconhecido uma vez por no (node.cache) e exige que o
+# corpo nao ligue 'i' nem 'len' de novo. As celulas de um nome nao
+# mudam durante o laco, entao alteracoes feitas pelo corpo, ate por
+# referencia ou em 'xs', aparecem nos valores lidos. Se 'i' deixar de
+# ser um numero, 'xs' de ser uma lista ou string, ou 'len' de ser o
+# builtin, o laco continua em _while_loop, que produz os mesmos erros
+class _Counted_Loop:
+    def __init__(self, counter, bound, length, step):
+        # nos TERMINAL de 'i', 'xs' e 'len'
+        self.counter = counter
+        self.bound = bound
+        self.length = length
+        self.step = step
+
+_not_counted = _Counted_Loop(None, None, None, 0)
+
+_sized_kinds = [objkind.LIST, objkind.STR]
+
+def _is_name(node):
+    return node.kind == nodekind.TERMINAL and node.has_lexkind(lexkind.ID)
+
+# o padrao fica em node.cache, compartilhado com compiler.py
+def _counted_loop_of(node):
+    if node.cache == None:
+        node.cache = _counted_loop(node)
+    return node.cache
+
+def _counted_loop(node):
+    expr = node.leaves[0]
+    block = node.leaves[1]
+    if expr.kind != nodekind.BIN_OPERATOR or not expr.has_lexkind(lexkind.LESS):
+        return _not_counted
+    counter = expr.leaves[0]
+    call = expr.leaves[1]
+    # 'len(xs)' pode ter saido do laco (ver licm.py)
+    if call.kind == nodekind.HOISTED:
+        call = call.leaves[0]
+    if not _is_name(counter) or call.kind != nodekind.CALL:
+        return _not_counted
+    args = call.leaves[0]
+    length = call.leaves[1]
+    if not _is_name(length) or args == None or len(args.leaves) != 1:
+        return _not_counted
+    bound = args.leaves[0]
+    if not _is_name(bound):
+        return _not_counted
+
+    last = len(block.leaves) - 1
+    if last < 0:
+        return _not_counted
+    incr = block.leaves[last]
+    if incr.kind != nodekind.AUGMENTED_ASSIGN or not incr.has_lexkind(lexkind.ASSIGN_PLUS):
+        return _not_counted
+    lhs = incr.leaves[0]
+    rhs = incr.leaves[1]
+    if not _is_name(lhs) or lhs.value.text != counter.value.text:
+        return _not_counted
+    if rhs.kind != nodekind.CONSTANT or rhs.constant.kind != objkind.NUM:
+        return _not_counted
+
+    names = {}
+    names[counter.value.text] = True
+    names[length.value.text] = True
+    i = 0
+    while i < last:
+        if _binds_any(block.leaves[i], names):
+            return _not_counted
+        i += 1
+    return _Counted_Loop(counter, bound, length, rhs.constant.value)
+
+# se 'node' pode ligar algum nome de 'names' no escopo atual. Corpos
+# de funcoes tem escopo proprio e nao sao visitados, mas argumentos
+# sao passados por referencia, entao um nome passado numa chamada
+# pode ser ligado pela funcao chamada (como licm._passed)
+def _binds_any(node, names):
+    if node == None:
+        return False
+    if node.kind == nodekind.ASSIGN or node.kind == nodekind.AUGMENTED_ASSIGN:
+        lhs = node.leaves[0]
+        if _is_name(lhs) and lhs.value.text in names:
+            return True
+    elif node.kind == nodekind.CALL and node.leaves[0] != None:
+        args = node.leaves[0].leaves
+        i = 0
+        while i < len(args):
+            if _is_name(args[i]) and args[i].value.text in names:
+                return True
+            i += 1
+    elif node.kind == nodekind.FUNC or node.kind == nodekind.CLASS:
+        return node.leaves[0].value.text in names
+    elif node.kind == nodekind.IMPORT or node.kind == nodekind.FROM_IMPORT:
+        return True
+    i = 0
+    while i < len(node.leaves):
+        if _binds_any(node.leaves[i], names):
+            return True
+        i += 1
+    return False
+
+def _eval_counted(ctx, node, loop):
+    counter = _load_name(ctx, loop.counter)
+    bound = _load_name(ctx, loop.bound)
+    length = _load_name(ctx, loop.length)
+    builtin = ctx.builtin_scope.retrieve("len")
+    if counter == None or bound == None or length == None or builtin == None:
+        return _while_loop(ctx, node)
+
+    block = node.leaves[1]
+    last = len(block.leaves) - 1
+    step = loop.step
+    while True:
+        if counter.kind != objkind.NUM or not bound.is_kinds(_sized_kinds):
+            return _while_loop(ctx, node)
+        if length.kind != objkind.BUILTIN_FUNC or length.value != builtin.value:
+            return _while_loop(ctx, node)
+        if bound.parts != None:
+            bound.flush()
+        if not (counter.value < _seq_len(bound)):
+            return None
+        i = 0
+        while i < last:
+            out = _eval_sttm(ctx, block.leaves[i])
+            if out != None:
+                return out
+            i += 1
+        if counter.kind != objkind.NUM:
+            # o contador mudou de tipo por um caminho que
+            # _counted_loop nao viu, o '+=' reporta o erro
+            out = _eval_aug_assign(ctx, block.leaves[last])
+            if out != None:
+                return out
+            return _while_loop(ctx, node)
+        counter.set(objkind.NUM, counter.value + step)
+
 def _eval_if(ctx, node):
     cond = node.leaves[0]
     block = node.leaves[1]
     elifs = node.leaves[2]
     _else = node.leaves[3]
 
-    res = _eval_expr(ctx, cond)
-    if res.failed():
-        return res.error
-    obj = res.value
+    obj = _eval_expr(ctx, cond)
+    if obj == None:
+        return ctx.err
 
     if not obj.is_kind(objkind.BOOL):
-        return ctx.error("condition expected to be boolean", expr)
+        return ctx.error("condition expected to be boolean", cond)
 
     if obj.value:
         return _eval_block(ctx, block)
@@ -1169,13 +2385,12 @@ def _eval_if(ctx, node):
             cond = _elif.leaves[0]
             block = _elif.leaves[1]
 
-            res = _eval_expr(ctx, cond)
-            if res.failed():
-                return res.error
-            obj = res.value
+            obj = _eval_expr(ctx, cond)
+            if obj == None:
+                return ctx.err
 
             if not obj.is_kind(objkind.BOOL):
-                return ctx.error("condition expected to be boolean", expr)
+                return ctx.error("condition expected to be boolean", cond)
 
             if obj.value:
                 return _eval_block(ctx, block)
@@ -1189,41 +2404,94 @@ def _eval_if(ctx, node):
 def _eval_sttm(ctx, node):
     if ctx.verbose:
         print("_eval_sttm")
-    if node.kind == nodekind.IMPORT:
-        return _eval_import(ctx, node)
-    elif node.kind == nodekind.FROM_IMPORT:
-        return _eval_from(ctx, node)
-    elif node.kind == nodekind.FUNC:
-        return _eval_func(ctx, node)
-    elif node.kind == nodekind.ASSIGN:
-        return _eval_assign(ctx, node)
-    elif node.kind == nodekind.AUGMENTED_ASSIGN:
-        return _eval_aug_assign(ctx, node)
-    elif node.kind == nodekind.WHILE:
-        return _eval_while(ctx, node)
-    elif node.kind == nodekind.DO:
-        return _eval_do(ctx, node)
-    elif node.kind == nodekind.IF:
-        return _eval_if(ctx, node)
-    elif node.kind == nodekind.RETURN:
-        return _eval_return(ctx, node)
-    elif node.kind == nodekind.CLASS:
-        return _eval_declare_class(ctx, node)
-    elif node.kind == nodekind.PASS:
-        pass
-    else:
-        res = _eval_expr(ctx, node)
-        return res.error
+    return _sttm_table[node.kind](ctx, node)
+
+# no HOISTED (ver licm.py): o valor fica num slot do escopo da
+# funcao, limpo por _clear_hoisted quando o laco comeca
+def _eval_hoisted(ctx, node):
+    slots = ctx.curr_scope().slots
+    obj = slots[node.address.slot]
+    if obj != None:
+        return obj
+    obj = _eval_expr(ctx, node.leaves[0])
+    if obj == None:
+        return None
+    slots[node.address.slot] = _hoisted_value(node, obj)
+    return obj
+
+# o que um no HOISTED guarda depois de avaliar 'obj'. Nomes, campos,
+# elementos e a lista de um 'in' sao guardados como estao, ja que
+# avaliar de novo daria a mesma celula. Um valor calculado pode ser
+# ligado por referencia a um argumento e alterado, entao so eh
+# guardado como objeto compartilhado, e listas ou dicionarios
+# calculados nao sao guardados (None)
+def _hoisted_value(node, obj):
+    if node.leaves[0].kind in _reference_kinds or obj.shared:
+        return obj
+    if obj.kind in _packed_kinds:
+        return _shared_obj(obj.kind, obj.value)
+    return None
+
+_reference_kinds = [
+    nodekind.TERMINAL, nodekind.FIELD_ACCESS, nodekind.INDEX, nodekind.LIST,
+]
+
+def _clear_hoisted(ctx, node):
+    slots = ctx.curr_scope().slots
+    i = 0
+    while i < len(node.hoisted):
+        slots[node.hoisted[i]] = None
+        i += 1
+
+def _eval_pass(ctx, node):
+    return None
+
+def _eval_expr_sttm(ctx, node):
+    if _eval_expr(ctx, node) == None:
+        return ctx.err
+    return None
+
+_expr_table = _kind_table(nodekind.COUNT, _invalid_expr, {
+    nodekind.CONSTANT: _eval_constant,
+    nodekind.BIN_OPERATOR: _eval_bin_operator,
+    nodekind.UNA_OPERATOR: _eval_una_operator,
+    nodekind.TERMINAL: _eval_terminal,
+    nodekind.DICT: _eval_dict,
+    nodekind.LIST: _eval_list,
+    nodekind.CALL: _eval_call,
+    nodekind.INDEX: _eval_index,
+    nodekind.FIELD_ACCESS: _eval_field_access,
+    nodekind.SLICE: _eval_slice,
+    nodekind.IN_CONSTANTS: _eval_in_constants,
+    nodekind.QUICK_BIN_OPERATOR: _eval_quick_bin,
+    nodekind.HOISTED: _eval_hoisted,
+})
+
+# qualquer no que nao seja um comando eh avaliado como expressao
+_sttm_table = _kind_table(nodekind.COUNT, _eval_expr_sttm, {
+    nodekind.IMPORT: _eval_import,
+    nodekind.FROM_IMPORT: _eval_from,
+    nodekind.FUNC: _eval_func,
+    nodekind.ASSIGN: _eval_assign,
+    nodekind.AUGMENTED_ASSIGN: _eval_aug_assign,
+    nodekind.WHILE: _eval_while,
+    nodekind.DO: _eval_do,
+    nodekind.IF: _eval_if,
+    nodekind.RETURN: _eval_return,
+    nodekind.TAIL_CALL: _eval_tail_call,
+    nodekind.CLASS: _eval_declare_class,
+    nodekind.PASS: _eval_pass,
+})
 
 def _eval_block(ctx, node):
     if ctx.verbose:
         print("_eval_block")
     i = 0
-    while i < len(node.leaves) and not ctx.is_returning:
+    while i < len(node.leaves):
         sttm = node.leaves[i]
-        err = _eval_sttm(ctx, sttm)
-        if err != None:
-            return err
+        out = _eval_sttm(ctx, sttm)
+        if out != None:
+            return out
         i += 1
     return None
 
@@ -1231,41 +2499,85 @@ def _eval_module(ctx, name):
     if ctx.verbose:
         print("_eval_module: " + name)
     if not (name in ctx.source_map):
-        err = ctx.blank_error("module '"+name+"' not found")
-        return Result(None, err)
+        return ctx.fail_with(ctx.blank_error("module '"+name+"' not found"))
     source = ctx.source_map[name]
 
     res = parse(name, source, False)
     if res.failed():
-        return Result(None, res.error)
+        return ctx.fail_with(res.error)
     n = res.value
     if n.kind != nodekind.BLOCK:
-        err = ctx.blank_error("expected root node to be a _block")
-        return Result(None, err)
+        return ctx.fail_with(ctx.blank_error("expected root node to be a _block"))
 
     n.compute_range()
+    optimize(n, _Constant_Pool())
+    resolve(n)
+    if ctx.licm:
+        hoist(n)
 
     s = _Scope(ctx.builtin_scope, scopekind.MODULE)
     s.set_scope_name(name)
     ctx.push_env(s)
     module = _Module(name, s)
 
-    err = _eval_block(ctx, n)
-    if err != None:
-        return Result(None, err)
+    out = ctx.engine.run_module(ctx, n)
+    if out != None and out != _returned:
+        return ctx.fail_with(out)
 
     ctx.pop_env()
-    return Result(module, None)
+    return module
+
+# motor padrao, interpreta a arvore sintatica diretamente
+class Tree_Walker:
+    def __init__(self):
+        self.name = "walker"
+
+    def run_function(self, ctx, func):
+        return _eval_block(ctx, func.block)
+
+    def run_module(self, ctx, block):
+        return _eval_block(ctx, block)
+
+    def run_inline(self, ctx, func):
+        return _eval_expr(ctx, func.inline)
+
+# opcoes de execucao usadas por evaluate_with
+class Options:
+    def __init__(self):
+        self.verbose = False
+        # qualquer objeto com os metodos run_function(ctx, func),
+        # run_module(ctx, block) e run_inline(ctx, func), ie,
+        # Tree_Walker, vm.VM ou closures.Closure_Compiler
+        self.engine = Tree_Walker()
+        # numero maximo de chamadas aninhadas antes do erro "stack overflow".
+        # Apenas a vm.VM executa as chamadas sem usar a pilha do Python,
+        # nos outros motores a recursao do Python pode estourar antes
+        self.stack_limit = 10000
+        # move subexpressoes invariantes para fora dos lacos (ver licm.py)
+        self.licm = True
+        # expande as chamadas de funcoes pequenas
+        # (ver _User_Function.enter_inline_with)
+        self.inline = True
 
 def evaluate(builtins, module_map, entry_name, verbose):
+    opts = Options()
+    opts.verbose = verbose
+    return evaluate_with(builtins, module_map, entry_name, opts)
+
+def evaluate_with(builtins, module_map, entry_name, opts):
     if not (entry_name in module_map):
         msg = "entry module not in module map"
         return Error("", msg, None)
 
     node = _Call_Node(None, builtins)
     ctx = _Context(module_map, node, builtins)
-    if verbose:
+    ctx.engine = opts.engine
+    ctx.stack_limit = opts.stack_limit
+    ctx.licm = opts.licm
+    ctx.inline = opts.inline
+    if opts.verbose:
         print("\nevaluate\n")
         ctx.toggle_verbose()
-    res = _eval_module(ctx, entry_name)
-    return res.error
+    if _eval_module(ctx, entry_name) == None:
+        return ctx.err
+    return None
@@ -1,3 +1,5 @@
+# os valores sao densos (0 ate COUNT-1), pois indexam diretamente as
+# tabelas de despacho do evaluator
 INVALID = -1
 
 NUM = 0
@@ -14,15 +16,15 @@ NONE = 9
 IF = 10
 ELIF = 11
 ELSE = 12
-DO = 50
+DO = 13
 WHILE = 14
 RETURN = 15
 DEF = 16
 CLASS = 17
 IMPORT = 18
 FROM = 19
-PASS = 101
-IN = 102
+PASS = 48
+IN = 49
 
 PLUS = 20
 MINUS = 21
@@ -58,6 +60,8 @@ DOT = 45
 NL = 46
 EOF = 47
 
+COUNT = 50
+
 
 
 def to_string(kind):
@@ -91,6 +95,8 @@ def to_string(kind):
         return "ELIF"
     elif kind == ELSE:
         return "ELSE"
+    elif kind == DO:
+        return "DO"
     elif kind == WHILE:
         return "WHILE"
     elif kind == RETURN:
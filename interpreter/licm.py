@@ -0,0 +1,279 @@
+import lexkind
+import nodekind
+from core import Node
+from resolver import Layout, Address, _collect_block
+
+# passo opcional (ver evaluator.Options.licm), executado depois de
+# resolve(): nos lacos WHILE e DO dentro de funcoes, subexpressoes
+# invariantes sao movidas para fora do laco. Cada uma vira um no
+# HOISTED com um slot extra no escopo da funcao. O slot eh limpo
+# quando o laco comeca (node.hoisted), e a expressao eh avaliada no
+# mesmo ponto de antes, na primeira vez que eh alcancada. Nas
+# iteracoes seguintes o valor guardado eh reusado (ver
+# evaluator._hoisted_value). Assim um laco que nao executa, ou uma
+# expressao que falha, se comportam exatamente como antes.
+#
+# A analise eh conservadora e olha so o corpo do laco:
+# - um nome eh invariante se o laco nao o liga de novo (atribuicao,
+#   def, class, import) nem o passa como argumento, ja que argumentos
+#   sao passados por referencia. Argumentos, globais e nomes de
+#   funcoes externas podem compartilhar a celula com outro nome, campo
+#   ou elemento, entao so sao invariantes se o laco nao chama funcoes
+#   nem atribui argumentos, campos ou elementos;
+# - campos, indexacoes e chamadas de builtins puros so sao
+#   invariantes se o laco nao chama nenhuma outra funcao, e campos
+#   tambem exigem que o laco nao atribua nem passe um campo de mesmo
+#   nome;
+# - indexacoes e builtins tambem exigem que o laco nao altere listas
+#   e dicionarios: atribuicao a elementos ou '+=' com algo que nao
+#   seja um numero ou string constante;
+# - listas literais so sao movidas quando sao o lado direito de um
+#   'in', que nao guarda nem altera a lista.
+def hoist(block):
+    globals = Layout()
+    _collect_block(globals, block)
+    _walk(globals.names, None, block)
+
+# builtins sem efeitos colaterais, que nao guardam os argumentos
+_pure_builtins = {
+    "len": True, "str": True, "int": True, "abs": True,
+    "find": True, "startswith": True,
+}
+
+# o que o corpo de um laco pode alterar
+class _Effects:
+    def __init__(self):
+        # nomes ligados de novo ou passados como argumento
+        self.names = {}
+        # campos atribuidos ou passados como argumento
+        self.fields = {}
+        # chama uma funcao que nao eh um builtin puro
+        self.calls = False
+        # liga de novo um nome cuja celula pode ser compartilhada
+        self.rebinds_args = False
+        # atribui ou passa algum campo
+        self.writes_fields = False
+        # atribui ou passa algum elemento de lista ou dicionario
+        self.writes_elements = False
+        # pode alterar o conteudo de listas e dicionarios
+        self.mutates = False
+
+class _Loop:
+    def __init__(self, globals, layout, node, effects):
+        self.globals = globals
+        self.layout = layout
+        self.node = node
+        self.effects = effects
+
+# 'layout' eh o da funcao atual, ou None no escopo do modulo
+def _walk(globals, layout, node):
+    if node == None:
+        return None
+    if node.kind == nodekind.FUNC:
+        _walk(globals, node.layout, node.leaves[2])
+        return None
+    if node.kind == nodekind.CLASS:
+        methods = node.leaves[1]
+        i = 0
+        while i < len(methods.leaves):
+            method = methods.leaves[i]
+            _walk(globals, method.layout, method.leaves[2])
+            i += 1
+        return None
+    if layout != None and (node.kind == nodekind.WHILE or node.kind == nodekind.DO):
+        effects = _Effects()
+        _effects(effects, globals, node.leaves[0])
+        _effects(effects, globals, node.leaves[1])
+        loop = _Loop(globals, layout, node, effects)
+        _hoist(loop, node.leaves[0])
+        _hoist(loop, node.leaves[1])
+    # lacos aninhados sao visitados depois do externo, entao uma
+    # expressao invariante nos dois sai do laco mais externo
+    i = 0
+    while i < len(node.leaves):
+        _walk(globals, layout, node.leaves[i])
+        i += 1
+
+def _is_pure_call(globals, call):
+    callee = call.leaves[1]
+    if callee.kind != nodekind.TERMINAL or not callee.has_lexkind(lexkind.ID):
+        return False
+    name = callee.value.text
+    # nomes locais ou globais do modulo escondem o builtin
+    if callee.address.slot >= 0 or name in globals:
+        return False
+    return name in _pure_builtins
+
+def _effects(effects, globals, node):
+    if node == None:
+        return None
+    kind = node.kind
+    if kind == nodekind.FUNC or kind == nodekind.CLASS:
+        effects.names[node.leaves[0].value.text] = True
+        return None
+    if kind == nodekind.IMPORT or kind == nodekind.FROM_IMPORT:
+        # importar executa o modulo e liga nomes
+        effects.calls = True
+        _bind_ids(effects, node.leaves[len(node.leaves)-1])
+        return None
+    if kind == nodekind.ASSIGN or kind == nodekind.AUGMENTED_ASSIGN:
+        _passed(effects, node.leaves[0])
+        rhs = node.leaves[1]
+        if kind == nodekind.AUGMENTED_ASSIGN and node.has_lexkind(lexkind.ASSIGN_PLUS):
+            if rhs.kind != nodekind.CONSTANT:
+                effects.mutates = True
+    elif kind == nodekind.CALL:
+        if not _is_pure_call(globals, node):
+            effects.calls = True
+            args = node.leaves[0]
+            if args != None:
+                i = 0
+                while i < len(args.leaves):
+                    _passed(effects, args.leaves[i])
+                    i += 1
+    elif kind == nodekind.FIELD_ACCESS:
+        # leaves[0] eh o nome do campo
+        _effects(effects, globals, node.leaves[1])
+        return None
+    i = 0
+    while i < len(node.leaves):
+        _effects(effects, globals, node.leaves[i])
+        i += 1
+
+# 'node' eh atribuido ou passado por referencia
+def _passed(effects, node):
+    if node.kind == nodekind.TERMINAL:
+        effects.names[node.value.text] = True
+        if not _is_plain_local(node):
+            effects.rebinds_args = True
+    elif node.kind == nodekind.FIELD_ACCESS:
+        effects.fields[node.leaves[0].value.text] = True
+        effects.writes_fields = True
+    elif node.kind == nodekind.INDEX:
+        effects.writes_elements = True
+        effects.mutates = True
+
+# local da funcao atual com celula propria, que nao pode
+# ser a celula de um nome, campo ou elemento de outro escopo
+def _is_plain_local(node):
+    addr = node.address
+    return addr.depth == 0 and addr.slot >= 0 and not addr.arg
+
+def _bind_ids(effects, idlist):
+    i = 0
+    while i < len(idlist.leaves):
+        effects.names[idlist.leaves[i].value.text] = True
+        i += 1
+
+def _invariant(loop, node):
+    effects = loop.effects
+    kind = node.kind
+    if kind == nodekind.CONSTANT or kind == nodekind.HOISTED:
+        return True
+    if kind == nodekind.TERMINAL:
+        if not _is_plain_local(node) and _writes_cells(effects):
+            return False
+        return not (node.value.text in effects.names)
+    if kind == nodekind.FIELD_ACCESS:
+        if effects.calls or effects.rebinds_args:
+            return False
+        if node.leaves[0].value.text in effects.fields:
+            return False
+        return _invariant(loop, node.leaves[1])
+    if kind == nodekind.INDEX:
+        if effects.calls or effects.mutates or effects.rebinds_args:
+            return False
+        return _invariant(loop, node.leaves[0]) and _invariant(loop, node.leaves[1])
+    if kind == nodekind.CALL:
+        if effects.calls or effects.mutates or not _is_pure_call(loop.globals, node):
+            return False
+        return _invariant_list(loop, node.leaves[0])
+    if kind == nodekind.BIN_OPERATOR:
+        return _invariant(loop, node.leaves[0]) and _invariant(loop, node.leaves[1])
+    if kind == nodekind.UNA_OPERATOR or kind == nodekind.IN_CONSTANTS:
+        return _invariant(loop, node.leaves[0])
+    # listas, dicionarios e fatias criam um objeto novo a cada avaliacao
+    return False
+
+def _writes_cells(effects):
+    if effects.calls or effects.rebinds_args:
+        return True
+    return effects.writes_fields or effects.writes_elements
+
+def _invariant_list(loop, exprlist):
+    if exprlist == None:
+        return True
+    i = 0
+    while i < len(exprlist.leaves):
+        if not _invariant(loop, exprlist.leaves[i]):
+            return False
+        i += 1
+    return True
+
+# vale a pena guardar o valor, ie, nao eh so um nome ou constante
+_hoistable_kinds = [
+    nodekind.FIELD_ACCESS, nodekind.INDEX, nodekind.CALL,
+    nodekind.BIN_OPERATOR, nodekind.UNA_OPERATOR, nodekind.IN_CONSTANTS,
+]
+
+def _hoist(loop, node):
+    if node == None:
+        return None
+    kind = node.kind
+    if kind in _hoistable_kinds and _invariant(loop, node):
+        _make_hoisted(loop, node)
+        return None
+    if kind == nodekind.ASSIGN or kind == nodekind.AUGMENTED_ASSIGN:
+        # o lado esquerdo nao eh uma expressao
+        _hoist(loop, node.leaves[1])
+    elif kind == nodekind.FUNC or kind == nodekind.CLASS:
+        pass
+    elif kind == nodekind.TAIL_CALL:
+        _hoist_call(loop, node.leaves[0])
+    elif kind == nodekind.CALL:
+        _hoist_call(loop, node)
+    elif kind == nodekind.FIELD_ACCESS:
+        _hoist(loop, node.leaves[1])
+    elif kind == nodekind.BIN_OPERATOR and node.has_lexkind(lexkind.IN):
+        _hoist(loop, node.leaves[0])
+        right = node.leaves[1]
+        if right.kind == nodekind.LIST and _invariant_list(loop, right.leaves[0]):
+            _make_hoisted(loop, right)
+        else:
+            _hoist(loop, right)
+    elif kind == nodekind.IN_CONSTANTS:
+        _hoist(loop, node.leaves[0])
+    else:
+        i = 0
+        while i < len(node.leaves):
+            _hoist(loop, node.leaves[i])
+            i += 1
+
+# a funcao chamada continua no lugar: 'obj.metodo(...)' depende
+# do FIELD_ACCESS para chamar o metodo
+def _hoist_call(loop, call):
+    _hoist(loop, call.leaves[0])
+    callee = call.leaves[1]
+    if callee.kind == nodekind.FIELD_ACCESS:
+        _hoist(loop, callee.leaves[1])
+
+# transforma 'node' no lugar em HOISTED, com uma copia do no
+# original como unica folha, como optimizer._make_constant
+def _make_hoisted(loop, node):
+    inner = Node(node.value, node.kind)
+    inner.leaves = node.leaves
+    inner.range = node.range
+    inner.address = node.address
+    inner.constant = node.constant
+
+    name = "$" + str(loop.layout.size)
+    loop.layout.add(name)
+    slot = loop.layout.names[name]
+    if loop.node.hoisted == None:
+        loop.node.hoisted = []
+    loop.node.hoisted += [slot]
+
+    node.kind = nodekind.HOISTED
+    node.leaves = [inner]
+    node.address = Address(0, slot, name)
+    node.constant = None
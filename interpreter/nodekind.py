@@ -1,3 +1,5 @@
+# os valores sao densos (0 ate COUNT-1), pois indexam diretamente as
+# tabelas de despacho do evaluator
 INVALID = -1
 TERMINAL = 0        # None
 BLOCK = 1           # [sttm_1, sttm_2, ...]
@@ -7,7 +9,7 @@ ARG_LIST = 4        # [arg_1, arg_2, ...]
 KEY_VALUE_LIST = 5  # [kv_1, kv_2, ...]
 FROM_IMPORT = 6     # [id, idlist]
 IMPORT = 7          # [id_list]
-DO = 50             # [expr, block]
+DO = 8              # [expr, block]
 WHILE = 9           # [expr, block]
 IF = 10             # [exp, block, elifs, else]
 ELIF = 11           # [exp, block]
@@ -30,6 +32,21 @@ UNA_OPERATOR = 29   # [operand]
 RETURN = 30         # [expr]
 PASS = 31
 
+# criados por optimizer.py
+CONSTANT = 32       # None, node.constant guarda o objeto
+IN_CONSTANTS = 33   # [expr, list], node.constant guarda os valores da lista
+
+# criados por resolver.py
+TAIL_CALL = 34      # [call], 'return f(...)' dentro de uma funcao
+
+# criados pelo evaluator durante a execucao
+QUICK_BIN_OPERATOR = 35 # [left_op, right_op], node.cache guarda o _Quick_Bin
+
+# criados por licm.py
+HOISTED = 36        # [expr], node.address eh o slot que guarda o valor
+
+COUNT = 37
+
 def to_str(kind):
     if kind == INVALID: 
         return "INVALID"
@@ -49,6 +66,8 @@ def to_str(kind):
         return "FROM_IMPORT"
     elif kind == IMPORT: 
         return "IMPORT"
+    elif kind == DO:
+        return "DO"
     elif kind == WHILE: 
         return "WHILE"
     elif kind == IF: 
@@ -89,5 +108,17 @@ def to_str(kind):
         return "ELIF_LIST"
     elif kind == RETURN:
         return "RETURN"
+    elif kind == PASS:
+        return "PASS"
+    elif kind == CONSTANT:
+        return "CONSTANT"
+    elif kind == IN_CONSTANTS:
+        return "IN_CONSTANTS"
+    elif kind == TAIL_CALL:
+        return "TAIL_CALL"
+    elif kind == QUICK_BIN_OPERATOR:
+        return "QUICK_BIN_OPERATOR"
+    elif kind == HOISTED:
+        return "HOISTED"
     else:
         return "???"
@@ -0,0 +1,189 @@
+INVALID = -1
+
+# empilham um objeto
+NAME = 0          # node: terminal com o nome
+LOAD_NUM = 1      # arg: valor inteiro
+LOAD_STR = 2      # arg: string
+LOAD_BOOL = 3     # arg: True ou False
+LOAD_NONE = 4
+
+# operadores
+BINARY = 5        # node: operador binario
+UNARY = 6         # node: operador unario
+AND_TEST = 7      # arg: destino do curto-circuito
+AND_END = 8
+OR_TEST = 9       # arg: destino do curto-circuito
+OR_END = 10
+
+# sufixos
+CALL = 11         # arg: numero de argumentos, node: chamada
+INDEX = 12        # node: indexacao
+SLICE = 13        # node: fatiamento
+FIELD = 14        # node: acesso a campo
+
+# literais compostos
+NEW_LIST = 15
+LIST_ADD = 16      # arg: True se o item eh um objeto novo
+NEW_DICT = 17
+DICT_ADD = 18     # node: expressao da chave
+
+# lado esquerdo de atribuicoes
+LHS_NAME = 19     # node: terminal com o nome
+CHECK_MUTABLE = 20 # node: expressao indexada
+LHS_INDEX = 21    # node: indexacao
+LHS_FIELD = 22    # node: acesso a campo
+ASSIGN = 23
+AUG_ASSIGN = 24   # node: atribuicao aumentada
+
+# controle de fluxo
+POP = 25
+JUMP = 26         # arg: destino
+IF_TEST = 27      # arg: destino se falso, node: condicao
+WHILE_TEST = 28   # arg: destino se falso, node: condicao
+DO_TEST = 29      # arg: destino se verdadeiro, node: condicao
+RETURN = 30       # node: retorno
+
+# declaracoes, delegadas ao avaliador
+IMPORT = 31       # node: import
+FROM = 32         # node: from ... import
+FUNC = 33         # node: def
+CLASS = 34        # node: class
+
+ERROR = 35        # arg: mensagem, node: no ofensor
+
+# nos criados por optimizer.py
+LOAD_CONST = 36   # arg: objeto compartilhado
+IN_CONST = 37     # node: IN_CONSTANTS
+
+# chamadas 'obj.metodo(...)'
+LOAD_METHOD = 38  # node: acesso a campo
+CALL_METHOD = 39  # arg: numero de argumentos, node: chamada
+
+# 'return f(...)' dentro de funcoes, ver evaluator._tail_call
+TAIL_CALL = 40        # arg: numero de argumentos, node: chamada
+TAIL_CALL_METHOD = 41 # arg: numero de argumentos, node: chamada
+
+# fim do Code, volta para o chamador (ver vm._run)
+END = 42
+
+# nos criados por licm.py
+HOISTED_LOAD = 43  # arg: destino se o valor ja foi guardado, node: HOISTED
+HOISTED_STORE = 44 # node: HOISTED
+CLEAR_HOISTED = 45 # node: WHILE ou DO
+
+# fim do codigo de uma funcao pequena, que termina com o valor da
+# expressao no topo da pilha (ver compiler.compile_inline)
+INLINE_RETURN = 46 # node: expressao
+
+# BINARY especializado pelo tipo dos operandos, ver vm._run
+QUICK_BINARY = 47  # arg: _Quick_Bin, node: operador binario
+
+# laco contado 'while i < len(xs)', ver compiler._counted_while
+COUNTED_TEST = 48  # arg: destino se a condicao foi avaliada, node: WHILE
+COUNTED_STEP = 49  # arg: destino se o contador foi incrementado, node: WHILE
+
+def to_str(kind):
+    if kind == INVALID:
+        return "INVALID"
+    elif kind == NAME:
+        return "NAME"
+    elif kind == LOAD_NUM:
+        return "LOAD_NUM"
+    elif kind == LOAD_STR:
+        return "LOAD_STR"
+    elif kind == LOAD_BOOL:
+        return "LOAD_BOOL"
+    elif kind == LOAD_NONE:
+        return "LOAD_NONE"
+    elif kind == BINARY:
+        return "BINARY"
+    elif kind == UNARY:
+        return "UNARY"
+    elif kind == AND_TEST:
+        return "AND_TEST"
+    elif kind == AND_END:
+        return "AND_END"
+    elif kind == OR_TEST:
+        return "OR_TEST"
+    elif kind == OR_END:
+        return "OR_END"
+    elif kind == CALL:
+        return "CALL"
+    elif kind == INDEX:
+        return "INDEX"
+    elif kind == SLICE:
+        return "SLICE"
+    elif kind == FIELD:
+        return "FIELD"
+    elif kind == NEW_LIST:
+        return "NEW_LIST"
+    elif kind == LIST_ADD:
+        return "LIST_ADD"
+    elif kind == NEW_DICT:
+        return "NEW_DICT"
+    elif kind == DICT_ADD:
+        return "DICT_ADD"
+    elif kind == LHS_NAME:
+        return "LHS_NAME"
+    elif kind == CHECK_MUTABLE:
+        return "CHECK_MUTABLE"
+    elif kind == LHS_INDEX:
+        return "LHS_INDEX"
+    elif kind == LHS_FIELD:
+        return "LHS_FIELD"
+    elif kind == ASSIGN:
+        return "ASSIGN"
+    elif kind == AUG_ASSIGN:
+        return "AUG_ASSIGN"
+    elif kind == POP:
+        return "POP"
+    elif kind == JUMP:
+        return "JUMP"
+    elif kind == IF_TEST:
+        return "IF_TEST"
+    elif kind == WHILE_TEST:
+        return "WHILE_TEST"
+    elif kind == DO_TEST:
+        return "DO_TEST"
+    elif kind == RETURN:
+        return "RETURN"
+    elif kind == IMPORT:
+        return "IMPORT"
+    elif kind == FROM:
+        return "FROM"
+    elif kind == FUNC:
+        return "FUNC"
+    elif kind == CLASS:
+        return "CLASS"
+    elif kind == ERROR:
+        return "ERROR"
+    elif kind == LOAD_CONST:
+        return "LOAD_CONST"
+    elif kind == IN_CONST:
+        return "IN_CONST"
+    elif kind == LOAD_METHOD:
+        return "LOAD_METHOD"
+    elif kind == CALL_METHOD:
+        return "CALL_METHOD"
+    elif kind == TAIL_CALL:
+        return "TAIL_CALL"
+    elif kind == TAIL_CALL_METHOD:
+        return "TAIL_CALL_METHOD"
+    elif kind == END:
+        return "END"
+    elif kind == HOISTED_LOAD:
+        return "HOISTED_LOAD"
+    elif kind == HOISTED_STORE:
+        return "HOISTED_STORE"
+    elif kind == CLEAR_HOISTED:
+        return "CLEAR_HOISTED"
+    elif kind == INLINE_RETURN:
+        return "INLINE_RETURN"
+    elif kind == QUICK_BINARY:
+        return "QUICK_BINARY"
+    elif kind == COUNTED_TEST:
+        return "COUNTED_TEST"
+    elif kind == COUNTED_STEP:
+        return "COUNTED_STEP"
+    else:
+        return "???"
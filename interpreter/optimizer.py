@@ -0,0 +1,142 @@
+import lexkind
+import nodekind
+import objkind
+
+# passo executado entre parse() e a avaliacao de cada modulo.
+# Literais viram nos CONSTANT, cujo objeto vem do pool de constantes
+# do modulo e eh criado uma unica vez, expressoes com operandos
+# constantes sao dobradas e 'x in [c1, c2, ...]' vira uma busca
+# num dicionario (IN_CONSTANTS).
+# Os nos sao alterados no lugar, entao os ranges usados nos erros
+# continuam os mesmos. Uma expressao que falharia (divisao por zero,
+# tipos diferentes) nao eh dobrada, para o erro acontecer em tempo
+# de execucao como antes.
+#
+# 'pool' eh qualquer objeto com o metodo constant(kind, value),
+# ie, evaluator._Constant_Pool
+def optimize(block, pool):
+    _node(pool, block)
+
+def _node(pool, node):
+    if node == None:
+        return None
+    if node.kind == nodekind.TERMINAL:
+        _terminal(pool, node)
+        return None
+
+    i = 0
+    while i < len(node.leaves):
+        _node(pool, node.leaves[i])
+        i += 1
+
+    if node.kind == nodekind.BIN_OPERATOR:
+        _bin_operator(pool, node)
+    elif node.kind == nodekind.UNA_OPERATOR:
+        _una_operator(pool, node)
+
+def _terminal(pool, node):
+    if node.has_lexkind(lexkind.NUM):
+        _make_constant(node, pool.constant(objkind.NUM, int(node.value.text)))
+    elif node.has_lexkind(lexkind.STR):
+        _make_constant(node, pool.constant(objkind.STR, node.value.text))
+    elif node.has_lexkind(lexkind.TRUE):
+        _make_constant(node, pool.constant(objkind.BOOL, True))
+    elif node.has_lexkind(lexkind.FALSE):
+        _make_constant(node, pool.constant(objkind.BOOL, False))
+    elif node.has_lexkind(lexkind.NONE):
+        _make_constant(node, pool.constant(objkind.NONE, None))
+
+def _make_constant(node, obj):
+    node.kind = nodekind.CONSTANT
+    node.constant = obj
+    node.leaves = []
+
+def _is_constant(node):
+    return node.kind == nodekind.CONSTANT
+
+def _una_operator(pool, node):
+    operand = node.leaves[0]
+    if not _is_constant(operand):
+        return None
+    obj = operand.constant
+    if node.has_lexkind(lexkind.NOT) and obj.kind == objkind.BOOL:
+        _make_constant(node, pool.constant(objkind.BOOL, not obj.value))
+    elif node.has_lexkind(lexkind.MINUS) and obj.kind == objkind.NUM:
+        _make_constant(node, pool.constant(objkind.NUM, -obj.value))
+
+def _bin_operator(pool, node):
+    left = node.leaves[0]
+    right = node.leaves[1]
+    if node.has_lexkind(lexkind.IN):
+        if right.kind == nodekind.LIST:
+            _in_constants(node, right)
+        return None
+    if not _is_constant(left) or not _is_constant(right):
+        return None
+    a = left.constant
+    b = right.constant
+
+    if node.has_lexkinds([lexkind.EQUALS, lexkind.DIFF]):
+        out = a.kind == b.kind and a.value == b.value
+        if node.has_lexkind(lexkind.DIFF):
+            out = not out
+        _make_constant(node, pool.constant(objkind.BOOL, out))
+        return None
+
+    if a.kind != b.kind:
+        return None
+    if a.kind == objkind.NUM:
+        _fold_num(pool, node, a.value, b.value)
+    elif a.kind == objkind.STR:
+        _fold_str(pool, node, a.value, b.value)
+
+def _fold_num(pool, node, a, b):
+    if node.has_lexkind(lexkind.PLUS):
+        _make_constant(node, pool.constant(objkind.NUM, a + b))
+    elif node.has_lexkind(lexkind.MINUS):
+        _make_constant(node, pool.constant(objkind.NUM, a - b))
+    elif node.has_lexkind(lexkind.MULT):
+        _make_constant(node, pool.constant(objkind.NUM, a * b))
+    elif node.has_lexkind(lexkind.DIV):
+        if b != 0:
+            _make_constant(node, pool.constant(objkind.NUM, a / b))
+    elif node.has_lexkind(lexkind.REM):
+        if b != 0:
+            _make_constant(node, pool.constant(objkind.NUM, a % b))
+    else:
+        _fold_order(pool, node, a, b)
+
+def _fold_str(pool, node, a, b):
+    if node.has_lexkind(lexkind.PLUS):
+        _make_constant(node, pool.constant(objkind.STR, a + b))
+    else:
+        _fold_order(pool, node, a, b)
+
+def _fold_order(pool, node, a, b):
+    if node.has_lexkind(lexkind.LESS):
+        _make_constant(node, pool.constant(objkind.BOOL, a < b))
+    elif node.has_lexkind(lexkind.LESS_OR_EQUALS):
+        _make_constant(node, pool.constant(objkind.BOOL, a <= b))
+    elif node.has_lexkind(lexkind.GREATER):
+        _make_constant(node, pool.constant(objkind.BOOL, a > b))
+    elif node.has_lexkind(lexkind.GREATER_OR_EQUALS):
+        _make_constant(node, pool.constant(objkind.BOOL, a >= b))
+
+# 'x in [c1, c2, ...]' compara tipo e valor, como '==' (ver
+# evaluator._in), entao basta um dicionario tipo -> {valor: True}
+def _in_constants(node, list):
+    exprlist = list.leaves[0]
+    table = {}
+    if exprlist != None:
+        i = 0
+        while i < len(exprlist.leaves):
+            item = exprlist.leaves[i]
+            if not _is_constant(item):
+                return None
+            kind = item.constant.kind
+            if not (kind in table):
+                table[kind] = {}
+            table[kind][item.constant.value] = True
+            i += 1
+    node.kind = nodekind.IN_CONSTANTS
+    node.constant = table
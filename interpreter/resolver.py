@@ -0,0 +1,202 @@
+import lexkind
+import nodekind
+
+# esse arquivo atribui, antes da execucao, um endereco lexico
+# para cada nome usado num modulo. Cada funcao ganha um Layout
+# com os argumentos e todos os nomes
+# atribuidos no corpo, e em tempo de execucao o escopo da funcao
+# guarda esses nomes numa lista de tamanho fixo (ver _Scope).
+# Os escopos de modulo e de builtins continuam sendo dicionarios,
+# ja que outros modulos acessam os globais pelo nome.
+# Tambem marca como TAIL_CALL os 'return f(...)' dentro de funcoes,
+# executados sem crescer a pilha (ver evaluator._tail_call), e guarda
+# em node.inline a expressao das funcoes pequenas, expandidas nas
+# chamadas (ver evaluator._User_Function.enter_inline_with).
+
+# endereco de um nome: 'depth' eh quantos escopos devem ser subidos
+# a partir do escopo atual e 'slot' eh a posicao no escopo encontrado,
+# ou -1 se o escopo encontrado eh o do modulo (busca pelo nome)
+class Address:
+    def __init__(self, depth, slot, name):
+        self.depth = depth
+        self.slot = slot
+        self.name = name
+        # o nome eh um argumento, cuja celula pode ser a
+        # mesma de um elemento de lista ou dicionario
+        self.arg = False
+
+    def __str__(self):
+        return self.name + "@" + str(self.depth) + ":" + str(self.slot)
+
+# nomes com endereco fixo de um escopo
+class Layout:
+    def __init__(self):
+        # dicionario nome -> slot
+        self.names = {}
+        self.size = 0
+        # os argumentos ocupam os slots 0 a args-1
+        self.args = 0
+
+    def add(self, name):
+        if not (name in self.names):
+            self.names[name] = self.size
+            self.size += 1
+
+empty_layout = Layout()
+
+# escopo estatico, espelha os _Scope criados em tempo de execucao.
+# layout None representa o escopo do modulo
+class _Frame:
+    def __init__(self, parent, layout):
+        self.parent = parent
+        self.layout = layout
+
+def resolve(block):
+    _block(_Frame(None, None), block)
+
+def _address(frame, name):
+    curr = frame
+    depth = 0
+    while curr.layout != None:
+        if name in curr.layout.names:
+            addr = Address(depth, curr.layout.names[name], name)
+            addr.arg = addr.slot < curr.layout.args
+            return addr
+        curr = curr.parent
+        depth += 1
+    return Address(depth, -1, name)
+
+def _block(frame, node):
+    i = 0
+    while i < len(node.leaves):
+        _node(frame, node.leaves[i])
+        i += 1
+
+def _node(frame, node):
+    if node == None:
+        return None
+    if node.kind == nodekind.TERMINAL:
+        if node.has_lexkinds([lexkind.ID, lexkind.SELF]):
+            node.address = _address(frame, node.value.text)
+    elif node.kind == nodekind.FUNC:
+        _func(frame, node, _arg_names(node.leaves[1], False))
+    elif node.kind == nodekind.CLASS:
+        _class(frame, node)
+    elif node.kind == nodekind.FIELD_ACCESS:
+        # leaves[0] eh o nome do campo, nao uma variavel
+        _node(frame, node.leaves[1])
+    elif node.kind == nodekind.IMPORT or node.kind == nodekind.FROM_IMPORT:
+        pass
+    else:
+        if node.kind == nodekind.RETURN and frame.layout != None:
+            if node.leaves[0].kind == nodekind.CALL:
+                node.kind = nodekind.TAIL_CALL
+        i = 0
+        while i < len(node.leaves):
+            _node(frame, node.leaves[i])
+            i += 1
+
+# o 'self' ocupa o primeiro slot de todo metodo,
+# ver evaluator._User_Function.call_with
+def _class(frame, node):
+    methods = node.leaves[1]
+    i = 0
+    while i < len(methods.leaves):
+        method = methods.leaves[i]
+        arg_names = ["self"] + _arg_names(method.leaves[1], True)
+        _func(frame, method, arg_names)
+        i += 1
+
+# os argumentos ocupam os primeiros slots,
+# seguidos dos nomes atribuidos no corpo
+def _func(frame, node, arg_names):
+    layout = Layout()
+    i = 0
+    while i < len(arg_names):
+        layout.add(arg_names[i])
+        i += 1
+    layout.args = layout.size
+    block = node.leaves[2]
+    _collect_block(layout, block)
+    node.layout = layout
+    _block(_Frame(frame, layout), block)
+    node.inline = _inline_expr(node)
+
+# o corpo eh so 'return expr', e a expressao nao usa o nome da
+# propria funcao, ie, a funcao nao eh recursiva. 'return f(...)'
+# ja virou TAIL_CALL e continua sendo uma chamada em cauda
+def _inline_expr(node):
+    block = node.leaves[2]
+    if len(block.leaves) != 1:
+        return None
+    sttm = block.leaves[0]
+    if sttm.kind != nodekind.RETURN:
+        return None
+    expr = sttm.leaves[0]
+    if _mentions(expr, node.leaves[0].value.text):
+        return None
+    return expr
+
+# inclui os nomes de campos, ie, 'self.metodo(...)'
+def _mentions(node, name):
+    if node == None:
+        return False
+    if node.kind == nodekind.TERMINAL:
+        return node.value.text == name
+    i = 0
+    while i < len(node.leaves):
+        if _mentions(node.leaves[i], name):
+            return True
+        i += 1
+    return False
+
+# espelha evaluator._extract_names e evaluator._extract_method_args
+def _arg_names(args, is_method):
+    out = []
+    if args == None:
+        return out
+    i = 0
+    while i < len(args.leaves):
+        arg = args.leaves[i]
+        if not (is_method and arg.has_lexkind(lexkind.SELF)):
+            out += [arg.value.text]
+        i += 1
+    return out
+
+# coleta os nomes que o corpo de uma funcao pode criar no
+# proprio escopo, sem entrar no corpo de funcoes aninhadas
+def _collect_block(layout, block):
+    i = 0
+    while i < len(block.leaves):
+        _collect_sttm(layout, block.leaves[i])
+        i += 1
+
+def _collect_sttm(layout, node):
+    if node.kind == nodekind.ASSIGN or node.kind == nodekind.AUGMENTED_ASSIGN:
+        lhs = node.leaves[0]
+        if lhs.kind == nodekind.TERMINAL and lhs.value.kind == lexkind.ID:
+            layout.add(lhs.value.text)
+    elif node.kind == nodekind.FUNC or node.kind == nodekind.CLASS:
+        layout.add(node.leaves[0].value.text)
+    elif node.kind == nodekind.IMPORT:
+        _collect_ids(layout, node.leaves[0])
+    elif node.kind == nodekind.FROM_IMPORT:
+        _collect_ids(layout, node.leaves[1])
+    elif node.kind == nodekind.WHILE or node.kind == nodekind.DO:
+        _collect_block(layout, node.leaves[1])
+    elif node.kind == nodekind.IF:
+        _collect_block(layout, node.leaves[1])
+        elifs = node.leaves[2]
+        if elifs != None:
+            i = 0
+            while i < len(elifs.leaves):
+                _collect_block(layout, elifs.leaves[i].leaves[1])
+                i += 1
+        if node.leaves[3] != None:
+            _collect_block(layout, node.leaves[3].leaves[0])
+
+def _collect_ids(layout, idlist):
+    i = 0
+    while i < len(idlist.leaves):
+        layout.add(idlist.leaves[i].value.text)
+        i += 1
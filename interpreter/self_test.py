@@ -1,7 +1,11 @@
 import scopekind
 import objkind
 from parser import parse
-from evaluator import _Scope, _Builtin_Func, _Py_Object, evaluate
+from core import Result
+from evaluator import _Scope, _Py_Object, evaluate
+from evaluator import _add_builtin, _variadic
+from evaluator import _seq_len, _list_item, _List_Store, _bool_obj
+from evaluator import _new_list, _store_of, _list_range, _num_obj
 
 def _str_obj(obj):
     if obj.is_kind(objkind.MODULE):
@@ -18,31 +22,345 @@ def _str_obj(obj):
 def _obj_none():
     return _Py_Object(objkind.NONE, None, False)
 
-def _print_wrapper(obj):
-    print(_str_obj(obj))
+def _ok(obj):
+    return Result(obj, None)
+
+def _fail(message):
+    return Result(None, message)
+
+def _print_wrapper(args):
+    out = ""
+    i = 0
+    while i < len(args):
+        if i > 0:
+            out += " "
+        out += _str_obj(args[i])
+        i += 1
+    print(out)
     return _obj_none()
 
-def _int_wrapper(obj):
+def _int_wrapper(args):
+    obj = args[0]
     value = int(obj.value)
     return _Py_Object(objkind.NUM, value, False)
 
-def _str_wrapper(obj):
+def _str_wrapper(args):
+    obj = args[0]
     value = _str_obj(obj)
     return _Py_Object(objkind.STR, value, False)
 
-def _len_wrapper(obj):
-    value = len(obj.value)
+def _len_wrapper(args):
+    obj = args[0]
+    value = _seq_len(obj)
     return _Py_Object(objkind.NUM, value, False)
 
-def _create_func(func):
-    bf = _Builtin_Func(1, func)
-    return _Py_Object(objkind.BUILTIN_FUNC, bf, False)
+# as funcoes de string usam os builtins de mesmo nome
+# do interpretador de fora, ver _builtins.py
+def _all_strs(objs):
+    i = 0
+    while i < len(objs):
+        if not objs[i].is_kind(objkind.STR):
+            return False
+        i += 1
+    return True
+
+def _join_wrapper(args):
+    sep = args[0]
+    list = args[1]
+    if not sep.is_kind(objkind.STR):
+        return _fail("expected a string")
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    parts = []
+    i = 0
+    size = _seq_len(list)
+    while i < size:
+        item = _list_item(list, i)
+        if not item.is_kind(objkind.STR):
+            return _fail("list element is not a string")
+        parts += [item.value]
+        i += 1
+    return _ok(_Py_Object(objkind.STR, join(sep.value, parts), False))
+
+def _split_wrapper(args):
+    if not _all_strs(args):
+        return _fail("expected a string")
+    s = args[0]
+    if len(args) == 1:
+        parts = split(s.value)
+    else:
+        sep = args[1]
+        if sep.value == "":
+            return _fail("empty separator")
+        parts = split(s.value, sep.value)
+    store = _List_Store(objkind.STR, parts)
+    if len(parts) == 0:
+        store.kind = objkind.INVALID
+    return _ok(_Py_Object(objkind.LIST, store, True))
+
+def _find_wrapper(args):
+    s = args[0]
+    sub = args[1]
+    if not _all_strs([s, sub]):
+        return _fail("expected a string")
+    return _ok(_Py_Object(objkind.NUM, find(s.value, sub.value), False))
+
+def _replace_wrapper(args):
+    s = args[0]
+    old = args[1]
+    new = args[2]
+    if not _all_strs([s, old, new]):
+        return _fail("expected a string")
+    value = replace(s.value, old.value, new.value)
+    return _ok(_Py_Object(objkind.STR, value, False))
+
+def _startswith_wrapper(args):
+    s = args[0]
+    prefix = args[1]
+    if not _all_strs([s, prefix]):
+        return _fail("expected a string")
+    return _ok(_bool_obj(startswith(s.value, prefix.value)))
+
+# as funcoes de listas e dicionarios tambem usam os builtins
+# do interpretador de fora nos 'items' e no dicionario
+def _append_wrapper(args):
+    list = args[0]
+    obj = args[1]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    list.list_store().append(obj, False)
+    return _ok(_obj_none())
+
+def _pop_wrapper(args):
+    list = args[0]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    store = list.list_store()
+    if len(store.items) == 0:
+        return _fail("pop from empty list")
+    index = len(store.items) - 1
+    if len(args) == 2:
+        if not args[1].is_kind(objkind.NUM):
+            return _fail("index is not a number")
+        index = args[1].value
+        if index < 0 or index >= len(store.items):
+            return _fail("index out of range")
+    store.detach()
+    item = pop(store.items, index)
+    kind = store.kind
+    if len(store.items) == 0:
+        store.kind = objkind.INVALID
+    if kind == None:
+        return _ok(item.copy())
+    return _ok(_Py_Object(kind, item, True))
+
+def _insert_wrapper(args):
+    list = args[0]
+    index = args[1]
+    obj = args[2]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    if not index.is_kind(objkind.NUM):
+        return _fail("index is not a number")
+    store = list.list_store()
+    if index.value < 0 or index.value > len(store.items):
+        return _fail("index out of range")
+    store.detach()
+    item = store.entry(obj, False)
+    insert(store.items, index.value, item)
+    return _ok(_obj_none())
+
+# so reconhece chaves None, booleanos, strings e inteiros
+def _key_obj(key):
+    kind = objkind.USER_OBJECT
+    if key == None:
+        kind = objkind.NONE
+    elif key == True or key == False:
+        kind = objkind.BOOL
+    elif str(key) == key:
+        kind = objkind.STR
+    elif int(str(key)) != None:
+        kind = objkind.NUM
+    return _Py_Object(kind, key, True)
+
+def _keys_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    all = keys(dict.value)
+    i = 0
+    while i < len(all):
+        out.value.append(_key_obj(all[i]), True)
+        i += 1
+    return _ok(out)
+
+def _values_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    all = keys(dict.value)
+    i = 0
+    while i < len(all):
+        out.value.append(dict.value[all[i]], False)
+        i += 1
+    return _ok(out)
+
+def _items_wrapper(args):
+    dict = args[0]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    out = _new_list()
+    all = keys(dict.value)
+    i = 0
+    while i < len(all):
+        pair = _new_list()
+        pair.value.append(_key_obj(all[i]), True)
+        pair.value.append(dict.value[all[i]], False)
+        out.value.append(pair, True)
+        i += 1
+    return _ok(out)
+
+def _get_wrapper(args):
+    dict = args[0]
+    key = args[1]
+    default = _obj_none()
+    if len(args) == 3:
+        default = args[2]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    if not key.is_hashable():
+        return _fail("object is not hashable")
+    if key.value in dict.value:
+        return _ok(dict.value[key.value])
+    return _ok(default)
+
+def _delete_wrapper(args):
+    dict = args[0]
+    key = args[1]
+    if not dict.is_kind(objkind.DICT):
+        return _fail("expected a dictionary")
+    if not key.is_hashable():
+        return _fail("object is not hashable")
+    if not (key.value in dict.value):
+        return _fail("key not found")
+    delete(dict.value, key.value)
+    return _ok(_obj_none())
+
+def _uniform_values(list, kinds):
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    kind = _store_of(list).kind
+    if kind == None:
+        return _uniform_cells(_list_range(list), kinds)
+    return _values_of_kind(kind, kinds, _list_range(list))
+
+def _uniform_cells(cells, kinds):
+    if len(cells) == 0:
+        return _ok(_List_Store(objkind.INVALID, []))
+    kind = cells[0].kind
+    values = []
+    i = 0
+    while i < len(cells):
+        if cells[i].kind != kind:
+            a = objkind.to_str(kind)
+            b = objkind.to_str(cells[i].kind)
+            return _fail("objects have different types: " + a + " vs " + b)
+        values += [cells[i].value]
+        i += 1
+    return _values_of_kind(kind, kinds, values)
+
+def _values_of_kind(kind, kinds, values):
+    if kind != objkind.INVALID and not (kind in kinds):
+        return _fail("invalid operation on object of type: " + objkind.to_str(kind))
+    return _ok(_List_Store(kind, values))
+
+def _compared_values(args):
+    kinds = [objkind.NUM, objkind.STR]
+    if len(args) == 1:
+        res = _uniform_values(args[0], kinds)
+    else:
+        res = _uniform_cells(args, kinds)
+    if res.ok() and len(res.value.items) == 0:
+        return _fail("empty list")
+    return res
+
+def _sum_wrapper(args):
+    list = args[0]
+    res = _uniform_values(list, [objkind.NUM])
+    if res.failed():
+        return res
+    return _ok(_num_obj(sum(res.value.items)))
+
+def _min_wrapper(args):
+    res = _compared_values(args)
+    if res.failed():
+        return res
+    store = res.value
+    return _ok(_Py_Object(store.kind, min(store.items), True))
+
+def _max_wrapper(args):
+    res = _compared_values(args)
+    if res.failed():
+        return res
+    store = res.value
+    return _ok(_Py_Object(store.kind, max(store.items), True))
+
+def _sorted_wrapper(args):
+    list = args[0]
+    res = _uniform_values(list, [objkind.NUM, objkind.STR])
+    if res.failed():
+        return res
+    store = res.value
+    store.items = sorted(store.items)
+    return _ok(_Py_Object(objkind.LIST, store, True))
+
+def _reversed_wrapper(args):
+    list = args[0]
+    if not list.is_kind(objkind.LIST):
+        return _fail("expected a list")
+    kind = _store_of(list).kind
+    items = _list_range(list)
+    if kind != None:
+        return _ok(_Py_Object(objkind.LIST, _List_Store(kind, reversed(items)), True))
+    out = _new_list()
+    i = len(items) - 1
+    while i >= 0:
+        out.value.append(items[i], False)
+        i -= 1
+    return _ok(out)
+
+def _abs_wrapper(args):
+    obj = args[0]
+    if not obj.is_kind(objkind.NUM):
+        return _fail("object is not a number")
+    return _ok(_num_obj(abs(obj.value)))
 
 builtins = _Scope(None, scopekind.BUILTIN)
-builtins.add_symbol("print", _create_func(_print_wrapper))
-builtins.add_symbol("int", _create_func(_int_wrapper))
-builtins.add_symbol("str", _create_func(_str_wrapper))
-builtins.add_symbol("len", _create_func(_len_wrapper))
+_add_builtin(builtins, "print", _print_wrapper, 0, _variadic, False)
+_add_builtin(builtins, "int", _int_wrapper, 1, 1, False)
+_add_builtin(builtins, "str", _str_wrapper, 1, 1, False)
+_add_builtin(builtins, "len", _len_wrapper, 1, 1, False)
+_add_builtin(builtins, "join", _join_wrapper, 2, 2, True)
+_add_builtin(builtins, "split", _split_wrapper, 1, 2, True)
+_add_builtin(builtins, "find", _find_wrapper, 2, 2, True)
+_add_builtin(builtins, "replace", _replace_wrapper, 3, 3, True)
+_add_builtin(builtins, "startswith", _startswith_wrapper, 2, 2, True)
+_add_builtin(builtins, "append", _append_wrapper, 2, 2, True)
+_add_builtin(builtins, "pop", _pop_wrapper, 1, 2, True)
+_add_builtin(builtins, "insert", _insert_wrapper, 3, 3, True)
+_add_builtin(builtins, "keys", _keys_wrapper, 1, 1, True)
+_add_builtin(builtins, "values", _values_wrapper, 1, 1, True)
+_add_builtin(builtins, "items", _items_wrapper, 1, 1, True)
+_add_builtin(builtins, "get", _get_wrapper, 2, 3, True)
+_add_builtin(builtins, "delete", _delete_wrapper, 2, 2, True)
+_add_builtin(builtins, "sum", _sum_wrapper, 1, 1, True)
+_add_builtin(builtins, "min", _min_wrapper, 1, _variadic, True)
+_add_builtin(builtins, "max", _max_wrapper, 1, _variadic, True)
+_add_builtin(builtins, "sorted", _sorted_wrapper, 1, 1, True)
+_add_builtin(builtins, "reversed", _reversed_wrapper, 1, 1, True)
+_add_builtin(builtins, "abs", _abs_wrapper, 1, 1, True)
 
 program = "def generation(prev, curr):\n"
 program += "    i = 1\n"
@@ -0,0 +1,486 @@
+from compiler import compile_block, compile_inline
+from evaluator import _Py_Object, _eval_bin_objs, _eval_una_obj, _call_obj
+from evaluator import _field_obj, _index_obj, _slice_obj, _lhs_name
+from evaluator import _lhs_index_obj, _lhs_field_obj, _aug_assign_objs
+from evaluator import _return_obj, _eval_import, _eval_from, _eval_func
+from evaluator import _eval_declare_class, _load_name, _in_constants_obj
+from evaluator import _true, _false, _none, _bool_obj
+from evaluator import _method_of, _tail_call_obj, _tail_call
+from evaluator import _Completion, _returned, _tail_called, _new_list
+from evaluator import _hoisted_value, _clear_hoisted, _leave_inline
+from evaluator import _quick_bin, _deoptimized, _seq_len, _sized_kinds
+import objkind
+import opkind
+
+# motor alternativo ao Tree_Walker: compila cada bloco uma unica vez
+# (ver compiler.py) e executa o codigo linear num laco de despacho.
+# A semantica de cada operacao eh a mesma do avaliador, apenas
+# a ordem de avaliacao deixa de depender da recursao na arvore.
+# Chamadas de funcoes do usuario tambem nao usam a pilha do Python:
+# o estado do chamador fica num _Frame e o laco passa a executar o
+# codigo da funcao chamada, a profundidade eh limitada apenas por
+# Options.stack_limit.
+class VM:
+    def __init__(self):
+        self.name = "vm"
+        # cache de BLOCK -> Code, funcoes e modulos
+        # sao compilados na primeira execucao
+        self.codes = {}
+        # cache de expressao -> Code, para o corpo das
+        # funcoes pequenas (ver resolver._inline_expr)
+        self.inline_codes = {}
+
+    def get_code(self, block):
+        if block in self.codes:
+            return self.codes[block]
+        code = compile_block(block)
+        self.codes[block] = code
+        return code
+
+    # todas as funcoes criadas pelo mesmo 'def' compartilham o
+    # mesmo Code, que tambem fica guardado na propria funcao
+    def function_code(self, func):
+        if func.code == None:
+            func.code = self.get_code(func.block)
+        return func.code
+
+    def inline_code(self, func):
+        if func.inline_code == None:
+            expr = func.inline
+            if not (expr in self.inline_codes):
+                self.inline_codes[expr] = compile_inline(expr)
+            func.inline_code = self.inline_codes[expr]
+        return func.inline_code
+
+    def run_function(self, ctx, func):
+        return _run(ctx, self.function_code(func))
+
+    def run_module(self, ctx, block):
+        return _run(ctx, self.get_code(block))
+
+    # chamada expandida feita fora do laco de _run, ie, por
+    # _User_Function.call_with. O valor volta pelo return_obj
+    # do chamador, como num 'return'
+    def run_inline(self, ctx, func):
+        out = _run(ctx, self.inline_code(func))
+        if out != _returned:
+            return ctx.fail_with(out)
+        return ctx.curr_call_node.parent.return_obj
+
+# estado de um chamador suspenso, 'pc' eh a posicao da chamada
+# e o resultado vai para stack[sp-1]
+class _Frame:
+    def __init__(self, parent, code, stack, sp, pc):
+        self.parent = parent
+        self.code = code
+        self.stack = stack
+        self.sp = sp
+        self.pc = pc
+
+# _enter nao empilhou nada, a chamada eh feita por _call_obj
+_not_entered = _Completion("not entered")
+# _enter entrou no quadro reusado de uma funcao pequena, o codigo
+# a executar eh o da expressao (ver VM.inline_code)
+_inlined = _Completion("inlined")
+
+# empilha o escopo da chamada de 'thing' sem executa-la, a funcao
+# a executar fica em ctx.curr_call_node.func. 'receiver' eh a
+# instancia quando 'thing' eh um metodo. Retorna None, o erro
+# da chamada, _inlined ou _not_entered para builtins e classes
+# sem __init__
+def _enter(ctx, node, thing, receiver, args):
+    if receiver != None:
+        if thing.enter_inline_with(ctx, receiver, args):
+            return _inlined
+        return _at(thing.enter_with(ctx, receiver, args), node)
+    if thing.kind == objkind.USER_FUNCTION:
+        if thing.value.enter_inline(ctx, args):
+            return _inlined
+        return _at(thing.value.enter(ctx, args), node)
+    if thing.kind == objkind.USER_CLASS:
+        template = thing.value
+        if "__init__" in template.methods:
+            obj = template.new_instance()
+            err = template.methods["__init__"].enter_with(ctx, obj, args)
+            if err != None:
+                return _at(err, node.leaves[1])
+            ctx.curr_call_node.instance = obj
+            return None
+    return _not_entered
+
+def _at(err, node):
+    if err != None and err.range == None:
+        err.range = node.range.copy()
+    return err
+
+# condicao 'i < len(xs)' do laco contado 'loop', ou None se 'i' nao
+# eh um numero, 'xs' nao eh lista ou string, ou 'len' nao eh o builtin.
+# Os nomes sao lidos de novo a cada volta, o corpo pode alterar 'xs'
+def _counted_test(ctx, loop):
+    counter = _load_name(ctx, loop.counter)
+    bound = _load_name(ctx, loop.bound)
+    length = _load_name(ctx, loop.length)
+    if counter == None or bound == None or length == None:
+        return None
+    if counter.kind != objkind.NUM or not bound.is_kinds(_sized_kinds):
+        return None
+    builtin = ctx.builtin_scope.retrieve("len")
+    if builtin == None or length.kind != objkind.BUILTIN_FUNC:
+        return None
+    if length.value != builtin.value:
+        return None
+    return _bool_obj(counter.value < _seq_len(bound))
+
+# incremento 'i += k' do laco contado 'loop', False se 'i' nao eh
+# mais um numero e o '+=' comum deve reportar o erro
+def _counted_step(ctx, loop):
+    counter = _load_name(ctx, loop.counter)
+    if counter == None or counter.kind != objkind.NUM:
+        return False
+    counter.set(objkind.NUM, counter.value + loop.step)
+    return True
+
+def _new_stack(size):
+    out = []
+    i = 0
+    while i < size:
+        out += [None]
+        i += 1
+    return out
+
+def _run(ctx, code):
+    ops = code.ops
+    args = code.args
+    nodes = code.nodes
+    stack = _new_stack(code.max_stack)
+    sp = 0
+    pc = 0
+    # chamadores suspensos, None enquanto o codigo executado
+    # eh o passado para _run
+    frame = None
+    # os ramos estao ordenados pela frequencia dos opcodes,
+    # todo Code termina com END
+    while True:
+        op = ops[pc]
+        if op == opkind.NAME:
+            node = nodes[pc]
+            obj = _load_name(ctx, node)
+            if obj == None:
+                return ctx.error("name not found", node)
+            stack[sp] = obj
+            sp += 1
+        elif op == opkind.QUICK_BINARY:
+            quick = args[pc]
+            left = stack[sp-2]
+            right = stack[sp-1]
+            obj = None
+            if left.kind == quick.kind and right.kind == quick.kind:
+                apply = quick.op
+                obj = apply(left.value, right.value)
+            if obj == None:
+                # volta ao caso geral para sempre, como em
+                # evaluator._eval_quick_bin
+                ops[pc] = opkind.BINARY
+                args[pc] = _deoptimized
+                obj = _eval_bin_objs(ctx, nodes[pc], left, right)
+                if obj == None:
+                    return ctx.err
+            sp -= 1
+            stack[sp-1] = obj
+        elif op == opkind.FIELD:
+            obj = _field_obj(ctx, nodes[pc], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            stack[sp-1] = obj
+        elif op == opkind.CALL or op == opkind.CALL_METHOD:
+            node = nodes[pc]
+            base = sp - args[pc]
+            call_args = stack[base:sp]
+            receiver = None
+            sp = base
+            if op == opkind.CALL_METHOD:
+                receiver = stack[base-1]
+                sp = base - 1
+            thing = stack[sp-1]
+            err = _enter(ctx, node, thing, receiver, call_args)
+            if err == None or err == _inlined:
+                frame = _Frame(frame, code, stack, sp, pc)
+                if err == _inlined:
+                    code = ctx.engine.inline_code(ctx.curr_call_node.func)
+                else:
+                    code = ctx.engine.function_code(ctx.curr_call_node.func)
+                ops = code.ops
+                args = code.args
+                nodes = code.nodes
+                stack = _new_stack(code.max_stack)
+                sp = 0
+                pc = -1
+            elif err == _not_entered:
+                obj = _call_obj(ctx, node, thing, call_args)
+                if obj == None:
+                    return ctx.err
+                stack[sp-1] = obj
+            else:
+                return err
+        elif op == opkind.TAIL_CALL or op == opkind.TAIL_CALL_METHOD:
+            node = nodes[pc]
+            base = sp - args[pc]
+            receiver = None
+            thing = stack[base-1]
+            if op == opkind.TAIL_CALL_METHOD:
+                receiver = stack[base-1]
+                thing = stack[base-2]
+            if receiver != None:
+                out = _tail_call(ctx, node, thing, receiver, stack[base:sp])
+            else:
+                out = _tail_call_obj(ctx, node, thing, stack[base:sp])
+            if out == _tail_called:
+                # a funcao chamada ocupa o lugar da atual
+                instance = ctx.curr_call_node.instance
+                ctx.pop_env()
+                func = ctx.tail_func
+                # um __init__ devolve a instancia no END, e sem
+                # chamador suspenso quem sai do quadro eh call_with,
+                # entao so esses casos nao sao expandidos
+                inline = instance == None and frame != None
+                if inline and func.enter_inline_with(ctx, ctx.tail_receiver, ctx.tail_args):
+                    code = ctx.engine.inline_code(func)
+                else:
+                    err = func.enter_with(ctx, ctx.tail_receiver, ctx.tail_args)
+                    if err != None:
+                        return _at(err, node)
+                    ctx.curr_call_node.instance = instance
+                    code = ctx.engine.function_code(func)
+                ops = code.ops
+                args = code.args
+                nodes = code.nodes
+                stack = _new_stack(code.max_stack)
+                sp = 0
+                pc = -1
+            elif out == _returned:
+                pc = len(ops) - 2
+            else:
+                return out
+        elif op == opkind.LOAD_METHOD:
+            node = nodes[pc]
+            obj = stack[sp-1]
+            method = _method_of(obj, node)
+            if method != None:
+                stack[sp-1] = method
+                stack[sp] = obj
+            else:
+                obj = _field_obj(ctx, node, obj)
+                if obj == None:
+                    return ctx.err
+                stack[sp-1] = obj
+                stack[sp] = None
+            sp += 1
+        elif op == opkind.BINARY:
+            node = nodes[pc]
+            obj = _eval_bin_objs(ctx, node, stack[sp-2], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            if args[pc] == None:
+                # quickening: a instrucao passa a ser QUICK_BINARY
+                quick = _quick_bin(node, stack[sp-2], stack[sp-1])
+                if quick != None:
+                    ops[pc] = opkind.QUICK_BINARY
+                    args[pc] = quick
+            sp -= 1
+            stack[sp-1] = obj
+        elif op == opkind.ASSIGN:
+            exp = stack[sp-1]
+            stack[sp-2].assign(exp)
+            sp -= 2
+        elif op == opkind.IF_TEST:
+            obj = stack[sp-1]
+            sp -= 1
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("condition expected to be boolean", nodes[pc])
+            if not obj.value:
+                pc = args[pc] - 1
+        elif op == opkind.RETURN:
+            out = _return_obj(ctx, nodes[pc], stack[sp-1])
+            if out != _returned:
+                return out
+            if frame == None:
+                return out
+            pc = len(ops) - 2
+        elif op == opkind.END:
+            if frame == None:
+                return None
+            # volta para o chamador
+            obj = ctx.curr_call_node.instance
+            ctx.pop_env()
+            if obj == None:
+                obj = ctx.get_return()
+            code = frame.code
+            ops = code.ops
+            args = code.args
+            nodes = code.nodes
+            stack = frame.stack
+            sp = frame.sp
+            pc = frame.pc
+            frame = frame.parent
+            stack[sp-1] = obj
+        elif op == opkind.INLINE_RETURN:
+            obj = stack[sp-1]
+            if frame == None:
+                return _return_obj(ctx, nodes[pc], obj)
+            _leave_inline(ctx)
+            code = frame.code
+            ops = code.ops
+            args = code.args
+            nodes = code.nodes
+            stack = frame.stack
+            sp = frame.sp
+            pc = frame.pc
+            frame = frame.parent
+            stack[sp-1] = obj
+        elif op == opkind.LOAD_CONST:
+            stack[sp] = args[pc]
+            sp += 1
+        elif op == opkind.LHS_FIELD:
+            obj = _lhs_field_obj(ctx, nodes[pc], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            stack[sp-1] = obj
+        elif op == opkind.LHS_NAME:
+            obj = _lhs_name(ctx, nodes[pc])
+            if obj == None:
+                return ctx.err
+            stack[sp] = obj
+            sp += 1
+        elif op == opkind.INDEX:
+            obj = _index_obj(ctx, nodes[pc], stack[sp-2], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            sp -= 1
+            stack[sp-1] = obj
+        elif op == opkind.AUG_ASSIGN:
+            err = _aug_assign_objs(ctx, nodes[pc], stack[sp-2], stack[sp-1])
+            if err != None:
+                return err
+            sp -= 2
+        elif op == opkind.POP:
+            sp -= 1
+        elif op == opkind.WHILE_TEST:
+            obj = stack[sp-1]
+            sp -= 1
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("expression is not a boolean", nodes[pc])
+            if not obj.value:
+                pc = args[pc] - 1
+        elif op == opkind.JUMP:
+            pc = args[pc] - 1
+        elif op == opkind.COUNTED_TEST:
+            obj = _counted_test(ctx, nodes[pc].cache)
+            if obj != None:
+                stack[sp] = obj
+                sp += 1
+                pc = args[pc] - 1
+        elif op == opkind.COUNTED_STEP:
+            if _counted_step(ctx, nodes[pc].cache):
+                pc = args[pc] - 1
+        elif op == opkind.OR_TEST:
+            if stack[sp-1].value:
+                stack[sp-1] = _true
+                pc = args[pc] - 1
+        elif op == opkind.AND_TEST:
+            if not stack[sp-1].value:
+                stack[sp-1] = _false
+                pc = args[pc] - 1
+        elif op == opkind.LIST_ADD:
+            sp -= 1
+            stack[sp-1].value.append(stack[sp], args[pc])
+        elif op == opkind.NEW_LIST:
+            stack[sp] = _new_list()
+            sp += 1
+        elif op == opkind.OR_END:
+            out = stack[sp-2].value or stack[sp-1].value
+            sp -= 1
+            stack[sp-1] = _bool_obj(out)
+        elif op == opkind.AND_END:
+            out = stack[sp-2].value and stack[sp-1].value
+            sp -= 1
+            stack[sp-1] = _bool_obj(out)
+        elif op == opkind.SLICE:
+            obj = _slice_obj(ctx, nodes[pc], stack[sp-3], stack[sp-2], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            sp -= 2
+            stack[sp-1] = obj
+        elif op == opkind.UNARY:
+            obj = _eval_una_obj(ctx, nodes[pc], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            stack[sp-1] = obj
+        elif op == opkind.DO_TEST:
+            obj = stack[sp-1]
+            sp -= 1
+            if not obj.is_kind(objkind.BOOL):
+                return ctx.error("expression is not a boolean", nodes[pc])
+            if obj.value:
+                pc = args[pc] - 1
+        elif op == opkind.IN_CONST:
+            stack[sp-1] = _in_constants_obj(nodes[pc], stack[sp-1])
+        elif op == opkind.HOISTED_LOAD:
+            obj = ctx.curr_scope().slots[nodes[pc].address.slot]
+            if obj != None:
+                stack[sp] = obj
+                sp += 1
+                pc = args[pc] - 1
+        elif op == opkind.HOISTED_STORE:
+            node = nodes[pc]
+            ctx.curr_scope().slots[node.address.slot] = _hoisted_value(node, stack[sp-1])
+        elif op == opkind.CLEAR_HOISTED:
+            _clear_hoisted(ctx, nodes[pc])
+        elif op == opkind.CHECK_MUTABLE:
+            if not stack[sp-1].mutable:
+                return ctx.error("object is not mutable", nodes[pc])
+        elif op == opkind.LHS_INDEX:
+            obj = _lhs_index_obj(ctx, nodes[pc], stack[sp-2], stack[sp-1])
+            if obj == None:
+                return ctx.err
+            sp -= 1
+            stack[sp-1] = obj
+        elif op == opkind.NEW_DICT:
+            stack[sp] = _Py_Object(objkind.DICT, {}, True)
+            sp += 1
+        elif op == opkind.DICT_ADD:
+            key = stack[sp-2]
+            value = stack[sp-1].copy()
+            if not key.is_hashable():
+                return ctx.error("object is not hashable", nodes[pc])
+            sp -= 2
+            stack[sp-1].value[key.value] = value
+        elif op == opkind.IMPORT:
+            err = _eval_import(ctx, nodes[pc])
+            if err != None:
+                return err
+        elif op == opkind.FROM:
+            err = _eval_from(ctx, nodes[pc])
+            if err != None:
+                return err
+        elif op == opkind.FUNC:
+            _eval_func(ctx, nodes[pc])
+        elif op == opkind.CLASS:
+            _eval_declare_class(ctx, nodes[pc])
+        elif op == opkind.ERROR:
+            return ctx.error(args[pc], nodes[pc])
+        # literais so aparecem aqui se a arvore nao passou por optimizer.py
+        elif op == opkind.LOAD_STR:
+            stack[sp] = _Py_Object(objkind.STR, args[pc], True)
+            sp += 1
+        elif op == opkind.LOAD_NUM:
+            stack[sp] = _Py_Object(objkind.NUM, args[pc], True)
+            sp += 1
+        elif op == opkind.LOAD_BOOL:
+            stack[sp] = _bool_obj(args[pc])
+            sp += 1
+        elif op == opkind.LOAD_NONE:
+            stack[sp] = _none
+            sp += 1
+        else:
+            return ctx.error("invalid opcode: " + opkind.to_str(op), nodes[pc])
+        pc += 1
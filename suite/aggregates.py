@@ -0,0 +1,40 @@
+# agregacoes nativas sobre listas
+def test():
+    l = [5, 3, 9, 1]
+    if sum(l) != 18 or min(l) != 1 or max(l) != 9:
+        return False
+    s = sorted(l)
+    if s != [1, 3, 5, 9] or l[0] != 5:
+        return False
+    r = reversed(l)
+    if r != [1, 9, 3, 5]:
+        return False
+    r[0] = 100
+    if l[3] != 1:
+        return False
+    if sum([]) != 0 or sorted([]) != []:
+        return False
+    if abs(-7) != 7 or abs(2) != 2:
+        return False
+
+    names = ["pear", "apple", "fig"]
+    if min(names) != "apple" or sorted(names) != ["apple", "fig", "pear"]:
+        return False
+    if sum(l[1:3]) != 12:
+        return False
+
+    mixed = [[1], "a", 2]
+    back = reversed(mixed)
+    if back[0] != 2 or back[2][0] != 1:
+        return False
+
+    nums = [7, "a", 2]
+    nums[1] = 9
+    if max(nums) != 9 or sorted(nums) != [2, 7, 9]:
+        return False
+    return True
+
+if test():
+    print("aggregates: OK!")
+else:
+    print("aggregates: FAIL!")
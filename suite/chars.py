@@ -0,0 +1,31 @@
+# 's[i]' devolve sempre o mesmo objeto para o mesmo caractere,
+# mas alterar o resultado nunca altera a string ou outros usos
+def add_q(x):
+    x += "q"
+    return x
+
+def test():
+    s = "abca"
+    c = s[0]
+    c += "z"
+    if s[0] != "a" or c != "az":
+        return False
+    if add_q(s[3]) != "aq" or s[3] != "a":
+        return False
+
+    l = [s[0], s[1:2]]
+    l[0] = "k"
+    l[1] += "m"
+    if s[0] + s[1] != "ab" or l[0] + l[1] != "kbm":
+        return False
+
+    d = {"k": s[2]}
+    d["k"] += "!"
+    if d["k"] != "c!" or s[2:3] != "c":
+        return False
+    return True
+
+if test():
+    print("chars: OK!")
+else:
+    print("chars: FAIL!")
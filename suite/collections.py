@@ -0,0 +1,86 @@
+# funcoes que alteram listas e dicionarios no lugar
+
+# 'x' eh passado por referencia e continua sendo
+# o mesmo elemento depois que a lista muda
+def move_and_set(x, l):
+    insert(l, 0, 7)
+    pop(l)
+    x = 5
+
+def test_lists():
+    l = [1, 2, 3]
+    alias = l
+    append(l, 4)
+    if len(alias) != 4 or pop(l) != 4 or len(l) != 3:
+        return False
+    insert(l, 0, 0)
+    insert(l, 4, "end")
+    if alias[0] != 0 or alias[4] != "end":
+        return False
+    if l != [0, 1, 2, 3, "end"]:
+        return False
+
+    # a fatia nao muda quando a lista original muda
+    s = l[1:3]
+    x = pop(l)
+    insert(l, 0, "start")
+    if x != "end" or s[0] != 1 or s[1] != 2 or len(s) != 2:
+        return False
+
+    while len(l) > 0:
+        pop(l)
+    append(l, "a")
+    if l != ["a"]:
+        return False
+
+    big = ["x"]
+    i = 0
+    while i < 20:
+        big += [i]
+        i += 1
+    if not (19 in big):
+        return False
+    pop(big)
+    if 19 in big or not (18 in big):
+        return False
+    insert(big, 5, "new")
+    if not ("new" in big):
+        return False
+
+    nums = [1, 2, 3]
+    move_and_set(nums[1], nums)
+    if nums != [7, 1, 5]:
+        return False
+    move_and_set(nums[2], nums)
+    if nums != [7, 7, 1]:
+        return False
+    return True
+
+def test_dicts():
+    d = {"a": 1, "b": 2, 3: "c"}
+    if len(keys(d)) != 3 or keys(d) != ["a", "b", 3]:
+        return False
+    if values(d) != [1, 2, "c"]:
+        return False
+    pairs = items(d)
+    if pairs[2][0] != 3 or pairs[2][1] != "c":
+        return False
+    if get(d, "a", 0) != 1 or get(d, "z", 0) != 0:
+        return False
+    delete(d, "a")
+    if "a" in d or keys(d) != ["b", 3]:
+        return False
+
+    v = values(d)
+    v[0] = 100
+    if d["b"] != 2:
+        return False
+    return True
+
+def test():
+    return test_lists() and test_dicts()
+
+if test():
+    print("collections: OK!")
+else:
+    print("collections: FAIL!")
@@ -0,0 +1,28 @@
+def inc(n):
+    n += 1
+    return n
+
+def kind(c):
+    if c in ["a", "e", "i", "o", "u"]:
+        return "vowel"
+    elif c in [" ", "\n"]:
+        return "space"
+    return "other"
+
+def test():
+    if inc(5) != 6 or inc(5) != 6:
+        return False
+    if 2 * 3 + 1 != 7 or 7 % 3 != 1 or -3 + 3 != 0:
+        return False
+    if not (not False) or "a" + "b" != "ab":
+        return False
+    if kind("e") != "vowel" or kind("\n") != "space" or kind("x") != "other":
+        return False
+    if [1] in [1, 2] or None in [1, 2]:
+        return False
+    return True
+
+if test():
+    print("consts: OK!")
+else:
+    print("consts: FAIL!")
@@ -0,0 +1,74 @@
+# lacos 'while i < len(xs)' com o corpo alterando o contador e a lista
+def grow(xs):
+    i = 0
+    while i < len(xs):
+        if xs[i] < 3:
+            xs += [xs[i] + 1]
+        i += 1
+    return xs
+
+def skip(xs):
+    out = ""
+    i = 0
+    while i < len(xs):
+        out += xs[i]
+        if xs[i] == "b":
+            i += 1
+        i += 1
+    return out
+
+def swap(xs):
+    n = 0
+    i = 0
+    while i < len(xs):
+        if i == 1:
+            xs = "abcdef"
+        n += 1
+        i += 1
+    return n
+
+def first(xs, x):
+    i = 0
+    while i < len(xs):
+        if xs[i] == x:
+            return i
+        i += 1
+    return -1
+
+# o contador eh passado por referencia e a funcao o altera
+def advance(x):
+    x += 1
+
+def every_other(xs):
+    n = 0
+    i = 0
+    while i < len(xs):
+        advance(i)
+        n += 1
+        i += 1
+    return n
+
+def test():
+    if every_other([1, 2, 3, 4, 5]) != 3:
+        return False
+    if grow([0, 2]) != [0, 2, 1, 3, 2, 3]:
+        return False
+    if skip(["a", "b", "c", "d"]) != "abd" or swap([1, 2]) != 6:
+        return False
+    if first("hello", "l") != 2 or first([], 1) != -1:
+        return False
+    s = "ab"
+    i = 0
+    while i < len(s):
+        s += "c"
+        i += 1
+        if i > 3:
+            s = [1]
+    if i != 4 or s != [1]:
+        return False
+    return True
+
+if test():
+    print("counted: OK!")
+else:
+    print("counted: FAIL!")
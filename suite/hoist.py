@@ -0,0 +1,75 @@
+# expressoes invariantes dentro de lacos continuam vendo as
+# alteracoes feitas pelo corpo e sao avaliadas no mesmo ponto
+class Box:
+    def __init__(self, items):
+        self.items = items
+
+def total(box):
+    out = 0
+    i = 0
+    while i < len(box.items):
+        out += box.items[i] * len(box.items)
+        i += 1
+    return out
+
+def grow(xs):
+    ys = xs
+    n = 0
+    i = 0
+    while i < 3:
+        n += len(xs)
+        ys += [i]
+        i += 1
+    return n
+
+def rebind(a, b):
+    n = 0
+    i = 0
+    while i < 3:
+        n += len(a)
+        b = [1, 2, 3, 4]
+        i += 1
+    return n
+
+def never(xs):
+    i = 0
+    while i < 0:
+        print(xs.missing)
+    return i
+
+def count(s, c):
+    n = 0
+    i = 0
+    do:
+        if s[i] in [c, c + c]:
+            n += 1
+        i += 1
+    while i < len(s)
+    return n
+
+def nested(xs):
+    out = 0
+    i = 0
+    while i < 2:
+        j = 0
+        while j < 2:
+            out += len(xs) + xs[0]
+            j += 1
+        xs[0] = 10
+        i += 1
+    return out
+
+def test():
+    if total(Box([1, 2, 3])) != 18 or grow([5]) != 6:
+        return False
+    l = [7]
+    if rebind(l, l) != 9 or never(1) != 0:
+        return False
+    if count("abcab", "b") != 2 or nested([1]) != 26:
+        return False
+    return True
+
+if test():
+    print("hoist: OK!")
+else:
+    print("hoist: FAIL!")
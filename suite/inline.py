@@ -0,0 +1,57 @@
+import lib
+from lib import square
+
+def double(x):
+    return x * 2
+
+def is_digit(c):
+    return c >= "0" and c <= "9"
+
+# recursiva, nunca eh expandida
+def count_down(n):
+    return n == 0 or count_down(n - 1)
+
+# recursao mutua: o quadro reusado ja esta em uso
+def is_even(n):
+    return n == 0 or is_odd(n - 1)
+
+def is_odd(n):
+    return n != 0 and is_even(n - 1)
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+    def get_x(self):
+        return self.x
+    def sum(self):
+        return self.get_x() + self.y
+
+def via_tail(x):
+    return double(x)
+
+p = Point(3, 4)
+total = 0
+i = 0
+while i < 5:
+    total += double(i) + p.sum() + via_tail(1) + lib.square(i) + square(2)
+    i += 1
+get = p.get_x
+
+def test():
+    if total != 115 or not is_digit("5") or is_digit("a"):
+        return False
+    if not count_down(5) or not is_even(10) or not is_odd(7):
+        return False
+    return get() == 3
+
+before = test()
+
+# a chamada segue a nova ligacao do nome
+def double(x):
+    return x * 3
+
+if before and double(2) == 6 and via_tail(2) == 6:
+    print("inline: OK!")
+else:
+    print("inline: FAIL!")
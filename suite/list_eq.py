@@ -0,0 +1,60 @@
+# '==' e 'in' comparam listas elemento a elemento, e listas
+# grandes buscadas varias vezes ganham um indice
+def test_eq():
+    if not ([1, [2, "a"]] == [1, [2, "a"]]):
+        return False
+    if [1, 2] == [1, 2, 3] or [1, 2, 3] == [1, 2]:
+        return False
+    if [[1]] == [1] or [1] == [True]:
+        return False
+    return [1, 2] != [2, 1]
+
+def test_in():
+    big = []
+    i = 0
+    while i < 100:
+        big += [i * 2]
+        i += 1
+    found = 0
+    i = 0
+    while i < 200:
+        if i in big:
+            found += 1
+        i += 1
+    if found != 100:
+        return False
+    big[0] = 1
+    if 0 in big or not (1 in big):
+        return False
+    big += [7]
+    if not (7 in big):
+        return False
+    alias = big
+    alias[1] = 3
+    if 2 in big:
+        return False
+    if 1 in [True] or not ([2, 3] in [[1], [2, 3]]):
+        return False
+    return True
+
+# o indice eh da lista, nao da variavel
+def test_rebind():
+    a = ["a"]
+    b = ["b"]
+    i = 0
+    while i < 20:
+        a += [i]
+        b += [i + 1]
+        i += 1
+    x = a
+    if not (0 in x) or not (0 in x):
+        return False
+    x = b
+    if 0 in x or 0 in x:
+        return False
+    return 0 in a
+
+if test_eq() and test_in() and test_rebind():
+    print("list_eq: OK!")
+else:
+    print("list_eq: FAIL!")
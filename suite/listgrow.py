@@ -0,0 +1,31 @@
+# 'l += [x]' cresce a lista no lugar, e a mudanca
+# aparece em todo nome que aponta para a mesma lista
+def squares(n):
+    out = []
+    i = 0
+    while i < n:
+        out += [i * i]
+        i += 1
+    return out
+
+def test():
+    l = squares(1000)
+    if len(l) != 1000 or l[999] != 998001:
+        return False
+
+    a = [1]
+    b = a
+    b += [2]
+    if len(a) != 2 or a[1] != 2:
+        return False
+
+    c = a + [3]
+    c += c
+    if len(c) != 6 or len(a) != 2:
+        return False
+    return True
+
+if test():
+    print("listgrow: OK!")
+else:
+    print("listgrow: FAIL!")
@@ -0,0 +1,42 @@
+def double(x):
+    return x * 2
+
+class Counter:
+    def __init__(self, start):
+        self.n = start
+        self.step = double
+    def inc(self):
+        self.n += 1
+        return self
+    def get(self):
+        return self.n
+    def adder(self):
+        def add(k):
+            return self.n + k
+        return add
+    def twice(self):
+        return self.step(self.get())
+
+def test():
+    a = Counter(1)
+    b = Counter(10)
+    a.inc().inc()
+    if a.get() != 3 or b.get() != 10:
+        return False
+    f = b.inc
+    f()
+    f()
+    if b.get() != 12 or a.get() != 3:
+        return False
+    add = a.adder()
+    a.inc()
+    if add(1) != 5:
+        return False
+    if a.twice() != 8:
+        return False
+    return True
+
+if test():
+    print("methods: OK!")
+else:
+    print("methods: FAIL!")
@@ -0,0 +1,107 @@
+# listas so de numeros ou so de strings guardam os valores sem
+# celulas, e viram listas comuns ao receber outro tipo
+def set_arg(x):
+    x = 10
+
+def set_first(x, l):
+    l[0] = 9
+    out = x
+    x = 5
+    return out
+
+def test_packed():
+    a = [1, 2, 3]
+    b = a
+    a += [4]
+    if b[3] != 4:
+        return False
+
+    set_arg(a[0])
+    if b[0] != 10:
+        return False
+    a[1] += 5
+    if b[1] != 7:
+        return False
+
+    s = a[1:3]
+    s[0] = 8
+    if a[1] != 8:
+        return False
+
+    if a != [10, 8, 3, 4] or not (3 in a) or "3" in a:
+        return False
+
+    a[2] = "x"
+    if b[2] != "x" or a != [10, 8, "x", 4] or s[1] != "x":
+        return False
+
+    names = []
+    i = 0
+    while i < 100:
+        names += [str(i)]
+        i += 1
+    names[5] += "!"
+    if names[5] != "5!" or not ("99" in names):
+        return False
+    if names[10:12] != ["10", "11"]:
+        return False
+
+    c = names[0:2] + [1]
+    if len(c) != 3 or c[2] != 1:
+        return False
+
+    # argumentos sao passados por referencia, inclusive elementos
+    d = [1, 2, 3]
+    if set_first(d[0], d) != 9 or d != [5, 2, 3]:
+        return False
+    return True
+
+# 'a + b', 'a += b' e a copia de uma fatia copiam os elementos,
+# tanto em listas compactas quanto em listas gerais
+def concat(l):
+    x = l + [3]
+    x[0] = 9
+    if l[0] == 9 or x[0] != 9:
+        return False
+    y = [0] + l
+    y[1] = 9
+    if l[0] == 9:
+        return False
+    z = []
+    z += l
+    z[0] = 9
+    if l[0] == 9:
+        return False
+    r = l[0:2]
+    r += [4]
+    r[0] = 7
+    if l[0] == 7 or r != [7, l[1], 4]:
+        return False
+    return True
+
+def test_concat():
+    if not concat([1, 2]) or not concat([1, "a"]):
+        return False
+    if not concat(["a", "b"]) or not concat([[1], 2]):
+        return False
+
+    # uma lista dentro de outra continua sendo a mesma lista
+    inner = [1]
+    outer = [inner, "a"] + [2]
+    outer[0][0] = 5
+    if inner[0] != 5:
+        return False
+    more = []
+    more += outer
+    more[0] += [6]
+    if len(inner) != 2:
+        return False
+    return True
+
+def test():
+    return test_packed() and test_concat()
+
+if test():
+    print("packed: OK!")
+else:
+    print("packed: FAIL!")
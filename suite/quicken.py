@@ -0,0 +1,26 @@
+# nos especializados pelo tipo dos operandos voltam ao caso geral
+# quando o tipo muda
+def combine(a, b):
+    return a + b
+
+def ratio(a, b):
+    return a / b
+
+def less(a, b):
+    return a < b
+
+def test():
+    if combine(1, 2) != 3 or combine("a", "b") != "ab":
+        return False
+    if combine([1], [2]) != [1, 2] or combine(3, 4) != 7:
+        return False
+    if not less(1, 2) or less("b", "a"):
+        return False
+    if str(ratio(6, 3)) != "2.0":
+        return False
+    return True
+
+if test():
+    print("quicken: OK!")
+else:
+    print("quicken: FAIL!")
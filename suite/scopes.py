@@ -0,0 +1,45 @@
+x = 1
+
+def read_global_then_local():
+    a = x
+    x = 2
+    return a + x
+
+def maybe_local(flag):
+    if flag:
+        x = 10
+    return x
+
+def deep():
+    a = 1
+    def mid():
+        b = 2
+        def inner():
+            return a + b + x
+        return inner
+    return mid()
+
+class C:
+    def __init__(self):
+        self.v = x
+    def get(self):
+        return self.v + x
+
+def test():
+    if read_global_then_local() != 3:
+        return False
+    if maybe_local(True) != 10:
+        return False
+    if maybe_local(False) != 1:
+        return False
+    if deep()() != 4:
+        return False
+    c = C()
+    if c.get() != 2:
+        return False
+    return True
+
+if test():
+    print("scopes: OK!")
+else:
+    print("scopes: FAIL!")
@@ -0,0 +1,40 @@
+class P:
+    def __init__(self, x, y, swap):
+        if swap:
+            self.y = y
+            self.x = x
+        else:
+            self.x = x
+            self.y = y
+
+class Q:
+    def __init__(self, y):
+        self.y = y
+
+def get_y(o):
+    return o.y
+
+def test():
+    objs = [P(1, 2, False), P(3, 4, True), Q(5), P(6, 7, False), Q(8)]
+    total = 0
+    i = 0
+    while i < len(objs):
+        total += get_y(objs[i])
+        i += 1
+    if total != 26:
+        return False
+    a = objs[0]
+    b = objs[3]
+    a.z = 10
+    a.x += b.x
+    if a.x != 7 or a.z != 10 or b.x != 6 or b.y != 7:
+        return False
+    b.z = 20
+    if a.z != 10 or b.z != 20 or get_y(b) != 7:
+        return False
+    return True
+
+if test():
+    print("shapes: OK!")
+else:
+    print("shapes: FAIL!")
@@ -0,0 +1,43 @@
+def inc(n):
+    n += 1
+    return n
+
+def flip(b):
+    b = not b
+    return b
+
+def is_small(n):
+    return n < 10
+
+def nothing():
+    pass
+
+def test():
+    a = 3
+    b = a + 1
+    b += 1
+    if a != 3 or b != 5:
+        return False
+    if inc(a + 1) != 5 or inc(a + 1) != 5:
+        return False
+    if flip(is_small(1)) or not flip(is_small(100)):
+        return False
+    if not is_small(1) or not is_small(2):
+        return False
+    l = [is_small(1), a - 3, nothing()]
+    l[0] = False
+    l[1] += 7
+    if is_small(1) != True or l[1] != 7 or l[2] != None:
+        return False
+    n = nothing()
+    n = 1
+    if nothing() != None:
+        return False
+    if 4 / 2 != 2 or str(4 / 2) != "2.0":
+        return False
+    return True
+
+if test():
+    print("shared: OK!")
+else:
+    print("shared: FAIL!")
@@ -0,0 +1,92 @@
+# fatias de listas compartilham os elementos com a lista original
+# e so sao copiadas quando recebem '+='
+def total(l):
+    out = 0
+    i = 0
+    while i < len(l):
+        out += l[i]
+        i += 1
+    return out
+
+def halves(l):
+    if len(l) < 2:
+        return total(l)
+    mid = 0
+    while mid * 2 < len(l):
+        mid += 1
+    return halves(l[0:mid]) + halves(l[mid:len(l)])
+
+def test():
+    l = []
+    i = 0
+    while i < 100:
+        l += [i]
+        i += 1
+    if halves(l) != 4950 or total(l[10:20]) != 145:
+        return False
+
+    s = l[2:6]
+    t = s[1:3]
+    if len(t) != 2 or t[0] != 3 or t[1] != 4:
+        return False
+    if s != [2, 3, 4, 5] or not (4 in s) or s == [2, 3]:
+        return False
+
+    # os elementos sao as mesmas celulas
+    t[0] = 30
+    if s[1] != 30 or l[3] != 30:
+        return False
+
+    # '+=' na fatia nao altera a original, nem o contrario
+    s += [99]
+    if len(s) != 5 or l[6] != 6 or len(l) != 100:
+        return False
+    l += [100]
+    if len(t) != 2 or len(s) != 5:
+        return False
+
+    u = l[0:3]
+    v = u
+    v[2] = 7
+    if l[2] != 7 or l[0:0] != []:
+        return False
+    w = [l[1:3], l[0:2] + l[4:5]]
+    if len(w[0]) != 2 or len(w[1]) != 3:
+        return False
+    return test_aliases()
+
+# nomes ligados a mesma fatia continuam sendo a mesma lista
+# depois que ela eh copiada, como acontece com listas comuns
+def test_aliases():
+    a = [1, 2, 3]
+    b = a[0:2]
+    c = b
+    b += [7]
+    if len(c) != 3 or c[2] != 7:
+        return False
+    append(b, 5)
+    if len(c) != 4:
+        return False
+    pop(c)
+    if len(b) != 3:
+        return False
+    insert(b, 0, 9)
+    if c[0] != 9 or len(c) != 4:
+        return False
+
+    d = a[1:3]
+    e = d
+    append(e, 4)
+    if d != [2, 3, 4]:
+        return False
+    f = a[0:2]
+    g = [f]
+    pop(f)
+    if len(g[0]) != 1:
+        return False
+    return a == [1, 2, 3]
+
+if test():
+    print("slices: OK!")
+else:
+    print("slices: FAIL!")
@@ -0,0 +1,54 @@
+# 'out += s' em strings acumula os pedacos e so concatena
+# quando o valor eh lido
+def make_str(n):
+    out = ""
+    i = 0
+    while i < n:
+        out += str(i)
+        if len(out) > 5:
+            out += "|"
+        i += 1
+    return out
+
+class Builder:
+    def __init__(self):
+        self.text = ""
+
+    def add(self, s):
+        self.text += s
+        self.text += ","
+
+def add_to(s):
+    s += "!"
+
+def test():
+    if make_str(12) != "012345|6|7|8|9|10|11|":
+        return False
+
+    b = Builder()
+    b.add("a")
+    b.add("b")
+    if b.text != "a,b,":
+        return False
+
+    # argumentos sao passados por referencia
+    words = ["x", "y"]
+    words[0] += "z"
+    add_to(words[1])
+    if words[0] + " " + words[1] != "xz y!":
+        return False
+
+    s = "ab"
+    t = s
+    s += "c"
+    if s != "abc" or t != "ab":
+        return False
+    s += s
+    if s != "abcabc":
+        return False
+    return True
+
+if test():
+    print("strbuild: OK!")
+else:
+    print("strbuild: FAIL!")
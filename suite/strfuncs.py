@@ -0,0 +1,26 @@
+# funcoes de string nativas e 'in' entre strings
+def test():
+    words = split("a,bb,,ccc", ",")
+    if len(words) != 4 or words[1] != "bb" or words[2] != "":
+        return False
+    words[0] += "!"
+    if join("-", words) != "a!-bb--ccc" or join("", []) != "":
+        return False
+    if find("hello", "ll") != 2 or find("hello", "z") != -1:
+        return False
+    if replace("a.b.c", ".", "::") != "a::b::c":
+        return False
+    if not startswith("spy", "sp") or startswith("spy", "py"):
+        return False
+    if not ("ell" in "hello") or not ("" in "hello") or "x" in "hello":
+        return False
+
+    other = split("a,bb,,ccc", ",")
+    if other[0] != "a" or words == other:
+        return False
+    return True
+
+if test():
+    print("strfuncs: OK!")
+else:
+    print("strfuncs: FAIL!")
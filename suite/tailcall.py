@@ -0,0 +1,47 @@
+def count(n, acc):
+    if n == 0:
+        return acc
+    return count(n - 1, acc + 1)
+
+def is_even(n):
+    if n == 0:
+        return True
+    return is_odd(n - 1)
+
+def is_odd(n):
+    if n == 0:
+        return False
+    return is_even(n - 1)
+
+class Walker:
+    def __init__(self):
+        self.steps = 0
+    def walk(self, n):
+        if n == 0:
+            return self.steps
+        self.steps += 1
+        return self.walk(n - 1)
+
+def first_big(l, i):
+    while i < len(l):
+        if l[i] > 10:
+            return str(l[i])
+        i += 1
+    return first_big([11], 0)
+
+def test():
+    if count(2000, 0) != 2000:
+        return False
+    if not is_even(2000) or is_odd(2000):
+        return False
+    w = Walker()
+    if w.walk(1500) != 1500:
+        return False
+    if first_big([1, 20], 0) != "20" or first_big([], 0) != "11":
+        return False
+    return True
+
+if test():
+    print("tailcall: OK!")
+else:
+    print("tailcall: FAIL!")
@@ -0,0 +1,19 @@
+# builtins com numero variavel de argumentos
+def test():
+    if max(3, 9, 4) != 9 or min("b", "a") != "a" or max([2, 8]) != 8:
+        return False
+    words = split("  a b  c ")
+    if len(words) != 3 or words[2] != "c" or len(split("   ")) != 0:
+        return False
+    if get({1: 2}, 5) != None or get({1: 2}, 1) != 2:
+        return False
+    l = [1, 2, 3]
+    if pop(l, 0) != 1 or l != [2, 3]:
+        return False
+    return True
+
+# 'print' tambem recebe varios argumentos
+if test():
+    print("variadic:", "OK!")
+else:
+    print("variadic:", "FAIL!")